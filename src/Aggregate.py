@@ -0,0 +1,233 @@
+"""
+Functions related to pooling the results of repeated runs of the campaign,
+    streamed one run at a time into running accumulators kept per AoA
+    {Depenancies}: numpy, pandas
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+import pandas as pd
+import os
+
+# Custom Functions/libraies
+from PolarRecord import *
+
+
+# quantities pooled from the polar, each with its uncertainty column 'd' + name
+polar_quantities = ('Cl', 'Cd', 'Cm', 'Cdt')
+
+# quantities pooled but not scored by RunScore: the rake positions are set, not measured,
+# so the runs agree to rounding and any deviation would be many "scatters" away
+unscored = ('y_rake',)
+
+
+def LoadRun(path: str):
+    '''
+    Returns the results of one run, read from the CSVs main.py writes (a copy of data\\CSV).
+
+    Parameters:
+    -----------
+    path : str
+        folder holding the run's Polar.csv, Pressure_AoA*.csv, Rake_Pressure*_AoA*.csv and dP_*.csv
+
+    Returns:
+    --------
+    run: dict of quantity -> dict of AoA -> (value, uncertainty), the uncertainty None where not recorded
+    '''
+    polar = pd.read_csv(os.path.join(path, 'Polar.csv'), index_col=0)
+    alpha = polar.index.to_numpy(dtype=np.float64)
+    run = {q: {a: (np.array([polar.loc[a, q]]), np.array([polar.loc[a, 'd' + q]])) for a in alpha} for q in polar_quantities}
+
+    dP_path = os.path.join(path, 'dP_airfoil.csv')
+    dP_a = np.loadtxt(dP_path, delimiter=',', ndmin=2) if os.path.exists(dP_path) else None
+    if dP_a is not None and len(dP_a) != len(alpha):
+        dP_a = None
+
+    run['p_airfoil'] = {}
+    run['p_rake'] = {}
+    run['y_rake'] = {}
+    for i, a in enumerate(alpha):
+        name = os.path.join(path, 'Pressure_AoA%d.csv' % a)
+        if os.path.exists(name):
+            p = pd.read_csv(name, index_col=0).iloc[:, 0].to_numpy(dtype=np.float64)
+            run['p_airfoil'][a] = (p, None if dP_a is None else dP_a[i])
+
+        name = os.path.join(path, 'Rake_Pressure_AoA%d.csv' % a)
+        if os.path.exists(name):
+            rake = pd.read_csv(name)
+            err_name = os.path.join(path, 'Rake_Pressure_Uncertainty_AoA%d.csv' % a)
+            err = pd.read_csv(err_name).iloc[:, 1].to_numpy(dtype=np.float64) if os.path.exists(err_name) else None
+            run['p_rake'][a] = (rake.iloc[:, 1].to_numpy(dtype=np.float64), err)
+            run['y_rake'][a] = (rake.iloc[:, 0].to_numpy(dtype=np.float64), None)
+
+    return run
+
+def _NewAccumulator(n: int):
+    # Welford count, mean and sum of squared deviations, and the inverse variance weighted sums
+    z = lambda: np.zeros(n)
+    return {'n': z(), 'mean': z(), 'M2': z(), 'W': z(), 'Wx': z(), 'Wxx': z(), 'runs': 0}
+
+def Accumulate(state: dict, name: str, a: float, x: np.array, e: np.array=None):
+    '''
+    Adds one run's values of a quantity at one AoA to the running accumulators.
+    NaN values are skipped, values without a (positive) uncertainty only enter the unweighted statistics.
+
+    Parameters:
+    -----------
+    state : dict
+        accumulators, updated in place (start from an empty dict)
+    name : str
+        quantity (e.g. 'Cl', 'p_airfoil')
+    a : float
+        angle of attack
+    x : np.array
+        values, one per port or a single coefficient
+    e : np.array, optional
+        uncertainties of x
+    '''
+    x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+    acc = state.setdefault(name, {}).get(float(a))
+    if acc is None:
+        acc = state[name][float(a)] = _NewAccumulator(len(x))
+    if len(x) != len(acc['mean']):
+        raise ValueError("%s at AoA %g has %d values, earlier runs had %d" % (name, a, len(x), len(acc['mean'])))
+
+    ok = np.isfinite(x)
+    x0 = np.where(ok, x, 0)
+
+    # Welford update, element wise as some ports may be missing in some runs
+    acc['n'] += ok
+    delta = np.where(ok, x0 - acc['mean'], 0)
+    acc['mean'] += np.where(ok, delta/np.maximum(acc['n'], 1), 0)
+    acc['M2'] += np.where(ok, delta*(x0 - acc['mean']), 0)
+
+    # inverse variance weights
+    if e is not None:
+        e = np.atleast_1d(np.asarray(e, dtype=np.float64))
+        good = ok & np.isfinite(e) & (e > 0)
+        w = np.where(good, 1/np.where(good, e, 1)**2, 0)
+        acc['W'] += w
+        acc['Wx'] += w*x0
+        acc['Wxx'] += w*x0**2
+    acc['runs'] += 1
+
+def AddRun(state: dict, run: dict):
+    '''
+    Adds every quantity of one run (see LoadRun) to the running accumulators.
+
+    Parameters:
+    -----------
+    state : dict
+        accumulators, updated in place
+    run : dict
+        run results as returned by LoadRun
+    '''
+    for name, by_aoa in run.items():
+        for a, (x, e) in by_aoa.items():
+            Accumulate(state, name, a, x, e)
+
+def Pooled(state: dict, name: str):
+    '''
+    Returns the pooled values of a quantity at every AoA.
+
+    Parameters:
+    -----------
+    state : dict
+        accumulators
+    name : str
+        quantity
+
+    Returns:
+    --------
+    pooled: dict with, per AoA (rows, ascending) and port (columns)
+        'alpha': AoA values
+        'mean', 'err': inverse variance weighted mean and its uncertainty, inflated by the
+                       Birge ratio where the runs scatter more than their uncertainties allow
+                       (the plain mean and scatter/sqrt(n) where no uncertainties were given)
+        'scatter': between run standard deviation
+        'birge': sqrt(reduced chi^2) of the runs about the weighted mean
+        'n': number of runs
+    '''
+    accs = state[name]
+    alpha = np.array(sorted(accs))
+    get = lambda k: np.array([accs[a][k] for a in alpha])
+    n, mean, M2, W, Wx, Wxx = (get(k) for k in ('n', 'mean', 'M2', 'W', 'Wx', 'Wxx'))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scatter = np.sqrt(M2/(n - 1))
+        w_mean = Wx/W
+        chi2 = Wxx - W*w_mean**2
+        birge = np.sqrt(np.maximum(chi2, 0)/np.maximum(n - 1, 1))
+        w_err = np.sqrt(1/W)*np.maximum(birge, 1)
+        weighted = W > 0
+        out_mean = np.where(weighted, w_mean, mean)
+        out_err = np.where(weighted, w_err, scatter/np.sqrt(n))
+
+    return {'alpha': alpha, 'mean': out_mean, 'err': out_err, 'scatter': scatter,
+            'birge': np.where(weighted, birge, np.nan), 'n': n}
+
+def PooledPolar(state: dict):
+    '''
+    Returns the pooled polar of every run, a structured array (see PolarRecord).
+
+    Parameters:
+    -----------
+    state : dict
+        accumulators
+
+    Returns:
+    --------
+    polar: pooled coefficients and their uncertainties per AoA
+    '''
+    pooled = {q: Pooled(state, q) for q in polar_quantities}
+    polar = PolarRecord(pooled['Cl']['alpha'])
+    for q in polar_quantities:
+        idx = PolarIndex(polar, pooled[q]['alpha'])
+        polar[q][idx] = pooled[q]['mean'][:, 0]
+        polar['d' + q][idx] = pooled[q]['err'][:, 0]
+
+    return polar
+
+def RunScore(state: dict, run: dict):
+    '''
+    Returns how far one run lies from the other runs, the largest |deviation|/(between run scatter)
+    over every port, coefficient and AoA (the unscored quantities left out), once all runs are pooled.
+    The run is taken back out of the Welford accumulators first, so it is compared to the mean and
+    scatter of the others (a run inside its own pool can never lie more than (n-1)/sqrt(n) scatters
+    from it), and the deviation is scaled by the spread expected of a new run about that mean.
+
+    Parameters:
+    -----------
+    state : dict
+        accumulators of every run, this one included (see AddRun)
+    run : dict
+        run results as returned by LoadRun
+
+    Returns:
+    --------
+    score: largest deviation in units of the scatter (0 when nothing can be compared, fewer than 3 other runs)
+    worst: (quantity, AoA) where it occurs
+    '''
+    score, worst = 0.0, None
+    for name, by_aoa in run.items():
+        if name not in state or name in unscored:
+            continue
+        for a, (x, e) in by_aoa.items():
+            acc = state[name].get(float(a))
+            if acc is None:
+                continue
+            x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+            n, mean, M2 = acc['n'], acc['mean'], acc['M2']
+
+            # Welford update undone: mean and sum of squared deviations of the other n - 1 runs
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean_o = (n*mean - x)/(n - 1)
+                M2_o = np.maximum(M2 - (x - mean)*(x - mean_o), 0)
+                scatter_o = np.sqrt(M2_o/(n - 2))
+                z = np.abs(x - mean_o)/(scatter_o*np.sqrt(n/(n - 1)))
+            z = z[np.isfinite(z) & (n > 3)]
+            if len(z) and z.max() > score:
+                score, worst = float(z.max()), (name, a)
+
+    return score, worst
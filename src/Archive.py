@@ -0,0 +1,236 @@
+"""
+Functions related to the compact archive of the raw recordings: every channel stored as int16 (when the
+    readings are exactly quantized) or float32, in byte shuffled, deflate compressed chunks with the calibration.
+    Channels are decoded a chunk or a channel at a time (see ChannelChunks, ReadSeries), the raw readings as recorded.
+    {Depenancies}: numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+import json
+import zipfile
+
+
+# time series of a recording, archived channel by channel, everything else is kept as is
+archive_series = ('spdata', 'wpdata', 'wpdata2')
+
+
+# ENCODING
+#####################
+def _Shuffle(x: np.array):
+    # bytes of equal significance next to each other, deflate finds far more repeats in them
+    return np.ascontiguousarray(x.view(np.uint8).reshape(-1, x.itemsize).T).ravel()
+
+def _Unshuffle(b: np.array, dtype: str):
+    dtype = np.dtype(dtype)
+    return np.ascontiguousarray(b.reshape(dtype.itemsize, -1).T).view(dtype).ravel()
+
+def EncodeChannel(x: np.array, tol: float=1e-4):
+    '''
+    Returns the most compact exact (or within tol) encoding of one channel.
+
+    Parameters:
+    -----------
+    x : np.array (N)
+        raw readings
+    tol : float, optional
+        largest rounding error accepted for float32, relative to the channel standard deviation
+
+    Returns:
+    --------
+    q: np.array, the stored values (int16, float32 or float64)
+    enc: dict of 'dtype', 'scale', 'zero' (x = q*scale + zero) and 'max_err'
+    '''
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    zero = float(np.min(x)) if len(x) else 0.0
+
+    # readings of an ADC are whole multiples of one step, up to the rounding of their conversion to volts
+    steps = np.diff(np.unique(x))
+    if len(steps):
+        q = np.round((x - zero)/steps.min())
+        if q.max() < 2**16:
+            step = float(np.dot(q, x - zero)/np.dot(q, q))
+            q = (q - 2**15).astype(np.int16)
+            enc = {'dtype': 'int16', 'scale': step, 'zero': zero + 2**15*step}
+            enc['max_err'] = float(np.max(np.abs(q*step + enc['zero'] - x)))
+            if enc['max_err'] <= 8*np.finfo(np.float64).eps*np.max(np.abs(x)):
+                return q, enc
+
+    f = x.astype(np.float32)
+    err = float(np.max(np.abs(f - x))) if len(x) else 0.0
+    if err <= tol*max(float(np.std(x)), np.finfo(np.float32).tiny):
+        return f, {'dtype': 'float32', 'scale': 1.0, 'zero': 0.0, 'max_err': err}
+    return x, {'dtype': 'float64', 'scale': 1.0, 'zero': 0.0, 'max_err': 0.0}
+
+def WriteArchive(path: str, data_raw: dict, gain: float, offset: float, Hg2Pa: float, f_s: float=30000, chunk: int=2**16, tol: float=1e-4):
+    '''
+    Writes one recording to an archive (a zip file, one deflated entry per channel chunk).
+
+    Parameters:
+    -----------
+    path : str
+        archive to write (e.g. .\\data\\Archive\\Experimental_data_4.arc)
+    data_raw : dict
+        recording as loaded by io.loadmat
+    gain : float
+        calibration gain
+    offset : float
+        calibration offset
+    Hg2Pa : float
+        inHg to Pa convertion factor
+    f_s : float, optional
+        sample rate (Hz)
+    chunk : int, optional
+        samples per chunk
+    tol : float, optional
+        see EncodeChannel
+
+    Returns:
+    --------
+    meta: the archive metadata, with the encoding and rounding error of every channel
+    '''
+    meta = {'version': 1, 'gain': gain, 'offset': offset, 'Hg2Pa': Hg2Pa, 'f_s': f_s, 'chunk': chunk, 'series': {}, 'arrays': []}
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+        for name, value in data_raw.items():
+            if name.startswith('__'):
+                continue
+            if name in archive_series:
+                x = np.atleast_2d(np.asarray(value, dtype=np.float64))
+                encs = []
+                for k, row in enumerate(x):
+                    q, enc = EncodeChannel(row, tol)
+                    encs.append(enc)
+                    for s in range(0, max(len(q), 1), chunk):
+                        z.writestr('%s/%d/%d' % (name, k, s//chunk), _Shuffle(q[s:s + chunk]).tobytes())
+                meta['series'][name] = {'shape': list(x.shape), 'channels': encs}
+            else:
+                value = np.asarray(value)
+                if value.dtype == object:
+                    continue
+                with z.open('arrays/%s.npy' % name, 'w') as f:
+                    np.save(f, value, allow_pickle=False)
+                meta['arrays'].append(name)
+        z.writestr('meta.json', json.dumps(meta))
+
+    return meta
+
+
+# READING
+#####################
+def OpenArchive(path: str):
+    '''
+    Returns an open archive, nothing is decoded until a channel is read.
+
+    Parameters:
+    -----------
+    path : str
+        archive file
+
+    Returns:
+    --------
+    arc: dict with the open 'zip' file and its 'meta' data (see WriteArchive)
+    '''
+    z = zipfile.ZipFile(path, 'r')
+    return {'zip': z, 'meta': json.loads(z.read('meta.json'))}
+
+def ChannelChunks(arc: dict, name: str, k: int):
+    '''
+    Yields the raw readings of one channel, one chunk at a time.
+
+    Parameters:
+    -----------
+    arc : dict
+        open archive (see OpenArchive)
+    name : str
+        series ('spdata', 'wpdata' or 'wpdata2')
+    k : int
+        channel
+
+    Yields:
+    --------
+    x: np.array, raw readings of the chunk (float64)
+    '''
+    series = arc['meta']['series'][name]
+    enc = series['channels'][k]
+    N = series['shape'][1]
+    for c in range(-(-N//arc['meta']['chunk'])):
+        q = _Unshuffle(np.frombuffer(arc['zip'].read('%s/%d/%d' % (name, k, c)), dtype=np.uint8), enc['dtype'])
+        yield q*enc['scale'] + enc['zero']
+
+def ReadChannel(arc: dict, name: str, k: int):
+    '''
+    Returns the raw readings of one channel.
+
+    Parameters:
+    -----------
+    arc : dict
+        open archive (see OpenArchive)
+    name : str
+        series
+    k : int
+        channel
+
+    Returns:
+    --------
+    x: np.array (N), float64
+    '''
+    return ReadSeries(arc, name, [k])[0]
+
+def ReadSeries(arc: dict, name: str, channels: list=None):
+    '''
+    Returns the raw readings of several channels, decoded chunk by chunk into one array.
+
+    Parameters:
+    -----------
+    arc : dict
+        open archive (see OpenArchive)
+    name : str
+        series
+    channels : list, optional
+        channels to read, all by default
+
+    Returns:
+    --------
+    x: np.array (channels, N), float64
+    '''
+    C, N = arc['meta']['series'][name]['shape']
+    channels = range(C) if channels is None else channels
+    x = np.empty((len(channels), N))
+    for row, k in zip(x, channels):
+        s = 0
+        for part in ChannelChunks(arc, name, k):
+            row[s:s + len(part)] = part
+            s += len(part)
+    return x
+
+def ReadArchive(path: str, keys: list=None):
+    '''
+    Returns the recording in an archive as io.loadmat would, the raw (uncalibrated) readings.
+
+    Parameters:
+    -----------
+    path : str
+        archive file
+    keys : list, optional
+        variables to read, all when None
+
+    Returns:
+    --------
+    data_raw: dict of variable name -> array
+    '''
+    arc = OpenArchive(path)
+    try:
+        meta = arc['meta']
+        data_raw = {}
+        for name in meta['arrays']:
+            if keys is None or name in keys:
+                with arc['zip'].open('arrays/%s.npy' % name) as f:
+                    data_raw[name] = np.load(f, allow_pickle=False)
+        for name, series in meta['series'].items():
+            if keys is None or name in keys:
+                data_raw[name] = ReadSeries(arc, name).reshape(series['shape'])
+    finally:
+        arc['zip'].close()
+
+    return data_raw
@@ -0,0 +1,107 @@
+"""
+Functions related to the append-only checkpoint of per port results, so long
+    computations can be resumed and only redone where the source recording changed
+    {Depenancies}: none
+"""
+# IMPORTS
+#####################
+# Dependancies
+import json
+import os
+
+
+def FileSignature(path: str):
+    '''
+    Returns a cheap signature of a file, changes whenever the file is rewritten.
+
+    Parameters:
+    -----------
+    path : str
+        file to sign
+
+    Returns:
+    --------
+    sig: [modification time (ns), size (bytes)]
+    '''
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+def LoadCheckpoint(path: str):
+    '''
+    Returns every result stored in a checkpoint, the latest entry of each cell wins.
+    A partially written last line (killed mid write) is ignored.
+
+    Parameters:
+    -----------
+    path : str
+        checkpoint file (one JSON record per line)
+
+    Returns:
+    --------
+    ckpt: dict of (AoA, group, port) -> record with 'sig', 'method' and 'value'
+    '''
+    ckpt = {}
+    if not os.path.exists(path):
+        return ckpt
+
+    with open(path) as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+                ckpt[(rec['aoa'], rec['group'], rec['port'])] = rec
+            except (ValueError, KeyError):
+                continue
+
+    return ckpt
+
+def CheckpointValue(ckpt: dict, aoa: float, group: str, port: int, sig: list, method: str):
+    '''
+    Returns the stored result of one cell, or None when it has to be (re)computed.
+
+    Parameters:
+    -----------
+    ckpt : dict
+        checkpoint as returned by LoadCheckpoint
+    aoa : float
+        angle of attack
+    group : str
+        channel group (e.g. 'airfoil', 'rake1', 'rake2')
+    port : int
+        port index within the group
+    sig : list
+        signature of the source recording (see FileSignature)
+    method : str
+        description of how the value is computed, a stored value made differently is stale
+
+    Returns:
+    --------
+    value: stored result or None
+    '''
+    rec = ckpt.get((aoa, group, port))
+    if rec is None or rec['sig'] != list(sig) or rec['method'] != method:
+        return None
+    return rec['value']
+
+def AppendCheckpoint(path: str, ckpt: dict, aoa: float, group: str, port: int, sig: list, method: str, value: float):
+    '''
+    Appends one finished cell to the checkpoint file (flushed to disk) and to ckpt.
+
+    Parameters:
+    -----------
+    path : str
+        checkpoint file
+    ckpt : dict
+        checkpoint as returned by LoadCheckpoint, updated in place
+    aoa, group, port, sig, method :
+        see CheckpointValue
+    value : float
+        result of the cell
+    '''
+    rec = {'aoa': aoa, 'group': group, 'port': port, 'sig': list(sig), 'method': method, 'value': float(value)}
+    with open(path, 'a') as f:
+        # each record on its own line so a torn write only loses that cell
+        f.write('\n' + json.dumps(rec) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+    ckpt[(aoa, group, port)] = rec
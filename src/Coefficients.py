@@ -1,6 +1,7 @@
 import numpy as np
+from PortHealth import RepairPorts
 
-def Cpressure(p_top: np.array, p_bot: np.array, p_top_err: np.array, p_bot_err: np.array, q_inf: np.float64, q_inf_err: np.float64):
+def Cpressure(p_top: np.array, p_bot: np.array, p_top_err: np.array, p_bot_err: np.array, q_inf: np.float64, q_inf_err: np.float64, bad: np.array=None):
     '''
     Returns the Coefficient of pressure distribution.
 
@@ -18,6 +19,9 @@ def Cpressure(p_top: np.array, p_bot: np.array, p_top_err: np.array, p_bot_err:
         Dynamic Pressure
     q_inf_err : np.float64
         Dynamic Pressure error
+    bad : np.array, optional
+        boolean mask of faulty ports, top then bottom (see PortHealth), these are interpolated over.
+        defaults to no faulty ports
 
     Returns:
     --------
@@ -36,9 +40,11 @@ def Cpressure(p_top: np.array, p_bot: np.array, p_top_err: np.array, p_bot_err:
     Cp_top_err = abs(Cp_top_err)
     Cp_bot_err = abs(Cp_bot_err)
 
-    # it was found that one port in the airfoil was outputting abnormally high. interpolating over it:
-    k = 5 #index of bad port 
-    Cp_top[k] = 0.5*(Cp_top[k+1] + Cp_top[k-1])
+    # interpolating over the faulty ports:
+    if bad is None:
+        bad = np.zeros(len(Cp_top) + len(Cp_bot), dtype=bool)
+    Cp_top = RepairPorts(Cp_top, bad[:len(Cp_top)])
+    Cp_bot = RepairPorts(Cp_bot, bad[len(Cp_top):])
 
     return Cp_top, Cp_bot, Cp_top_err, Cp_bot_err
 
@@ -0,0 +1,64 @@
+"""
+Definitions of the test campaign shared by every script (main.py, watch.py, quicklook.py,
+    sensitivity.py, errorcalcs.py and compress.py), set here once
+    {Depenancies}: numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+
+
+# DEFINITIONS
+########################
+# airfoil tap positions:
+air_top_tap_pos = [0, 0.03, 0.06, 0.10, 0.15, 0.20, 0.30, 0.40, 0.55, 0.70, 0.85, 1.00]
+air_bot_tap_pos = [0.90, 0.60, 0.40, 0.30, 0.20, 0.10, 0.05]
+
+# airfoil cord length
+c = 0.1 #m
+
+# Angles of Attack
+alpha = [0, 4, 6, 8, 9, 10, 11, 12, 13, 14, 15, 17] #12
+dalpha = 1 #deg uncertainty in AoA
+
+# calibration data
+gain = 115 # From in lab calibration code
+offset = 50 # From in lab calibration code
+Hg2Pa = 9.80665 #inHg to Pa convertion factor
+f_s = 30000 # sample rate (Hz)
+
+# ports found faulty in the lab (numbered from 1), kept in the masks whatever PortHealth finds.
+# airfoil port 6 reads off at every AoA, but next to the suction peak it does not stand out from the flow in PortHealth
+air_bad_ports = [6]
+rake_bad_ports = []
+
+# pneumatic tubing of each channel: (length m, inner diameter m, transducer volume m^3)
+# set to None to skip the tubing lag correction
+air_tubes = None # 19 entries
+rake_tubes = None # 17 entries
+nfft = 8192 # tubing correction block length
+
+# baselines of rake positions:
+y_0 = np.array([12, 12, 11.5, 11, 11.5, 11, 11.5, 12.5, 11.5, 12, 12.4, 12]) - 3.33 # inital position of the bottom port
+dir = [1, -1, -1, 1, -1, 1, 1, -1, -2, 1, -1, 1] #direction rake was moved -1 = down 1 = up
+
+# recordings, or their compact archives written by compress.py (".\data\Archive\Experimental_data_%d.arc")
+recordings = ".\data\Filtered\Experimental_data_%d.mat"
+
+# uncertainty estimate (errorcalcs.py): 'acf' integral time scale (DataErr) or 'bootstrap' moving block bootstrap (BootstrapErr)
+err_method = 'acf'
+boot_block = None # bootstrap block length in samples, N/100 by default
+n_boot = 1000 # bootstrap replicates
+boot_seed = 0 # bootstrap random seed
+
+# fluctuation energy above hf_split (see SpectralFraction) is saved with the uncertainties, main.py scores the ports on it
+hf_split = 10 # Hz, the recordings are low pass filtered at 30 Hz (filter.m)
+
+# finished (AoA, port) uncertainties are appended here by errorcalcs.py (and read by watch.py), delete to start over
+checkpoint = "data\CSV\dP_checkpoint.jsonl"
+# a stored result made with different settings is recomputed, every setting the results depend on is in their key
+err_key = "%s f_s=%r gain=%r offset=%r Hg2Pa=%r air_tubes=%r rake_tubes=%r nfft=%r" % (err_method, f_s, gain, offset, Hg2Pa, air_tubes, rake_tubes, nfft)
+if err_method == 'bootstrap':
+    err_key += " block=%r n_boot=%r seed=%r" % (boot_block, n_boot, boot_seed)
+hf_key = "hf f_split=%r f_s=%r air_tubes=%r rake_tubes=%r nfft=%r" % (hf_split, f_s, air_tubes, rake_tubes, nfft)
@@ -0,0 +1,169 @@
+"""
+Functions related to mapping the tap Cp of the whole sweep onto a dense (x/c, alpha) surface
+    through sparse interpolation operators built once from the tap positions
+    {Depenancies}: scipy, numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+from scipy import sparse
+from scipy.interpolate import CubicSpline
+import numpy as np
+
+
+def InterpOperator(x_src: np.array, x_dst: np.array, kind: str='linear', tol: float=1e-12):
+    '''
+    Returns the sparse matrix taking values at x_src to values at x_dst.
+    Any interpolant linear in the data works, the matrix columns are its response to each unit value.
+
+    Parameters:
+    -----------
+    x_src : np.array
+        source points, strictly ascending
+    x_dst : np.array
+        points to interpolate to, clamped to the source range
+    kind : str, optional
+        'linear' (2 entries per row) or 'cubic' (natural cubic spline)
+    tol : float, optional
+        entries smaller than this are dropped
+
+    Returns:
+    --------
+    op: scipy.sparse.csr_matrix (len(x_dst), len(x_src))
+    '''
+    x_src = np.asarray(x_src, dtype=np.float64)
+    x_dst = np.clip(np.asarray(x_dst, dtype=np.float64), x_src[0], x_src[-1])
+
+    if kind == 'linear':
+        k = np.clip(np.searchsorted(x_src, x_dst, side='right') - 1, 0, len(x_src) - 2)
+        t = (x_dst - x_src[k])/(x_src[k+1] - x_src[k])
+        rows = np.arange(len(x_dst))
+        op = sparse.csr_matrix((np.concatenate((1 - t, t)), (np.concatenate((rows, rows)), np.concatenate((k, k+1)))),
+                               shape=(len(x_dst), len(x_src)))
+    elif kind == 'cubic':
+        dense = CubicSpline(x_src, np.eye(len(x_src)), bc_type='natural')(x_dst)
+        op = sparse.csr_matrix(np.where(np.abs(dense) > tol, dense, 0))
+    else:
+        raise ValueError("unknown interpolation kind: %s" % kind)
+
+    op.eliminate_zeros()
+    return op
+
+def SurfaceOperator(air_top_tap_pos: list, air_bot_tap_pos: list, x: np.array, kind: str='linear'):
+    '''
+    Returns the sparse operator taking the 19 tap values (top then bottom, as measured) to both surfaces on a chordwise grid.
+    The bottom surface shares the leading and trailing edge taps of the top one.
+
+    Parameters:
+    -----------
+    air_top_tap_pos : list
+        x/c of the 12 top taps, leading edge to trailing edge
+    air_bot_tap_pos : list
+        x/c of the 7 bottom taps, in port order
+    x : np.array
+        chordwise grid (x/c)
+    kind : str, optional
+        see InterpOperator
+
+    Returns:
+    --------
+    op: scipy.sparse.csr_matrix (2*len(x), 19), top surface rows first
+    '''
+    n_top = len(air_top_tap_pos)
+    top_cols = np.argsort(air_top_tap_pos)
+    bot_order = np.argsort(air_bot_tap_pos)
+    bot_cols = np.concatenate(([top_cols[0]], n_top + bot_order, [top_cols[-1]]))
+    bot_x = np.concatenate(([air_top_tap_pos[top_cols[0]]], np.asarray(air_bot_tap_pos)[bot_order], [air_top_tap_pos[top_cols[-1]]]))
+
+    n = n_top + len(air_bot_tap_pos)
+    pick = lambda cols: sparse.csr_matrix((np.ones(len(cols)), (np.arange(len(cols)), cols)), shape=(len(cols), n))
+    top = InterpOperator(np.asarray(air_top_tap_pos)[top_cols], x, kind) @ pick(top_cols)
+    bot = InterpOperator(bot_x, x, kind) @ pick(bot_cols)
+
+    return sparse.vstack((top, bot)).tocsr()
+
+def CpSurface(Cp: np.array, x_op: sparse.spmatrix, alpha_op: sparse.spmatrix, Cp_err: np.array=None):
+    '''
+    Returns the Cp surface of the whole sweep, both operators applied as one product.
+
+    Parameters:
+    -----------
+    Cp : np.array (AoA, 19)
+        tap Cp of every AoA (top then bottom)
+    x_op : sparse matrix
+        chordwise operator (see SurfaceOperator)
+    alpha_op : sparse matrix
+        AoA operator (see InterpOperator with the measured and the dense AoAs)
+    Cp_err : np.array (AoA, 19), optional
+        tap Cp uncertainties, propagated assuming independent taps
+
+    Returns:
+    --------
+    surf: np.array (alpha grid, 2*x grid), top surface columns first
+    surf_err: its uncertainty (only if Cp_err is given)
+    '''
+    surf = (alpha_op @ (x_op @ np.asarray(Cp).T).T)
+    if Cp_err is None:
+        return surf
+
+    x_sq = x_op.multiply(x_op)
+    a_sq = alpha_op.multiply(alpha_op)
+    surf_err = np.sqrt(a_sq @ (x_sq @ (np.asarray(Cp_err)**2).T).T)
+    return surf, surf_err
+
+def SuctionPeak(x: np.array, Cp_top: np.array):
+    '''
+    Returns the suction peak on the top surface of every profile.
+
+    Parameters:
+    -----------
+    x : np.array
+        chordwise grid (x/c)
+    Cp_top : np.array (..., len(x))
+        top surface Cp (see CpSurface)
+
+    Returns:
+    --------
+    x_peak: x/c of the peak
+    Cp_peak: Cp at the peak
+    '''
+    k = np.argmin(Cp_top, axis=-1)
+    return x[k], np.take_along_axis(Cp_top, k[..., None], axis=-1)[..., 0]
+
+def Separation(x: np.array, Cp_top: np.array, alpha: np.array, grad_tol: float=0.1, margin: float=0.05):
+    '''
+    Returns the separation indicators of every top surface profile. Aft of the separation point
+    the pressure stops recovering, so the top Cp flattens out to the trailing edge.
+
+    Parameters:
+    -----------
+    x : np.array
+        chordwise grid (x/c)
+    Cp_top : np.array (AoA, len(x))
+        top surface Cp (see CpSurface)
+    alpha : np.array
+        AoA of each profile
+    grad_tol : float, optional
+        |dCp/d(x/c)| below which the recovery counts as stalled
+    margin : float, optional
+        chord fraction ahead of the trailing edge the plateau must start at to count as separation
+
+    Returns:
+    --------
+    x_sep: x/c where the plateau reaching the trailing edge starts, 1 where there is none
+    Cp_te: trailing edge Cp
+    alpha_onset: first AoA with x_sep < 1 - margin (NaN if none)
+    '''
+    x_peak, _ = SuctionPeak(x, Cp_top)
+    dCp = np.gradient(Cp_top, x, axis=-1)
+    flat = (np.abs(dCp) < grad_tol) & (x >= x_peak[:, None])
+
+    # plateau: flat points running without a break to the trailing edge
+    run = np.flip(np.cumprod(np.flip(flat, axis=-1), axis=-1), axis=-1).astype(bool)
+    x_sep = np.where(run.any(axis=-1), x[np.argmax(run, axis=-1)], 1.0)
+    x_sep = np.where(run[:, -1], x_sep, 1.0)
+
+    onset = np.flatnonzero(x_sep < 1 - margin)
+    alpha_onset = np.asarray(alpha)[onset[0]] if len(onset) else np.nan
+
+    return x_sep, Cp_top[:, -1], alpha_onset
@@ -0,0 +1,143 @@
+"""
+Functions related to skipping unchanged figures and exporting changed ones
+    to both the results folder and the report (Latex\Figures)
+    {Depenancies}: matplotlib, numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import hashlib
+import inspect
+import json
+import os
+import shutil
+
+
+# figures already rendered, output path -> key of the inputs they were made from
+manifest_path = "results\\figures.json"
+_manifest = None
+
+# every figure is rendered with this style, whatever was set globally before, and the changes
+# a plotting function makes to it are undone afterwards
+figure_style = {'mathtext.fontset': 'stix', 'font.family': 'STIXGeneral', 'font.size': 12, 'mathtext.default': 'regular'}
+
+
+def ReportPath(path: str):
+    '''
+    Returns where a figure in results is placed in the report.
+
+    Parameters:
+    -----------
+    path : str
+        figure in a results\\*-graphs folder
+
+    Returns:
+    --------
+    report_path: the same figure under Latex\\Figures (velocity graphs in their own folder)
+    '''
+    folder, name = os.path.split(path.replace('/', '\\').replace('\\', os.sep))
+    if os.path.basename(folder) == 'vel-graphs':
+        return os.path.join('Latex', 'Figures', 'vel-graphs', name)
+    return os.path.join('Latex', 'Figures', name)
+
+def _Update(h, x):
+    # feeds an argument into the hash, arrays by dtype, shape and raw bytes
+    if isinstance(x, np.ndarray) or isinstance(x, np.generic):
+        x = np.ascontiguousarray(x)
+        h.update(str((x.dtype.descr, x.shape)).encode())
+        h.update(x.tobytes())
+    elif isinstance(x, (list, tuple)):
+        h.update(b'[')
+        for v in x:
+            _Update(h, v)
+        h.update(b']')
+    else:
+        h.update(repr(x).encode())
+
+def FigureKey(graph, args: tuple, deps: list=()):
+    '''
+    Returns the key of a figure, changes whenever its input data, its
+    plotting code (with the readers it calls), the figure style or a reference data file changes.
+
+    Parameters:
+    -----------
+    graph : function
+        plotting function (see Graphing)
+    args : tuple
+        arguments the function is called with
+    deps : list, optional
+        data files the function reads
+
+    Returns:
+    --------
+    key: hex digest
+    '''
+    h = hashlib.sha256()
+    h.update(matplotlib.__version__.encode())
+    h.update(inspect.getsource(graph).encode())
+    # the readers of the reference data it calls (e.g. XfoilPolar) are part of its code too
+    for name in graph.__code__.co_names:
+        f = graph.__globals__.get(name)
+        f = getattr(f, '__wrapped__', f)
+        if inspect.isfunction(f) and f.__module__ == graph.__module__:
+            h.update(inspect.getsource(f).encode())
+    h.update(json.dumps(figure_style, sort_keys=True).encode())
+    _Update(h, tuple(args))
+    for path in deps:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+
+    return h.hexdigest()
+
+def _Manifest():
+    global _manifest
+    if _manifest is None:
+        try:
+            with open(manifest_path) as f:
+                _manifest = json.load(f)
+        except (OSError, ValueError):
+            _manifest = {}
+    return _manifest
+
+def CachedGraph(graph, args: tuple, outputs: list, deps: list=()):
+    '''
+    Renders a figure (in figure_style) only if it is out of date, then places every output in the report.
+
+    Parameters:
+    -----------
+    graph : function
+        plotting function (see Graphing), saving the outputs itself
+    args : tuple
+        arguments the function is called with
+    outputs : list
+        figure files the function writes to results
+    deps : list, optional
+        data files the function reads
+
+    Returns:
+    --------
+    rendered: False if every output was already up to date
+    '''
+    manifest = _Manifest()
+    key = FigureKey(graph, args, deps)
+    fresh = all(manifest.get(out) == key and os.path.exists(out) for out in outputs)
+
+    if not fresh:
+        with plt.rc_context(figure_style):
+            graph(*args)
+
+    for out in outputs:
+        report = ReportPath(out)
+        if not fresh or not os.path.exists(report):
+            os.makedirs(os.path.dirname(report), exist_ok=True)
+            shutil.copyfile(out, report)
+        manifest[out] = key
+
+    if not fresh:
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+
+    return not fresh
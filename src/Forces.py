@@ -1,4 +1,5 @@
 import numpy as np
+from Kernels import SurfaceLoads, MomentumDeficit
 
 def NormalForce(p_top: np.array, p_bot: np.array, p_err_top: np.array, p_err_bot: np.array, top_p_pos: np.array, bot_p_pos: np.array, alpha):
     '''
@@ -24,37 +25,15 @@ def NormalForce(p_top: np.array, p_bot: np.array, p_err_top: np.array, p_err_bot
     n: Normal Force
     dn: Normal Force uncertainty
     '''
-    x_upper = [row[0] for row in top_p_pos]
-    x_lower = [row[0] for row in bot_p_pos]
-    y_upper = [row[1] for row in top_p_pos]
-    y_lower = [row[1] for row in bot_p_pos]
-
-    theta_upper= np.arctan(np.diff(y_upper)/np.diff(x_upper))
-    theta_lower= np.arctan(np.diff(y_lower)/np.diff(x_lower))
-
-
-    ds_upper = np.sqrt(np.diff(x_upper)**2 + np.diff(y_upper)**2)
-    ds_lower = np.sqrt(np.diff(x_lower)**2 + np.diff(y_lower)**2)
-
-    x_upper = np.diff(x_upper)
-    x_lower = np.diff(x_lower)
-    y_upper = np.diff(y_upper)
-    y_lower = np.diff(y_lower)
-    
-    n = 0
-    dn = 0
-    # Trapezoidal numerical integration
-    for i in range(len(ds_upper)):
-        n += -0.5 * (p_top[i] + p_top[i+1]) * np.cos(theta_upper[i]) * ds_upper[i]
-        dn += (-0.5*p_err_top[i]*np.cos(theta_upper[i])*ds_upper[i])**2 + (-0.5*p_err_top[i+1]*np.cos(theta_upper[i])*ds_upper[i])**2
-    
-    for i in range(len(ds_lower)):
-        n += 0.5 * (p_bot[i] + p_bot[i+1]) * np.cos(theta_lower[i]) * ds_lower[i]
-        dn += (0.5*p_err_bot[i]*np.cos(theta_lower[i])*ds_lower[i])**2 + (0.5*p_err_bot[i+1]*np.cos(theta_lower[i])*ds_lower[i])**2
-    
+    top = SurfaceLoads(p_top, p_err_top, PanelGeometry(top_p_pos), -1.0)
+    bot = SurfaceLoads(p_bot, p_err_bot, PanelGeometry(bot_p_pos), 1.0)
+
+    # Trapezoidal numerical integration of both surfaces (see Kernels)
+    n = top[0] + bot[0]
+
     # Calculating error (position error assumed to be 0)
-    dn = np.sqrt(dn)
-    
+    dn = np.sqrt(top[1] + bot[1])
+
     return n, dn
 
 def AxialForce(p_top: np.array, p_bot: np.array, p_err_top: np.array, p_err_bot: np.array, top_p_pos: np.array, bot_p_pos: np.array, alpha):
@@ -80,37 +59,15 @@ def AxialForce(p_top: np.array, p_bot: np.array, p_err_top: np.array, p_err_bot:
     a: Axial Force
     da: Axial Force uncertainty
     '''
-    x_upper = [row[0] for row in top_p_pos]
-    x_lower = [row[0] for row in bot_p_pos]
-    y_upper = [row[1] for row in top_p_pos]
-    y_lower = [row[1] for row in bot_p_pos]
-    
-    theta_upper= np.arctan(np.diff(y_upper)/np.diff(x_upper))
-    theta_lower= np.arctan(np.diff(y_lower)/np.diff(x_lower))
-    
-    ds_upper = np.sqrt(np.diff(x_upper)**2 + np.diff(y_upper)**2)
-    ds_lower = np.sqrt(np.diff(x_lower)**2 + np.diff(y_lower)**2)
-    
-    x_upper = np.diff(x_upper)
-    x_lower = np.diff(x_lower)
-    y_upper = np.diff(y_upper)
-    y_lower = np.diff(y_lower)
-
-    a = 0
-    da = 0
-
-    # Trapezoidal numerical integration
-    for i in range(len(ds_upper)):
-        a += -0.5 * (p_top[i] + p_top[i+1]) * np.sin(theta_upper[i]) * ds_upper[i]
-        da += (-0.5*p_err_top[i]*np.sin(theta_upper[i])*ds_upper[i])**2 + (-0.5*p_err_top[i+1]*np.sin(theta_upper[i])*ds_upper[i])**2
-    
-    for i in range(len(ds_lower)):
-        a += 0.5 * (p_bot[i] + p_bot[i+1]) * np.sin(theta_lower[i]) * ds_lower[i]
-        da += (0.5*p_err_bot[i]*np.sin(theta_lower[i])*ds_lower[i])**2 + (0.5*p_err_bot[i+1]*np.sin(theta_lower[i])*ds_lower[i])**2
-    
+    top = SurfaceLoads(p_top, p_err_top, PanelGeometry(top_p_pos), -1.0)
+    bot = SurfaceLoads(p_bot, p_err_bot, PanelGeometry(bot_p_pos), 1.0)
+
+    # Trapezoidal numerical integration of both surfaces (see Kernels)
+    a = top[2] + bot[2]
+
     # Calculating error (position error assumed to be 0)
-    da = np.sqrt(da)
-    
+    da = np.sqrt(top[3] + bot[3])
+
     return a, da
 
 def LiftForce(alpha: float, dalpha: float, n: float, dn: float, a: float, da: float):
@@ -173,8 +130,9 @@ def PressureDragForce(alpha: float, dalpha: float, n: float, dn: float, a: float
 
 def MomentLE(p_top: np.array, p_bot: np.array, p_err_top: np.array, p_err_bot: np.array, top_p_pos: np.array, bot_p_pos: np.array, alpha):
     '''
-    Returns the Moment about the leading edge 
+    Returns the Moment about the leading edge (nose up positive)
     acting on the airfoil for given pressure distribution.
+    Found from the resultants and their first moments (see MomentAbout), the AoA is not needed.
 
     Parameters:
     -----------   
@@ -195,38 +153,11 @@ def MomentLE(p_top: np.array, p_bot: np.array, p_err_top: np.array, p_err_bot: n
     m: Moment 
     dm: Moment uncertainty
     '''
-    x_upper = [row[0] for row in top_p_pos]
-    x_lower = [row[0] for row in bot_p_pos]
-    y_upper = [row[1] for row in top_p_pos]
-    y_lower = [row[1] for row in bot_p_pos]
-    theta_upper= np.arctan(np.diff(y_upper)/np.diff(x_upper))
-    theta_lower= np.arctan(np.diff(y_lower)/np.diff(x_lower))
-    
-    ds_upper = np.sqrt(np.diff(x_upper)**2 + np.diff(y_upper)**2)
-    ds_lower = np.sqrt(np.diff(x_lower)**2 + np.diff(y_lower)**2)   
-
-    x_upper = np.diff(x_upper)
-    x_lower = np.diff(x_lower)
-    y_upper = np.diff(y_upper)
-    y_lower = np.diff(y_lower)
-
-    m = 0
-    dm = 0
-
-    for i in range(len(ds_upper)):
-        m += 0.5*(p_top[i] + p_top[i+1])*np.cos(theta_upper[i]-np.deg2rad(alpha))*x_upper[i]*ds_upper[i]
-        m += -0.5*(p_top[i] + p_top[i+1])*np.sin(theta_upper[i]-np.deg2rad(alpha))*y_upper[i]*ds_upper[i]
-
-        dm += (0.5*np.cos(theta_upper[i])*x_upper[i]*ds_upper[i]-0.5*np.sin(theta_upper[i])*y_upper[i]*ds_upper[i]*p_err_top[i])**2
-
-    for i in range(len(ds_lower)):
-        m += 0.5*(p_bot[i] + p_bot[i+1])*np.cos(theta_lower[i]-np.deg2rad(alpha))*x_lower[i]*ds_lower[i]
-        m += 0.5*(p_bot[i] + p_bot[i+1])*np.sin(theta_lower[i]-np.deg2rad(alpha))*y_lower[i]*ds_lower[i]
-
-        dm += (0.5*np.cos(theta_lower[i])*x_lower[i]*ds_lower[i]+0.5*np.sin(theta_lower[i])*y_lower[i]*ds_lower[i]*p_err_bot[i])**2
-    
-    dm = np.sqrt(dm)
-    return m, dm
+    F, cov = SurfaceResultants(np.concatenate((p_top, p_bot), axis=-1), np.concatenate((p_err_top, p_err_bot), axis=-1),
+                               ResultantWeights(top_p_pos, bot_p_pos))
+
+    m, dm = MomentAbout(F, cov, 0)
+    return m[..., 0], dm[..., 0]
 
 def TotalDrag(y: np.array, v:np.array, v_err: np.array, u_inf: float, u_inf_err: float, rho: float=1.29):
     '''
@@ -252,12 +183,182 @@ def TotalDrag(y: np.array, v:np.array, v_err: np.array, u_inf: float, u_inf_err:
     dt: total drag
     ddt: total drag uncertainty
     '''
-    dt = 0
-    ddt = 0
-    delta_y = np.diff(y)
-    for i in range(len(y)-1):
-        dt += rho * 0.5 * ((v[i]*(u_inf-v[i]))+(v[i+1]*(u_inf-v[i+1])))*delta_y[i]
-        ddt += (rho*0.5*delta_y[i]*(u_inf-2*v[i])*v_err[i])**2 + (rho*0.5*delta_y[i]*(v[i+1]+v[i])*u_inf_err)**2
+    # Trapezoidal numerical integration (see Kernels)
+    dt, ddt = MomentumDeficit(y, v, v_err, u_inf, u_inf_err, rho)
 
     ddt = np.sqrt(ddt)
-    return dt, ddt
\ No newline at end of file
+    return dt, ddt
+
+def PanelGeometry(p_pos: np.array):
+    '''
+    Returns the panel geometry between consecutive pressure taps of one surface,
+    as used by the trapezoidal integrations above.
+
+    Parameters:
+    -----------
+    p_pos : np.array
+        airfoil pressure tap positions [x; y]
+
+    Returns:
+    --------
+    theta: panel inclination (rad)
+    ds: panel length
+    dx: panel x extent
+    dy: panel y extent
+    '''
+    x = np.asarray(p_pos)[:, 0]
+    y = np.asarray(p_pos)[:, 1]
+    dx = np.diff(x)
+    dy = np.diff(y)
+
+    theta = np.arctan(dy/dx)
+    ds = np.sqrt(dx**2 + dy**2)
+
+    return theta, ds, dx, dy
+
+def ResultantWeights(top_p_pos: np.array, bot_p_pos: np.array):
+    '''
+    Returns the weight of every tap pressure in the force resultants and their first moments,
+    with the same trapezoidal panels as NormalForce and AxialForce. Depends only on the geometry.
+
+    Parameters:
+    -----------
+    top_p_pos : np.array
+        top airfoil pressure tap positions [x; y]
+    bot_p_pos : np.array
+        bottom airfoil pressure tap positions [x; y]
+
+    Returns:
+    --------
+    W: np.array (4, taps), rows N, A, sum(n_i*x_i), sum(a_i*y_i) over the panels i
+       (x_i, y_i the panel midpoints), columns the top then bottom taps
+    '''
+    rows = []
+    for pos, sign in ((np.asarray(top_p_pos), -1.0), (np.asarray(bot_p_pos), 1.0)):
+        theta, ds, dx, dy = PanelGeometry(pos)
+        x_mid = 0.5*(pos[:-1, 0] + pos[1:, 0])
+        y_mid = 0.5*(pos[:-1, 1] + pos[1:, 1])
+
+        # trapezoid: each panel takes half of the pressure at both of its taps
+        T = np.zeros((len(ds), len(pos)))
+        T[np.arange(len(ds)), np.arange(len(ds))] = 0.5
+        T[np.arange(len(ds)), np.arange(len(ds)) + 1] = 0.5
+
+        n = sign*np.cos(theta)*ds
+        a = sign*np.sin(theta)*ds
+        rows.append(np.stack((n, a, n*x_mid, a*y_mid)) @ T)
+
+    return np.concatenate(rows, axis=1)
+
+def SurfaceResultants(p: np.array, p_err: np.array, W: np.array):
+    '''
+    Returns the force resultants and their first moments in one pass, for any number of
+    pressure distributions at once (every AoA of a sweep, Monte Carlo draws...).
+    Moments about any point then follow without integrating again (see MomentAbout).
+
+    Parameters:
+    -----------
+    p : np.array (..., taps)
+        airfoil pressure distribution, top then bottom taps
+    p_err : np.array (..., taps)
+        airfoil pressure error
+    W : np.array (4, taps)
+        tap weights (see ResultantWeights)
+
+    Returns:
+    --------
+    F: np.array (..., 4), N, A, sum(n_i*x_i), sum(a_i*y_i)
+    cov: np.array (..., 4, 4), their covariance, taps taken as independent
+    '''
+    F = np.einsum('kj,...j->...k', W, p)
+    cov = np.einsum('kj,...j,lj->...kl', W, np.asarray(p_err)**2, W)
+
+    return F, cov
+
+def MomentAbout(F: np.array, cov: np.array, x_ref: np.array, y_ref: np.array=0):
+    '''
+    Returns the pitching moment (nose up positive) about any number of reference points.
+
+    Parameters:
+    -----------
+    F : np.array (..., 4)
+        resultants and first moments (see SurfaceResultants)
+    cov : np.array (..., 4, 4)
+        their covariance
+    x_ref : np.array (R)
+        x of the reference points, e.g. 0.25*c for the quarter chord
+    y_ref : np.array (R), optional
+        y of the reference points
+
+    Returns:
+    --------
+    m: np.array (..., R) Moment
+    dm: np.array (..., R) Moment uncertainty
+    '''
+    x_ref, y_ref = np.broadcast_arrays(np.atleast_1d(x_ref).astype(np.float64), np.atleast_1d(y_ref).astype(np.float64))
+
+    # M = x_ref*N - y_ref*A - sum(n_i*x_i) + sum(a_i*y_i)
+    v = np.stack((x_ref, -y_ref, -np.ones_like(x_ref), np.ones_like(x_ref)), axis=-1)
+    m = np.einsum('...k,rk->...r', F, v)
+    dm = np.sqrt(np.einsum('rk,...kl,rl->...r', v, cov, v))
+
+    return m, dm
+
+def CenterOfPressure(F: np.array, cov: np.array):
+    '''
+    Returns the chordwise position the normal force acts at (zero moment about it).
+
+    Parameters:
+    -----------
+    F : np.array (..., 4)
+        resultants and first moments (see SurfaceResultants)
+    cov : np.array (..., 4, 4)
+        their covariance
+
+    Returns:
+    --------
+    x_cp: center of pressure
+    dx_cp: center of pressure uncertainty
+    '''
+    N, A, Sx, Sy = np.moveaxis(F, -1, 0)
+    x_cp = (Sx - Sy)/N
+
+    g = np.stack((-x_cp/N, np.zeros_like(N), 1/N, -1/N), axis=-1)
+    dx_cp = np.sqrt(np.einsum('...k,...kl,...l->...', g, cov, g))
+
+    return x_cp, dx_cp
+
+def AerodynamicCenter(F: np.array, q_inf: np.array, c: float, alpha: np.array, alpha_max: float=10):
+    '''
+    Returns the chordwise position the moment does not change with AoA about,
+    from the slopes of the LE moment and normal force coefficients over the linear range.
+
+    Parameters:
+    -----------
+    F : np.array (AoA, 4)
+        resultants and first moments of every AoA (see SurfaceResultants)
+    q_inf : np.array (AoA)
+        dynamic pressure of every AoA
+    c : float
+        chord length
+    alpha : np.array (AoA)
+        angle of attack (degrees)
+    alpha_max : float, optional
+        largest AoA of the linear range
+
+    Returns:
+    --------
+    x_ac: aerodynamic center
+    dx_ac: its uncertainty, from the scatter of the fits
+    '''
+    lin = np.asarray(alpha) <= alpha_max
+    Cn = F[lin, 0]/(q_inf[lin]*c)
+    Cm_le = (F[lin, 3] - F[lin, 2])/(q_inf[lin]*c**2)
+
+    # Cm about x is Cm_le + (x/c)*Cn, so its slope vanishes at x/c = -dCm_le/dCn
+    A = np.stack((Cn, np.ones_like(Cn)), axis=-1)
+    (b, _), res = np.linalg.lstsq(A, Cm_le, rcond=None)[:2]
+    dof = len(Cn) - 2
+    db = np.sqrt(res[0]/dof*np.linalg.inv(A.T @ A)[0, 0]) if dof > 0 and len(res) else np.nan
+
+    return -b*c, db*c
@@ -8,35 +8,33 @@ from scipy import io
 import matplotlib.pyplot as plt
 import numpy as np
 import csv
+from functools import lru_cache
 
-def CpGraph(a: np.int32, Cp_top: np.array, Cp_bot: np.array, Cp_top_err: np.array, Cp_bot_err: np.array):
+# REFERENCE DATA
+#####################
+# read once per process, the watch mode redraws the graphs after every new recording
+@lru_cache(maxsize=None)
+def XfoilCp(a: int):
     '''
-    PLots the Coefficient of pressure distribution.
+    Returns the XFOIL pressure distribution at one AoA.
 
     Parameters:
-    -----------   
-    a : np.int32
+    -----------
+    a : int
         angle of attack
-    p_top : np.array
-        top airfoil pressure distribution
-    p_bot : np.array
-        bottom airfoil pressure distribution
-    p_top_err : np.array
-        top airfoil perssure error
-    p_bot_err : np.array
-        bottom airfoil perssure error
-    
+
+    Returns:
+    --------
+    xfoil_x: x/c
+    xfoil_cp: pressure coefficient
     '''
-    air_top_tap_pos = [0, 0.03, 0.06, 0.10, 0.15, 0.20, 0.30, 0.40, 0.55, 0.70, 0.85, 1.00]
-    air_bot_tap_pos = [0.90, 0.60, 0.40, 0.30, 0.20, 0.10, 0.05]
-        
     Xfoil_parsed = []
     with open("data\XFOIL\\a%d.txt"%a) as X:
         data = (X.read())
         data = data.replace('-', ' -').split('\n')[3:]
         for i in data:
             Xfoil_parsed.append(i.strip().split('  '))
-    
+
     xfoil_x = []
     xfoil_cp = []
 
@@ -44,9 +42,94 @@ def CpGraph(a: np.int32, Cp_top: np.array, Cp_bot: np.array, Cp_top_err: np.arra
         xfoil_x.append(float(line[0]))
         xfoil_cp.append(float(line[2]))
 
-    plt.rcParams['mathtext.fontset'] = 'stix'
-    plt.rcParams['font.family'] = 'STIXGeneral'
-    plt.rcParams.update({'font.size': 12})
+    return tuple(xfoil_x), tuple(xfoil_cp)
+
+@lru_cache(maxsize=None)
+def XfoilPolar():
+    '''
+    Returns the XFOIL polar.
+
+    Returns:
+    --------
+    xfoil_a, xfoil_cl, xfoil_cd, xfoil_cdp, xfoil_cm
+    '''
+    Xfoil_parsed = []
+    with open("data\XFOIL\clarky_coeff.txt") as X:
+        data = (X.read())
+        data = data.split('\n')[12:]
+        for i in data:
+            Xfoil_parsed.append(i.strip().split('  '))
+
+    cols = ([], [], [], [], [])
+    for line in Xfoil_parsed[:-1]:
+        for k in range(5):
+            cols[k].append(float(line[k]))
+
+    return tuple(tuple(col) for col in cols)
+
+@lru_cache(maxsize=None)
+def UIUCPolar():
+    '''
+    Returns the UIUC wind tunnel polar.
+
+    Returns:
+    --------
+    uiuc_a, uiuc_cl2, uiuc_cd: drag polar
+    uiuc_al, uiuc_cl, uiuc_am, uiuc_cm: lift and moment curves
+    '''
+    uiuc_a = []
+    uiuc_al = []
+    uiuc_cl = []
+    uiuc_cl2 = []
+    uiuc_cd = []
+
+    uiuc_am = []
+    uiuc_cm = []
+
+    with open(r"data\UIUC_Data\UIUC_Data.csv", newline='') as U:
+        reader = csv.reader(U, delimiter=';')
+        reader = list(reader)
+        reader = reader[1:]
+        for row in reader:
+            uiuc_a.append(float(row[0]))
+            uiuc_cl2.append(float(row[1]))
+            uiuc_cd.append(float(row[2]))
+
+    with open(r"data\UIUC_Data\UIUC_DataCm.csv", newline='') as U:
+        reader = csv.reader(U, delimiter=';')
+        reader = list(reader)
+        reader = reader[1:]
+        for row in reader:
+            uiuc_al.append(float(row[0]))
+            uiuc_cl.append(float(row[1]))
+            uiuc_am.append(float(row[2]))
+            uiuc_cm.append(float(row[3]))
+
+    return tuple(uiuc_a), tuple(uiuc_cl2), tuple(uiuc_cd), tuple(uiuc_al), tuple(uiuc_cl), tuple(uiuc_am), tuple(uiuc_cm)
+
+def CpGraph(a: np.int32, Cp_top: np.array, Cp_bot: np.array, Cp_top_err: np.array, Cp_bot_err: np.array, air_top_tap_pos: list, air_bot_tap_pos: list):
+    '''
+    PLots the Coefficient of pressure distribution.
+
+    Parameters:
+    -----------   
+    a : np.int32
+        angle of attack
+    p_top : np.array
+        top airfoil pressure distribution
+    p_bot : np.array
+        bottom airfoil pressure distribution
+    p_top_err : np.array
+        top airfoil perssure error
+    p_bot_err : np.array
+        bottom airfoil perssure error
+    air_top_tap_pos : list
+        x/c of the top surface taps
+    air_bot_tap_pos : list
+        x/c of the bottom surface taps
+    
+    '''
+    xfoil_x, xfoil_cp = XfoilCp(int(a))
 
     plt.plot(xfoil_x, xfoil_cp, color = 'r')
     plt.errorbar(air_top_tap_pos, Cp_top, yerr=Cp_top_err, color = 'c', marker = 'o', capsize=2, elinewidth=1, markeredgewidth=2)
@@ -94,80 +177,27 @@ def VelGraph(a: np.int32, V_r: np.array, V_r_err: np.array, V_pos: np.array):
     # plt.show()
     plt.clf()
 
-def CoeffGraph(a: np.int32, Cl: np.array, dCl: np.array, Cd: np.array, dCd: np.array, Cm: np.array, dCm: np.array, Cdt: np.array, dCdt: np.array):
+def CoeffGraph(polar: np.array, Cm_qc: tuple):
     '''
     PLots the Coefficient of L and D and M distribution.
 
     Parameters:
     -----------   
-    a : np.int32
-        angle of attack
-    Cl : np.array
-        lift coefficient
-    dCl : np.array
-        lift coefficient error
-    Cd : np.array
-        drag coefficient
-    dCd : np.array
-        drag coefficient error
-    Cm : np.array
-        moment coefficient
-    dCm : np.array
-        moment coefficient error
-    Cdt : np.array
-        total drag coefficient
-    dCdt : np.array
-        total drag coefficient error
+    polar : np.array (structured, see PolarRecord)
+        angle of attack, lift, drag, moment and total drag coefficients
+        and their errors for each AoA
+    Cm_qc : tuple
+        moment coefficient about the quarter chord and its error for each AoA,
+        plotted against the references instead of the polar Cm (about the leading edge)
     '''
+    a = polar['alpha']
+    Cl, dCl = polar['Cl'], polar['dCl']
+    Cd, dCd = polar['Cd'], polar['dCd']
+    Cm, dCm = Cm_qc
+    Cdt, dCdt = polar['Cdt'], polar['dCdt']
 
-    Xfoil_parsed = []
-    with open("data\XFOIL\clarky_coeff.txt") as X:
-        data = (X.read())
-        data = data.split('\n')[12:]
-        for i in data:
-            Xfoil_parsed.append(i.strip().split('  '))
-    
-    xfoil_a = []
-    xfoil_cl = []
-    xfoil_cd = []
-    xfoil_cdp = []
-    xfoil_cm = []
-
-    for line in Xfoil_parsed[:-1]:
-        xfoil_a.append(float(line[0]))
-        xfoil_cl.append(float(line[1]))
-        xfoil_cd.append(float(line[2]))
-        xfoil_cdp.append(float(line[3]))
-        xfoil_cm.append(float(line[4]))
-
-    uiuc_a = []
-    uiuc_al = []
-    uiuc_cl = []
-    uiuc_cl2 = []
-    uiuc_cd = []
-    
-    uiuc_am = []
-    uiuc_cm = []
-
-
-    with open(r"data\UIUC_Data\UIUC_Data.csv", newline='') as U:
-        reader = csv.reader(U, delimiter=';')
-        reader = list(reader)
-        reader = reader[1:]
-        for row in reader:
-            uiuc_a.append(float(row[0]))
-            uiuc_cl2.append(float(row[1]))
-            uiuc_cd.append(float(row[2]))
-
-    with open(r"data\UIUC_Data\UIUC_DataCm.csv", newline='') as U:
-        reader = csv.reader(U, delimiter=';')
-        reader = list(reader)
-        reader = reader[1:]
-        for row in reader:
-            uiuc_al.append(float(row[0]))
-            uiuc_cl.append(float(row[1]))
-            uiuc_am.append(float(row[2]))
-            uiuc_cm.append(float(row[3]))
+    xfoil_a, xfoil_cl, xfoil_cd, xfoil_cdp, xfoil_cm = XfoilPolar()
+    uiuc_a, uiuc_cl2, uiuc_cd, uiuc_al, uiuc_cl, uiuc_am, uiuc_cm = UIUCPolar()
 
 
     print(" Saving C_l-a.png..")
@@ -207,10 +237,10 @@ def CoeffGraph(a: np.int32, Cl: np.array, dCl: np.array, Cd: np.array, dCd: np.a
     params = {'mathtext.default': 'regular' }
     plt.rcParams.update(params)
     plt.rcParams.update({'font.size': 12})
-    plt.title('$C_{M}$ vs $α$')
+    plt.title('$C_{M,c/4}$ vs $α$')
     plt.xlabel('$α$')
-    plt.ylabel('$C_{M}$')
-    plt.legend(['Theoretical XFoil Data', 'UIUC Data', 'Experimental $C_{M}$'])
+    plt.ylabel('$C_{M,c/4}$')
+    plt.legend(['Theoretical XFoil Data', 'UIUC Data', 'Experimental $C_{M,c/4}$'])
     plt.grid()
     plt.savefig('results\C_m-graphs\C_m-a.png')
     plt.clf()
@@ -259,3 +289,62 @@ def CoeffGraph(a: np.int32, Cl: np.array, dCl: np.array, Cd: np.array, dCd: np.a
     plt.grid()
     plt.savefig('results\C_d-vs-C_dt-graphs\C_d-C_dt.png')
     
+
+def CpContour(alpha_grid: np.array, x: np.array, surf: np.array, x_peak: np.array, x_sep: np.array):
+    '''
+    PLots the top and bottom surface Cp over the whole sweep as contours.
+
+    Parameters:
+    -----------
+    alpha_grid : np.array
+        dense AoA grid
+    x : np.array
+        chordwise grid (x/c)
+    surf : np.array (alpha grid, 2*x grid)
+        Cp surface, top surface columns first (see CpSurface)
+    x_peak : np.array
+        suction peak position at each AoA
+    x_sep : np.array
+        separation point at each AoA
+    '''
+    fig, axs = plt.subplots(1, 2, sharey=True, figsize=(11, 4.8))
+    for ax, Cp, name in ((axs[0], surf[:, :len(x)], 'Top'), (axs[1], surf[:, len(x):], 'Bottom')):
+        cs = ax.contourf(x, alpha_grid, Cp, levels=30, cmap='viridis')
+        fig.colorbar(cs, ax=ax, label='$C_{P}$')
+        ax.set_title(name + ' surface $C_{P}$')
+        ax.set_xlabel('x/c')
+    axs[0].plot(x_peak, alpha_grid, color='r', label='Suction peak')
+    axs[0].plot(x_sep, alpha_grid, color='w', linestyle='--', label='Separation')
+    axs[0].legend(loc='lower right')
+    axs[0].set_ylabel('$α$')
+    fig.tight_layout()
+    fig.savefig('results\C_p-graphs\C_p-contour.png')
+    plt.close(fig)
+
+def CpWaterfall(alpha: np.array, x: np.array, Cp_top: np.array, offset: float=1.0):
+    '''
+    PLots the top surface Cp distribution of every AoA, offset from each other.
+
+    Parameters:
+    -----------
+    alpha : np.array
+        AoA of each profile
+    x : np.array
+        chordwise grid (x/c)
+    Cp_top : np.array (AoA, x grid)
+        top surface Cp (see CpSurface)
+    offset : float, optional
+        shift in Cp between consecutive AoAs
+    '''
+    fig, ax = plt.subplots(figsize=(6.4, 8))
+    colors = plt.cm.viridis(np.linspace(0, 1, len(alpha)))
+    for k, a in enumerate(alpha):
+        ax.plot(x, Cp_top[k] - k*offset, color=colors[k])
+        ax.text(1.01, Cp_top[k, -1] - k*offset, str(a) + u'\N{DEGREE SIGN}', va='center', fontsize=9)
+    ax.invert_yaxis()
+    ax.set_title('Top surface $C_{P}$ vs x/c, offset by %g per AoA' % offset)
+    ax.set_xlabel('x/c')
+    ax.set_ylabel('$C_{P}$ (offset)')
+    ax.grid()
+    fig.savefig('results\C_p-graphs\C_p-waterfall.png')
+    plt.close(fig)
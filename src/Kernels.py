@@ -0,0 +1,276 @@
+"""
+Functions related to the numerical kernels of the force, drag and velocity calculations,
+    with a NumPy reference backend and a compiled Numba backend when it is installed
+    {Depenancies}: numpy, (optional) numba
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+import os
+
+try:
+    import numba
+    from numba.core.errors import NumbaError
+except ImportError:
+    numba = None
+
+
+# KERNELS
+#####################
+# every kernel works on 2D arrays, one row per evaluation (AoA, sample, Monte Carlo draw...)
+# and returns the sums over the row, the uncertainties still squared
+def _SurfaceLoadsNumpy(p, e, theta, ds, sign):
+    # trapezoidal normal and axial force of one surface (sign -1 top, 1 bottom)
+    p_sum = p[:, :-1] + p[:, 1:]
+    cos, sin = np.cos(theta)*ds, np.sin(theta)*ds
+
+    n = np.sum(sign*0.5*p_sum*cos, axis=-1)
+    dn = np.sum((0.5*e[:, :-1]*cos)**2 + (0.5*e[:, 1:]*cos)**2, axis=-1)
+    ax = np.sum(sign*0.5*p_sum*sin, axis=-1)
+    dax = np.sum((0.5*e[:, :-1]*sin)**2 + (0.5*e[:, 1:]*sin)**2, axis=-1)
+
+    return n, dn, ax, dax
+
+def _MomentumDeficitNumpy(y, v, v_err, u, u_err, rho):
+    # trapezoidal momentum deficit of the wake
+    dy = np.diff(y, axis=-1)
+    U = u[:, None]
+    dt = np.sum(rho*0.5*(v[:, :-1]*(U - v[:, :-1]) + v[:, 1:]*(U - v[:, 1:]))*dy, axis=-1)
+    ddt = np.sum((rho*0.5*dy*(U - 2*v[:, :-1])*v_err[:, :-1])**2 + (rho*0.5*dy*(v[:, 1:] + v[:, :-1])*u_err[:, None])**2, axis=-1)
+
+    return dt, ddt
+
+def _InterleaveNumpy(first, second):
+    # alternates the columns of first and second
+    out = np.empty((first.shape[0], 2*first.shape[1]))
+    out[:, 0::2] = first
+    out[:, 1::2] = second
+    return out
+
+backends = {'numpy': {'SurfaceLoads': _SurfaceLoadsNumpy, 'MomentumDeficit': _MomentumDeficitNumpy, 'Interleave': _InterleaveNumpy}}
+
+if numba is not None:
+    @numba.njit(cache=True, parallel=True)
+    def _SurfaceLoadsNumba(p, e, theta, ds, sign):
+        B, N = p.shape
+        n = np.zeros(B)
+        dn = np.zeros(B)
+        ax = np.zeros(B)
+        dax = np.zeros(B)
+        for b in numba.prange(B):
+            for i in range(N - 1):
+                p_sum = p[b, i] + p[b, i+1]
+                cos = np.cos(theta[i])*ds[i]
+                sin = np.sin(theta[i])*ds[i]
+                n[b] += sign*0.5*p_sum*cos
+                dn[b] += (0.5*e[b, i]*cos)**2 + (0.5*e[b, i+1]*cos)**2
+                ax[b] += sign*0.5*p_sum*sin
+                dax[b] += (0.5*e[b, i]*sin)**2 + (0.5*e[b, i+1]*sin)**2
+        return n, dn, ax, dax
+
+    @numba.njit(cache=True, parallel=True)
+    def _MomentumDeficitNumba(y, v, v_err, u, u_err, rho):
+        B, N = v.shape
+        dt = np.zeros(B)
+        ddt = np.zeros(B)
+        for b in numba.prange(B):
+            for i in range(N - 1):
+                dy = y[b, i+1] - y[b, i]
+                dt[b] += rho*0.5*(v[b, i]*(u[b] - v[b, i]) + v[b, i+1]*(u[b] - v[b, i+1]))*dy
+                ddt[b] += (rho*0.5*dy*(u[b] - 2*v[b, i])*v_err[b, i])**2 + (rho*0.5*dy*(v[b, i+1] + v[b, i])*u_err[b])**2
+        return dt, ddt
+
+    @numba.njit(cache=True)
+    def _InterleaveNumba(first, second):
+        B, N = first.shape
+        out = np.empty((B, 2*N))
+        for b in range(B):
+            for i in range(N):
+                out[b, 2*i] = first[b, i]
+                out[b, 2*i+1] = second[b, i]
+        return out
+
+    backends['numba'] = {'SurfaceLoads': _SurfaceLoadsNumba, 'MomentumDeficit': _MomentumDeficitNumba, 'Interleave': _InterleaveNumba}
+
+# backends that compiled for the argument types the kernels are called with, found once when first selected
+_compiled = {'numpy': True}
+
+
+# SELECTION
+#####################
+def _Compile(name: str):
+    # compiles every kernel of a backend once on tiny inputs of the types they are always called with,
+    # a backend that cannot be compiled here (e.g. an unsupported platform) is not used again
+    if name not in _compiled:
+        kernels = backends[name]
+        x = np.ones((1, 2))
+        try:
+            kernels['SurfaceLoads'](x, x, x[0, :1], x[0, :1], 1.0)
+            kernels['MomentumDeficit'](x, x, x, x[:, 0].copy(), x[:, 0].copy(), 1.0)
+            kernels['Interleave'](x, x)
+            _compiled[name] = True
+        except (NumbaError, ImportError) as e:
+            print("Kernels: the %s backend could not be compiled, using numpy (%s)" % (name, e))
+            _compiled[name] = False
+    return _compiled[name]
+
+def SetBackend(name: str):
+    '''
+    Selects the backend used by the kernels, falling back to numpy if it is not available
+    or does not compile (checked once, the first time it is selected).
+
+    Parameters:
+    -----------
+    name : str
+        'numpy' or 'numba'
+
+    Returns:
+    --------
+    backend: name of the backend now in use
+    '''
+    global backend
+    backend = name if name in backends and _Compile(name) else 'numpy'
+    return backend
+
+def _Call(kernel: str, name: str, *args):
+    # an explicitly named backend is used as is, errors in a kernel are raised like any other
+    return backends[name or backend][kernel](*args)
+
+# backend in use, the compiled one when available unless AIRFOIL_BACKEND says otherwise
+backend = SetBackend(os.environ.get('AIRFOIL_BACKEND', 'numba' if 'numba' in backends else 'numpy'))
+
+def _Rows(x, shape):
+    # flattens the leading axes into rows, contiguous float64 as the compiled kernels expect
+    return np.ascontiguousarray(np.broadcast_to(np.asarray(x, dtype=np.float64), shape).reshape(-1, shape[-1]))
+
+
+# PUBLIC KERNELS
+#####################
+def SurfaceLoads(p: np.array, e: np.array, geom: tuple, sign: float, name: str=None):
+    '''
+    Returns the trapezoidal normal and axial force of one airfoil surface
+    (see NormalForce and AxialForce), for any number of pressure distributions at once.
+    Moments come from the resultants instead (see MomentLE).
+
+    Parameters:
+    -----------
+    p : np.array (..., N)
+        surface pressure distributions
+    e : np.array (..., N)
+        pressure uncertainties
+    geom : tuple
+        panel geometry of the surface (see PanelGeometry)
+    sign : float
+        -1 for the top surface, 1 for the bottom
+    name : str, optional
+        backend to use, defaults to the selected one
+
+    Returns:
+    --------
+    n, dn2, a, da2: normal and axial force, each with its squared uncertainty
+    '''
+    theta, ds = (np.ascontiguousarray(g, dtype=np.float64) for g in geom[:2])
+    p = np.asarray(p, dtype=np.float64)
+    e = np.asarray(e, dtype=np.float64)
+    shape = np.broadcast_shapes(p.shape, e.shape)
+    out = _Call('SurfaceLoads', name, _Rows(p, shape), _Rows(e, shape), theta, ds, float(sign))
+
+    return tuple(v.reshape(shape[:-1])[()] for v in out)
+
+def MomentumDeficit(y: np.array, v: np.array, v_err: np.array, u_inf: np.array, u_inf_err: np.array, rho: float, name: str=None):
+    '''
+    Returns the trapezoidal momentum deficit of the wake (see TotalDrag), for any number of profiles at once.
+
+    Parameters:
+    -----------
+    y : np.array (..., N)
+        y position of measurement points (m)
+    v : np.array (..., N)
+        air velocity at measurement points (m/s)
+    v_err : np.array (..., N)
+        air velocity uncertainty (m/s)
+    u_inf : np.array (...)
+        free stream air velocity (m/s)
+    u_inf_err : np.array (...)
+        free stream air velocity uncertainty (m/s)
+    rho : float
+        air density (kg/m^3)
+    name : str, optional
+        backend to use, defaults to the selected one
+
+    Returns:
+    --------
+    dt, ddt2: total drag and its squared uncertainty
+    '''
+    v = np.asarray(v, dtype=np.float64)
+    shape = np.broadcast_shapes(np.shape(y), v.shape, np.shape(v_err), np.shape(u_inf) + (1,), np.shape(u_inf_err) + (1,))
+    col = shape[:-1] + (1,)
+    out = _Call('MomentumDeficit', name, _Rows(y, shape), _Rows(v, shape), _Rows(v_err, shape),
+                _Rows(np.asarray(u_inf)[..., None], col)[:, 0].copy(), _Rows(np.asarray(u_inf_err)[..., None], col)[:, 0].copy(), float(rho))
+
+    return tuple(x.reshape(shape[:-1])[()] for x in out)
+
+def Interleave(first: np.array, second: np.array, name: str=None):
+    '''
+    Returns the columns of first and second alternated (first[0], second[0], first[1], ...).
+
+    Parameters:
+    -----------
+    first : np.array (..., N)
+    second : np.array (..., N)
+    name : str, optional
+        backend to use, defaults to the selected one
+
+    Returns:
+    --------
+    out: np.array (..., 2N)
+    '''
+    shape = np.broadcast_shapes(np.shape(first), np.shape(second))
+    out = _Call('Interleave', name, _Rows(first, shape), _Rows(second, shape))
+
+    return out.reshape(shape[:-1] + (2*shape[-1],))
+
+def CheckBackends(rows: int=1000, ports: int=17, rtol: float=1e-10, seed: int=0):
+    '''
+    Checks that every available backend that compiles agrees with the numpy reference on random inputs.
+
+    Parameters:
+    -----------
+    rows : int, optional
+        number of evaluations per kernel
+    ports : int, optional
+        points per evaluation
+    rtol : float, optional
+        largest relative difference allowed
+    seed : int, optional
+        random seed
+
+    Returns:
+    --------
+    diff: dict of backend -> largest relative difference from numpy over all kernels
+    '''
+    rng = np.random.default_rng(seed)
+    x = np.sort(rng.uniform(0, 1, ports))
+    geom = (np.arctan(np.diff(x**2)/np.diff(x)), np.diff(x) + 0.01, np.diff(x), np.diff(x**2))
+    p = rng.normal(300, 50, (rows, ports))
+    e = rng.uniform(0.1, 2, (rows, ports))
+    y = np.cumsum(rng.uniform(0.001, 0.02, (rows, 2*ports)), axis=-1)
+    v = rng.uniform(20, 30, (rows, 2*ports))
+    u = rng.uniform(29, 31, rows)
+
+    calls = {'SurfaceLoads': lambda name: SurfaceLoads(p, e, geom, -1.0, name),
+             'MomentumDeficit': lambda name: MomentumDeficit(y, v, 0.01*v, u, 0.05, 1.29, name),
+             'Interleave': lambda name: (Interleave(p, e, name),)}
+
+    diff = {}
+    for name in [name for name in backends if _Compile(name)]:
+        worst = 0.0
+        for kernel, call in calls.items():
+            for ref, got in zip(call('numpy'), call(name)):
+                worst = max(worst, float(np.max(np.abs(got - ref)/np.maximum(np.abs(ref), 1e-300))))
+        diff[name] = worst
+        if worst > rtol:
+            raise AssertionError("backend %s differs from numpy by %.3g" % (name, worst))
+
+    return diff
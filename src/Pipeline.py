@@ -0,0 +1,395 @@
+"""
+Functions making up the per AoA processing chain, shared by main.py and watch.py
+    {Depenancies}: scipy, matplotlib, numpy, statsmodels
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+import csv
+
+# Custom Functions/libraies
+from Forces import *
+from Velocity import *
+from Coefficients import *
+from Uncertainty import *
+from Graphing import *
+from PortHealth import *
+from TubingCorrection import *
+from FigureCache import *
+from Synchronize import *
+
+
+def LoadAirfoil(path: str, air_top_tap_pos: list, air_bot_tap_pos: list, c: float=0.1):
+    '''
+    Returns the coordinates of the airfoil pressure taps.
+
+    Parameters:
+    -----------
+    path : str
+        Clark Y coordinate file (x/c; y/c, top surface first)
+    air_top_tap_pos : list
+        x/c of the top surface taps
+    air_bot_tap_pos : list
+        x/c of the bottom surface taps
+    c : float, optional
+        chord length (m)
+
+    Returns:
+    --------
+    airfoil_top: top tap positions [x; y] (m)
+    airfoil_bot: bottom tap positions [x; y] (m)
+    '''
+    with open(path, newline='') as f:
+        data = list(csv.reader(f, delimiter=';'))[1:]
+
+    is_top = True
+    airfoil_top = []
+    airfoil_bot = []
+    for i, row in enumerate(data):
+        x, y = float(row[0]), float(row[1])
+        if i != 0 and x == 0.0:
+            is_top = False
+        if is_top and x in air_top_tap_pos:
+            airfoil_top.append([x, y])
+        elif not is_top and x in air_bot_tap_pos:
+            airfoil_bot.append([x, y])
+
+    # Multiplying values by cord length (values given are per unit cord)
+    return np.array(airfoil_top)*c, np.array(airfoil_bot)*c
+
+def CalibrateMeans(data_raw: dict, gain: float, offset: float, Hg2Pa: float):
+    '''
+    Returns the calibrated mean pressures of one recording.
+
+    Parameters:
+    -----------
+    data_raw : dict
+        recording as loaded by io.loadmat
+    gain : float
+        calibration gain
+    offset : float
+        calibration offset
+    Hg2Pa : float
+        inHg to Pa convertion factor
+
+    Returns:
+    --------
+    p: airfoil pressures (19 ports)
+    p_r1: rake pressures in position 1 (17 ports)
+    p_r2: rake pressures in position 2 (17 ports)
+    '''
+    p = (data_raw['p_airfoil'][0]*gain + offset)*Hg2Pa
+    p_r1 = (data_raw['p_rake1'][0]*gain + offset)*Hg2Pa
+    p_r2 = (data_raw['p_rake2'][0]*gain + offset)*Hg2Pa
+
+    return p, p_r1, p_r2
+
+def CorrectedChannels(data_raw: dict, air_tubes: list=None, rake_tubes: list=None, f_s: float=30000, nfft: int=8192):
+    '''
+    Returns the uncalibrated time series of one recording, tubing lag corrected when configured (see TubingCorrect).
+
+    Parameters:
+    -----------
+    data_raw : dict
+        recording as loaded by io.loadmat
+    air_tubes : list, optional
+        tubing (length m, inner diameter m, transducer volume m^3) of the 19 airfoil channels
+    rake_tubes : list, optional
+        tubing of the 17 rake channels
+    f_s : float, optional
+        sample rate (Hz)
+    nfft : int, optional
+        tubing correction block length
+
+    Returns:
+    --------
+    spdata: airfoil channels
+    wpdata: rake channels in position 1
+    wpdata2: rake channels in position 2
+    '''
+    spdata = data_raw['spdata']
+    wpdata = data_raw['wpdata']
+    wpdata2 = data_raw['wpdata2']
+
+    # correcting the tubing lag of all channels at once
+    if air_tubes is not None:
+        spdata = TubingCorrect(spdata, f_s, TubingResponse(air_tubes, nfft, f_s), nfft)
+    if rake_tubes is not None:
+        H_rake = TubingResponse(rake_tubes, nfft, f_s)
+        wpdata = TubingCorrect(wpdata[:17], f_s, H_rake, nfft)
+        wpdata2 = TubingCorrect(wpdata2[:17], f_s, H_rake, nfft)
+
+    return spdata, wpdata, wpdata2
+
+def RecordingErr(data_raw: dict, gain: float, offset: float, Hg2Pa: float, air_tubes: list=None, rake_tubes: list=None, f_s: float=30000, nfft: int=8192, method: str='acf'):
+    '''
+    Returns the measurement uncertainty of every port of one recording (see DataErr),
+    optionally correcting the tubing lag of all channels first (see CorrectedChannels).
+
+    Parameters:
+    -----------
+    data_raw : dict
+        recording as loaded by io.loadmat
+    gain : float
+        calibration gain
+    offset : float
+        calibration offset
+    Hg2Pa : float
+        inHg to Pa convertion factor
+    air_tubes, rake_tubes, f_s, nfft : optional
+        tubing correction settings, see CorrectedChannels
+    method : str, optional
+        'acf' for the integral time scale (DataErr) or 'bootstrap' (BootstrapErr)
+
+    Returns:
+    --------
+    dP_a: airfoil pressure uncertainty (19 ports)
+    dP_r1: rake pressure uncertainty in position 1 (17 ports)
+    dP_r2: rake pressure uncertainty in position 2 (17 ports)
+    '''
+    spdata, wpdata, wpdata2 = CorrectedChannels(data_raw, air_tubes, rake_tubes, f_s, nfft)
+
+    # the uncertainty ignores the calibration offset and scales with its gain, so the raw readings are used as they are
+    scale = abs(gain*Hg2Pa)
+    dP_a = PortErr(spdata[:19], f_s, method)*scale
+    dP_r1 = PortErr(wpdata[:17], f_s, method)*scale
+    dP_r2 = PortErr(wpdata2[:17], f_s, method)*scale
+
+    return dP_a, dP_r1, dP_r2
+
+def SyncedLoads(data_raw: dict, a: float, W: np.array, pos_r1: float, pos_r2: float, gain: float, offset: float, Hg2Pa: float, air_bad: np.array=None, rake_bad: np.array=None, chunk: int=65536):
+    '''
+    Returns the instantaneous lift from the airfoil taps and total drag from the rake,
+    sample aligned on the common clock of the airfoil and each rake position (see SyncChunks).
+    The recording is calibrated and reduced chunk by chunk, only running sums are kept.
+
+    Parameters:
+    -----------
+    data_raw : dict
+        recording as loaded by io.loadmat, with the time series and their time bases
+    a : float
+        angle of attack (degrees)
+    W : np.array
+        tap weights of the airfoil geometry (see ResultantWeights)
+    pos_r1 : float
+        position of the bottom rake port in position 1 (cm)
+    pos_r2 : float
+        position of the bottom rake port in position 2 (cm)
+    gain : float
+        calibration gain
+    offset : float
+        calibration offset
+    Hg2Pa : float
+        inHg to Pa convertion factor
+    air_bad : np.array, optional
+        boolean mask of faulty airfoil ports (see PortHealth)
+    rake_bad : np.array, optional
+        boolean mask of faulty rake ports (see PortHealth)
+    chunk : int, optional
+        number of grid points per chunk
+
+    Returns:
+    --------
+    res: dict of arrays with one entry per rake position, the number of aligned samples 'n',
+         the mean and standard deviation of the lift ('L', 'L_std') and of the total drag
+         ('Dt', 'Dt_std') (N/m) and their correlation coefficient 'r'
+    '''
+    res = {k: np.zeros(2) for k in ('n', 'L', 'L_std', 'Dt', 'Dt_std', 'r')}
+    a_rad = np.deg2rad(a)
+    sp = data_raw['spdata'][:19]
+
+    # the rake is in one position at a time, so the airfoil is aligned with each position separately
+    for k, (t_key, x_key, pos) in enumerate((('wptime1', 'wpdata', pos_r1), ('wptime2', 'wpdata2', pos_r2))):
+        groups = [(data_raw['sptime'], sp), (data_raw[t_key], data_raw[x_key][:17])]
+        grid = CommonClock([g[0] for g in groups])
+        y = (pos + rake_pos)/100
+
+        n, mean, M2, C = 0, np.zeros(2), np.zeros(2), 0.0
+        for t, (p, p_r) in SyncChunks(groups, grid, chunk):
+            p = (p*gain + offset)*Hg2Pa
+            p_r = (p_r*gain + offset)*Hg2Pa
+            if air_bad is not None:
+                p = np.concatenate((RepairPorts(p[:12].T, air_bad[:12]), RepairPorts(p[12:].T, air_bad[12:])), axis=-1).T
+
+            # lift of every sample from the resultants, as in ProcessAoA
+            F = W[:2] @ p
+            L = F[0]*np.cos(a_rad) - F[1]*np.sin(a_rad)
+
+            # total drag of every sample from the rake, as in Velocity and TotalDrag
+            v = np.sqrt(2*np.maximum(p_r.T, 0)/1.225)
+            if rake_bad is not None:
+                v = RepairPorts(v, rake_bad)
+            U = 0.5*(v[:, 1] + v[:, -2])
+            Dt = MomentumDeficit(y, v, np.zeros_like(v), U, np.zeros_like(U), 1.29)[0]
+
+            # merging the chunk into the running means and co-moments (Chan et al.)
+            x = np.stack((L, Dt))
+            m = len(t)
+            d = x.mean(axis=-1) - mean
+            dev = x - x.mean(axis=-1, keepdims=True)
+            C += np.sum(dev[0]*dev[1]) + d[0]*d[1]*n*m/(n + m)
+            M2 += np.sum(dev**2, axis=-1) + d**2*n*m/(n + m)
+            mean += d*m/(n + m)
+            n += m
+
+        res['n'][k] = n
+        res['L'][k], res['Dt'][k] = mean
+        res['L_std'][k], res['Dt_std'][k] = np.sqrt(M2/(n - 1))
+        res['r'][k] = C/np.sqrt(M2[0]*M2[1])
+
+    return res
+
+def ProcessAoA(a: float, p: np.array, p_r1: np.array, p_r2: np.array, p_err: np.array, p_r1_err: np.array, p_r2_err: np.array, pos_r1: float, pos_r2: float, W: np.array, c: float, dalpha: float, air_bad: np.array=None, rake_bad: np.array=None, plot: bool=True, tap_pos: tuple=None):
+    '''
+    Returns the wake, pressure distribution and coefficients at one AoA.
+
+    Parameters:
+    -----------
+    a : float
+        angle of attack (degrees)
+    p : np.array
+        calibrated airfoil pressures (19 ports, top then bottom)
+    p_r1 : np.array
+        calibrated rake pressures in position 1 (17 ports)
+    p_r2 : np.array
+        calibrated rake pressures in position 2 (17 ports)
+    p_err : np.array
+        airfoil pressure uncertainty
+    p_r1_err : np.array
+        rake pressure uncertainty in position 1
+    p_r2_err : np.array
+        rake pressure uncertainty in position 2
+    pos_r1 : float
+        position of the bottom rake port in position 1 (cm)
+    pos_r2 : float
+        position of the bottom rake port in position 2 (cm)
+    W : np.array
+        tap weights of the airfoil geometry (see ResultantWeights), built once for every AoA
+    c : float
+        chord length (m)
+    dalpha : float
+        uncertainty in AoA (degrees)
+    air_bad : np.array, optional
+        boolean mask of faulty airfoil ports (see PortHealth)
+    rake_bad : np.array, optional
+        boolean mask of faulty rake ports (see PortHealth)
+    plot : bool, optional
+        save the velocity and Cp graphs (skipped when unchanged, see CachedGraph)
+    tap_pos : tuple, optional
+        x/c of the top and bottom surface taps, where the Cp graph places the measurements (needed to plot)
+
+    Returns:
+    --------
+    res: dict with the polar record 'polar' (see PolarRecord) and the
+         intermediate results (U_inf, q_inf, V_r, V_r_err, V_pos, P_comb,
+         P_comb_err, Cp_top, Cp_bot, Cp_top_err, Cp_bot_err) and the force
+         resultants with their first moments 'F' and covariance 'F_cov' (see SurfaceResultants)
+    '''
+    # faulty ports interpolated over for the surface integrations
+    p_top = p[0:12] if air_bad is None else RepairPorts(p[0:12], air_bad[0:12])
+    p_bot = p[12:19] if air_bad is None else RepairPorts(p[12:19], air_bad[12:19])
+    p_top_err = p_err[0:12]
+    p_bot_err = p_err[12:19]
+
+    # finding the wake velocity distribution:
+    U_inf, U_inf_err, V_r, V_r_err, V_pos, P_comb, P_comb_err = Velocity(np.reshape(p_r1, (1, -1)), np.reshape(p_r2, (1, -1)), p_r1_err, p_r2_err, pos_r1, pos_r2, rake_bad)
+
+    # Plotting velocity distribution
+    if plot:
+        CachedGraph(VelGraph, (a, V_r, V_r_err, V_pos), ['results\\vel-graphs\\vel-a%d.png'%a])
+
+    #finding the dynamic freestream pressure
+    q_inf, q_inf_err = DynPressure(U_inf, U_inf_err)
+
+    #finding the lift and total drag
+    Dt, Dt_err = TotalDrag(V_pos/100, V_r, V_r_err, U_inf, U_inf_err)
+
+    # resultants and first moments in one pass, the normal and axial forces and the moment about
+    # the leading edge (as about any other point, see MomentAbout) all follow from these
+    F, F_cov = SurfaceResultants(np.concatenate((p_top, p_bot)), np.concatenate((p_top_err, p_bot_err)), W)
+    N, dN = F[0], np.sqrt(F_cov[0, 0])
+    A, dA = F[1], np.sqrt(F_cov[1, 1])
+    M, dM = (m[0] for m in MomentAbout(F, F_cov, 0))
+
+    # Finding lift and drag forces
+    L, dL = LiftForce(a, dalpha, N, dN, A, dA)
+    D, dD = PressureDragForce(a, dalpha, N, dN, A, dA)
+
+    # Finding pressure coefficients
+    Cp_top, Cp_bot, Cp_top_err, Cp_bot_err = Cpressure(p_top, p_bot, p_top_err, p_bot_err, q_inf, q_inf_err, air_bad)
+
+    # total drag coefficient
+    Cdt, dCdt = Ctotaldrag(Dt, Dt_err, q_inf, q_inf_err, c)
+
+    # finding remaining Coefficients
+    Cl, dCl, Cd, dCd, Cm, dCm = Coefficients(L, dL, D, dD, M, dM, q_inf, q_inf_err, c)
+
+    # Plotting Cp distribution
+    if plot:
+        if tap_pos is None:
+            raise ValueError("the Cp graph needs the tap positions (tap_pos)")
+        CachedGraph(CpGraph, (a, Cp_top, Cp_bot, Cp_top_err, Cp_bot_err, list(tap_pos[0]), list(tap_pos[1])),
+                    ['results\C_p-graphs\C_p-a%d.png'%a], ["data\XFOIL\\a%d.txt"%a])
+
+    return {'polar': (a, Cl, dCl, Cd, dCd, Cm, dCm, Cdt, dCdt),
+            'U_inf': U_inf, 'U_inf_err': U_inf_err, 'q_inf': q_inf, 'q_inf_err': q_inf_err,
+            'V_r': np.asarray(V_r), 'V_r_err': np.asarray(V_r_err), 'V_pos': V_pos,
+            'P_comb': np.asarray(P_comb), 'P_comb_err': np.asarray(P_comb_err),
+            'Cp_top': Cp_top, 'Cp_bot': Cp_bot, 'Cp_top_err': Cp_top_err, 'Cp_bot_err': Cp_bot_err,
+            'F': F, 'F_cov': F_cov}
+
+def MomentCoefficients(F: np.array, F_cov: np.array, q_inf: np.array, q_inf_err: np.array, c: float, x_ref: np.array):
+    '''
+    Returns the moment coefficients about any number of reference points from the resultants of every AoA (see MomentAbout).
+
+    Parameters:
+    -----------
+    F : np.array (AoA, 4)
+        resultants and first moments (see SurfaceResultants)
+    F_cov : np.array (AoA, 4, 4)
+        their covariance
+    q_inf : np.array (AoA)
+        dynamic pressure
+    q_inf_err : np.array (AoA)
+        dynamic pressure error
+    c : float
+        chord length (m)
+    x_ref : np.array (R)
+        x of the reference points (m)
+
+    Returns:
+    --------
+    Cm: np.array (AoA, R) moment coefficient
+    dCm: np.array (AoA, R) moment coefficient uncertainty
+    '''
+    q, dq = np.asarray(q_inf)[:, None], np.asarray(q_inf_err)[:, None]
+    M, dM = MomentAbout(F, F_cov, x_ref)
+    Cm = M/(q*c**2)
+    dCm = np.sqrt((dM/(q*c**2))**2 + (dq*M/(q**2*c**2))**2)
+
+    return Cm, dCm
+
+def PolarGraphs(polar: np.array, Cm_qc: tuple):
+    '''
+    Saves the coefficient graphs (see CoeffGraph) if the polar or the reference data changed.
+
+    Parameters:
+    -----------
+    polar : np.array (structured, see PolarRecord)
+        one record per AoA
+    Cm_qc : tuple
+        moment coefficient about the quarter chord and its uncertainty at each AoA (see MomentCoefficients),
+        the references give Cm there while the polar has it about the leading edge
+
+    Returns:
+    --------
+    rendered: False if the graphs were already up to date
+    '''
+    outputs = ['results\C_l-graphs\C_l-a.png', 'results\C_d-graphs\C_d-a.png', 'results\C_m-graphs\C_m-a.png',
+               'results\C_Dt-graphs\C_Dt-a.png', 'results\C_l-vs-C_d-graphs\C_l-C_d.png', 'results\C_d-vs-C_dt-graphs\C_d-C_dt.png']
+    deps = ["data\XFOIL\clarky_coeff.txt", r"data\UIUC_Data\UIUC_Data.csv", r"data\UIUC_Data\UIUC_DataCm.csv"]
+
+    rendered = CachedGraph(CoeffGraph, (polar, Cm_qc), outputs, deps)
+    plt.clf()
+    return rendered
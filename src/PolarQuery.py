@@ -0,0 +1,230 @@
+"""
+Functions related to querying a finished polar at any AoA and the lift curve analytics
+    (lift slope, zero lift angle, Clmax and stall onset), saved so it can be reloaded without rerunning main.py
+    {Depenancies}: scipy, numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+from scipy.interpolate import PchipInterpolator
+import numpy as np
+
+
+def BuildPolar(polar: np.array):
+    '''
+    Returns a queryable polar: the coefficients, L/D and their uncertainties on the sorted AoAs
+    with the slopes of their monotone (PCHIP) interpolants, computed once.
+
+    Parameters:
+    -----------
+    polar : np.array (structured, see PolarRecord)
+        one record per AoA
+
+    Returns:
+    --------
+    pq: dict with
+        'alpha': sorted AoA (degrees)
+        'names': queryable quantities (Cl, dCl, Cd, dCd, Cm, dCm, Cdt, dCdt, LD, dLD)
+        'values': np.array (AoA, quantities)
+        'slopes': np.array (AoA, quantities), d(quantity)/d(alpha) of the interpolants at the AoAs
+    '''
+    polar = np.sort(np.asarray(polar), order='alpha')
+    names = [n for n in polar.dtype.names if n != 'alpha']
+    values = np.stack([polar[n] for n in names], axis=-1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        LD = polar['Cl']/polar['Cd']
+        dLD = np.abs(LD)*np.sqrt((polar['dCl']/polar['Cl'])**2 + (polar['dCd']/polar['Cd'])**2)
+    values = np.concatenate((values, LD[:, None], dLD[:, None]), axis=-1)
+    names = names + ['LD', 'dLD']
+
+    alpha = polar['alpha'].astype(np.float64)
+    if len(alpha) > 1:
+        slopes = PchipInterpolator(alpha, values, axis=0).derivative()(alpha)
+    else:
+        slopes = np.zeros_like(values)
+
+    return {'alpha': alpha, 'names': names, 'values': values, 'slopes': slopes}
+
+def QueryPolar(pq: dict, alpha: np.array, names: list=('Cl', 'Cd', 'Cm', 'LD')):
+    '''
+    Returns the polar interpolated at any number of AoAs, a binary search and a cubic
+    Hermite evaluation per AoA. Outside the measured range the values are NaN.
+
+    Parameters:
+    -----------
+    pq : dict
+        queryable polar (see BuildPolar)
+    alpha : np.array
+        AoAs to look up (degrees), any shape
+    names : list, optional
+        quantities to return
+
+    Returns:
+    --------
+    out: dict of quantity -> np.array shaped like alpha
+    '''
+    x = pq['alpha']
+    a = np.asarray(alpha, dtype=np.float64)
+    cols = [pq['names'].index(n) for n in names]
+    y = pq['values'][:, cols]
+    d = pq['slopes'][:, cols]
+
+    if len(x) == 1:
+        v = np.where((a == x[0])[..., None], y[0], np.nan)
+        return {n: v[..., k] for k, n in enumerate(names)}
+
+    k = np.clip(np.searchsorted(x, a, side='right') - 1, 0, len(x) - 2)
+    h = x[k + 1] - x[k]
+    t = ((a - x[k])/h)[..., None]
+    h = h[..., None]
+
+    # cubic Hermite basis
+    v = ((2*t**3 - 3*t**2 + 1)*y[k] + (t**3 - 2*t**2 + t)*h*d[k]
+         + (-2*t**3 + 3*t**2)*y[k + 1] + (t**3 - t**2)*h*d[k + 1])
+    v = np.where(((a >= x[0]) & (a <= x[-1]))[..., None], v, np.nan)
+
+    return {n: v[..., j] for j, n in enumerate(names)}
+
+def LiftSlope(pq: dict, alpha_max: float=8):
+    '''
+    Returns the lift curve slope and zero lift angle, from a weighted least squares line
+    through the Cl of the linear range.
+
+    Parameters:
+    -----------
+    pq : dict
+        queryable polar (see BuildPolar)
+    alpha_max : float, optional
+        largest AoA of the linear range (degrees)
+
+    Returns:
+    --------
+    a0: lift curve slope (per degree)
+    da0: its uncertainty
+    alpha_L0: zero lift angle (degrees)
+    dalpha_L0: its uncertainty
+    '''
+    lin = pq['alpha'] <= alpha_max
+    Cl = pq['values'][lin, pq['names'].index('Cl')]
+    dCl = pq['values'][lin, pq['names'].index('dCl')]
+    if lin.sum() < 2:
+        return np.nan, np.nan, np.nan, np.nan
+
+    # weights from the Cl uncertainties, equal where these are missing
+    ok = np.isfinite(dCl) & (dCl > 0)
+    w = 1/dCl**2 if ok.all() else np.ones_like(Cl)
+    X = np.stack((pq['alpha'][lin], np.ones_like(Cl)), axis=-1)
+    cov = np.linalg.inv(X.T @ (w[:, None]*X))
+    a0, b = cov @ X.T @ (w*Cl)
+
+    # scaled by the scatter about the line where it exceeds the uncertainties
+    dof = len(Cl) - 2
+    if dof > 0:
+        chi2 = np.sum(w*(Cl - X @ (a0, b))**2)/dof
+        cov = cov*(max(chi2, 1) if ok.all() else chi2)
+
+    alpha_L0 = -b/a0
+    g = np.array([b/a0**2, -1/a0])
+    return a0, np.sqrt(cov[0, 0]), alpha_L0, np.sqrt(g @ cov @ g)
+
+def Stall(pq: dict, alpha_max: float=8, frac: float=0.5):
+    '''
+    Returns the maximum lift and the stall onset. The interpolant is monotone between the AoAs,
+    so Clmax is the largest measured Cl.
+
+    Parameters:
+    -----------
+    pq : dict
+        queryable polar (see BuildPolar)
+    alpha_max : float, optional
+        largest AoA of the linear range (see LiftSlope)
+    frac : float, optional
+        stall onset is where dCl/dalpha first drops below this fraction of the lift curve slope
+
+    Returns:
+    --------
+    Clmax: maximum lift coefficient
+    alpha_Clmax: its AoA (degrees)
+    alpha_stall: stall onset (degrees), NaN if the slope never drops below the threshold
+    '''
+    k = pq['names'].index('Cl')
+    Cl = pq['values'][:, k]
+    slope = pq['slopes'][:, k]
+    i = int(np.nanargmax(Cl))
+
+    a0 = LiftSlope(pq, alpha_max)[0]
+    low = np.flatnonzero((pq['alpha'] > alpha_max) & (slope < frac*a0))
+    if not len(low):
+        return Cl[i], pq['alpha'][i], np.nan
+
+    # linear crossing of the threshold between the last AoA above and the first below it
+    j = low[0]
+    s0, s1 = slope[j - 1] - frac*a0, slope[j] - frac*a0
+    x0, x1 = pq['alpha'][j - 1], pq['alpha'][j]
+    alpha_stall = x1 if s0 <= 0 else x0 + (x1 - x0)*s0/(s0 - s1)
+
+    return Cl[i], pq['alpha'][i], alpha_stall
+
+def PolarAnalytics(pq: dict, alpha_max: float=8, frac: float=0.5):
+    '''
+    Returns the lift curve analytics of the polar (see LiftSlope and Stall).
+
+    Parameters:
+    -----------
+    pq : dict
+        queryable polar (see BuildPolar)
+    alpha_max : float, optional
+        largest AoA of the linear range
+    frac : float, optional
+        stall onset slope fraction
+
+    Returns:
+    --------
+    stats: dict with 'a0', 'da0', 'alpha_L0', 'dalpha_L0', 'Clmax', 'alpha_Clmax', 'alpha_stall' and 'LDmax', 'alpha_LDmax'
+    '''
+    a0, da0, alpha_L0, dalpha_L0 = LiftSlope(pq, alpha_max)
+    Clmax, alpha_Clmax, alpha_stall = Stall(pq, alpha_max, frac)
+    LD = pq['values'][:, pq['names'].index('LD')]
+    i = int(np.nanargmax(LD)) if np.isfinite(LD).any() else 0
+
+    return {'a0': a0, 'da0': da0, 'alpha_L0': alpha_L0, 'dalpha_L0': dalpha_L0,
+            'Clmax': Clmax, 'alpha_Clmax': alpha_Clmax, 'alpha_stall': alpha_stall,
+            'LDmax': LD[i], 'alpha_LDmax': pq['alpha'][i]}
+
+def SavePolar(pq: dict, path: str='.\data\CSV\Polar.npz', stats: dict=None):
+    '''
+    Saves a queryable polar (and optionally its analytics) to an npz file.
+
+    Parameters:
+    -----------
+    pq : dict
+        queryable polar (see BuildPolar)
+    path : str, optional
+        file to write
+    stats : dict, optional
+        analytics (see PolarAnalytics)
+    '''
+    stats = stats or {}
+    np.savez(path, alpha=pq['alpha'], names=np.array(pq['names']), values=pq['values'], slopes=pq['slopes'],
+             **{'stat_' + k: np.float64(v) for k, v in stats.items()})
+
+def LoadPolar(path: str='.\data\CSV\Polar.npz'):
+    '''
+    Returns a queryable polar saved by SavePolar, ready for QueryPolar without rebuilding.
+
+    Parameters:
+    -----------
+    path : str, optional
+        file to read
+
+    Returns:
+    --------
+    pq: queryable polar (see BuildPolar)
+    stats: analytics saved with it (see PolarAnalytics), empty if none
+    '''
+    with np.load(path, allow_pickle=False) as f:
+        pq = {'alpha': f['alpha'], 'names': [str(n) for n in f['names']], 'values': f['values'], 'slopes': f['slopes']}
+        stats = {k[5:]: float(f[k]) for k in f.files if k.startswith('stat_')}
+
+    return pq, stats
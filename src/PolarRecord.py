@@ -0,0 +1,54 @@
+import numpy as np
+
+# one record per AoA, the coefficients with their uncertainties. Cm is about the leading edge, from the
+# surface resultants (see MomentAbout), Moments.csv has it about the quarter chord as in the references
+polar_dtype = np.dtype([('alpha', np.float64),
+                        ('Cl', np.float64), ('dCl', np.float64),
+                        ('Cd', np.float64), ('dCd', np.float64),
+                        ('Cm', np.float64), ('dCm', np.float64),
+                        ('Cdt', np.float64), ('dCdt', np.float64)])
+
+def PolarRecord(alpha: np.array):
+    """
+    Returns a preallocated polar, a structured array with one record per AoA.
+
+    Parameters
+    ----------
+    alpha : np.array
+        AoA values in degrees, sorted in ascending order
+
+    Returns
+    -------
+    polar : np.array (structured, polar_dtype)
+        alpha filled in and all coefficients zero
+    """
+    alpha = np.asarray(alpha, dtype=np.float64)
+    if np.any(np.diff(alpha) <= 0):
+        raise ValueError("alpha must be sorted in ascending order without repeats")
+
+    polar = np.zeros(len(alpha), dtype=polar_dtype)
+    polar['alpha'] = alpha
+    return polar
+
+def PolarIndex(polar: np.array, alpha: np.array):
+    """
+    Returns the record index of each requested AoA.
+
+    Parameters
+    ----------
+    polar : np.array (structured, polar_dtype)
+        polar to search
+    alpha : np.array
+        AoA values in degrees, each must be present in the polar
+
+    Returns
+    -------
+    idx : np.array
+    """
+    alpha = np.asarray(alpha, dtype=np.float64)
+    idx = np.clip(np.searchsorted(polar['alpha'], alpha), 0, len(polar) - 1)
+    missing = polar['alpha'][idx] != alpha
+    if np.any(missing):
+        raise KeyError("AoA not in polar: %s" % np.atleast_1d(alpha)[np.atleast_1d(missing)])
+
+    return idx
@@ -0,0 +1,276 @@
+"""
+Functions related to detecting faulty pressure ports from the stacked
+    measurements of all AoAs and interpolating over them
+    {Depenancies}: numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+
+
+# size (see PortScores) above which a port is treated as faulty, in robust deviations of the neighbour residuals.
+# Over every 8 AoA subset of the committed campaign the largest healthy port scores 5.3 and the faulty rake port
+# at least 21, so 10 leaves a factor of 2 on both sides (check the margins printed by PortMargin)
+port_thresh = 10
+
+# fewest AoAs a port is scored over, with fewer the median departure of healthy ports near the suction
+# peak reaches 6.7 (4 AoAs) to 9.7 (1 AoA) and nothing is flagged
+min_aoa = 8
+
+
+def RepairPorts(values: np.array, bad: np.array, pos: np.array=None):
+    '''
+    Returns the values with the faulty ports replaced by linear
+    interpolation between the nearest healthy ports.
+
+    Parameters:
+    -----------
+    values : np.array
+        port values, the last axis runs over the ports
+    bad : np.array
+        boolean mask of faulty ports
+    pos : np.array, optional
+        port positions, defaults to the port index
+
+    Returns:
+    --------
+    repaired: copy of values with faulty ports interpolated
+    '''
+    values = np.array(values, dtype=np.float64)
+    bad = np.asarray(bad, dtype=bool)
+    if not bad.any():
+        return values
+    pos = np.arange(bad.size, dtype=np.float64) if pos is None else np.asarray(pos, dtype=np.float64)
+
+    good = np.flatnonzero(~bad)
+    if good.size == 0:
+        raise ValueError("no healthy ports to interpolate from")
+    b = np.flatnonzero(bad)
+    if good.size == 1:
+        values[..., b] = values[..., good]
+        return values
+
+    # nearest healthy neighbours of each faulty port (held constant past the ends)
+    order = np.argsort(pos[good])
+    gp = pos[good][order]
+    gi = good[order]
+    k = np.clip(np.searchsorted(gp, pos[b]), 1, gp.size - 1)
+    w = np.clip((pos[b] - gp[k-1])/(gp[k] - gp[k-1]), 0, 1)
+
+    values[..., b] = values[..., gi[k-1]]*(1 - w) + values[..., gi[k]]*w
+    return values
+
+def NeighbourResidual(values: np.array, pos: np.array, deg: int=1, reach: int=2):
+    '''
+    Returns the departure of every interior port from a polynomial fitted
+    through its neighbours (the port itself left out). A line through the
+    two adjacent ports is used for deg=1, a least squares quadratic through
+    up to `reach` neighbours on each side for deg=2. End ports have no residual.
+
+    Parameters:
+    -----------
+    values : np.array (2D)
+        port values where each row is a different AoA
+    pos : np.array
+        port positions
+    deg : int, optional
+        degree of the local fit (1 or 2)
+    reach : int, optional
+        number of neighbours used on each side for deg=2
+
+    Returns:
+    --------
+    r: residuals with the same shape as values
+    '''
+    n = values.shape[-1]
+    r = np.zeros_like(values)
+    for j in range(1, n - 1):
+        h = 1 if deg == 1 else reach
+        nb = [k for k in range(j - h, j + h + 1) if 0 <= k < n and k != j]
+        # least squares weights of the fit evaluated at the port, applied to all AoAs at once
+        V = np.vander(pos[nb] - pos[j], min(deg, len(nb) - 1) + 1)
+        w = np.linalg.pinv(V)[-1]
+        r[:, j] = values[:, j] - values[:, nb] @ w
+
+    return r
+
+def SpectralFraction(x: np.array, fs: float, f_split: float):
+    '''
+    Returns the fraction of the fluctuation energy above f_split for
+    all channels at once.
+
+    Parameters:
+    -----------
+    x : np.array (2D)
+        time series where each row is a different channel
+    fs : float
+        sample rate (Hz)
+    f_split : float
+        frequency separating the signal band from the noise band (Hz)
+
+    Returns:
+    --------
+    frac: high frequency energy fraction of each channel
+    '''
+    X = np.abs(np.fft.rfft(x - x.mean(axis=-1, keepdims=True), axis=-1))**2
+    f = np.fft.rfftfreq(x.shape[-1], 1/fs)
+    total = X.sum(axis=-1)
+
+    return X[..., f > f_split].sum(axis=-1)/np.where(total > 0, total, 1)
+
+def PortScores(p: np.array, dp: np.array=None, feature: np.array=None, pos: np.array=None, segments: list=None, bad: np.array=None):
+    '''
+    Returns the health score of every port. Each metric (mean pressure,
+    log noise level and an optional spectral feature) is compared to a line
+    through the two adjacent ports for all AoAs at once. The score is the
+    median departure over the AoAs in robust deviations (MAD) of the departures
+    of all ports and AoAs. A faulty port is off by about the same amount at
+    every AoA, and makes each neighbour look off by half as much at most, so
+    it is the highest scoring port and its neighbours drop once it is interpolated over.
+
+    Parameters:
+    -----------
+    p : np.array (2D)
+        mean pressures where each row is a different AoA and each column a port
+    dp : np.array (2D), optional
+        pressure uncertainties (noise level) with the same structure as p
+    feature : np.array (2D), optional
+        any additional per port metric, e.g. SpectralFraction
+    pos : np.array, optional
+        port positions, defaults to the port index
+    segments : list, optional
+        index arrays of ports lying on the same continuous line
+        (e.g. upper and lower airfoil surface), defaults to all ports
+    bad : np.array, optional
+        ports already known to be faulty, interpolated over before scoring the rest
+
+    Returns:
+    --------
+    score: size of the departure of each port (worst metric)
+    '''
+    p = np.atleast_2d(p)
+    n = p.shape[-1]
+    pos = np.arange(n, dtype=np.float64) if pos is None else np.asarray(pos, dtype=np.float64)
+    segments = [np.arange(n)] if segments is None else segments
+    bad = np.zeros(n, dtype=bool) if bad is None else bad
+
+    metrics = [p]
+    if dp is not None:
+        metrics.append(np.log(np.maximum(np.atleast_2d(dp), np.finfo(np.float64).tiny)))
+    if feature is not None:
+        metrics.append(np.atleast_2d(feature))
+
+    score = np.zeros(n)
+    for seg in segments:
+        seg = np.asarray(seg)
+        for m in metrics:
+            m = RepairPorts(m[:, seg], bad[seg], pos[seg])
+            r = NeighbourResidual(m, pos[seg], deg=1)
+            # the spread of the metric itself floors the pooled deviation, so very smooth data
+            # does not turn tiny departures into large scores
+            pooled = 1.4826*np.median(np.abs(r[:, 1:-1] - np.median(r[:, 1:-1])))
+            spread = 1.4826*np.median(np.abs(m - np.median(m)))
+            score[seg] = np.maximum(score[seg], np.abs(np.median(r, axis=0))/max(pooled, 0.01*spread, np.finfo(np.float64).tiny))
+
+    # dead ports
+    score[~np.all(np.isfinite(p), axis=0)] = np.inf
+
+    return score
+
+def PortHealth(p: np.array, dp: np.array=None, feature: np.array=None, pos: np.array=None, segments: list=None, bad: np.array=None, thresh: float=port_thresh, min_rows: int=min_aoa, max_bad: int=None):
+    '''
+    Returns the mask of faulty ports. The highest scoring port above the
+    threshold is flagged and the scores are recomputed with it interpolated
+    over, so a single faulty port does not drag its healthy neighbours over
+    the threshold. Nothing is flagged from fewer than min_rows AoAs.
+
+    Parameters:
+    -----------
+    p : np.array (2D)
+        mean pressures where each row is a different AoA and each column a port
+    dp : np.array (2D), optional
+        pressure uncertainties (noise level) with the same structure as p
+    feature : np.array (2D), optional
+        any additional per port metric, e.g. SpectralFraction
+    pos : np.array, optional
+        port positions, defaults to the port index
+    segments : list, optional
+        index arrays of ports lying on the same continuous line
+    bad : np.array, optional
+        ports known to be faulty, kept in the mask whatever their score
+    thresh : float, optional
+        score above which a port is considered faulty
+    min_rows : int, optional
+        fewest rows (AoAs) to flag ports from
+    max_bad : int, optional
+        maximum number of ports to flag, defaults to a quarter of the ports
+
+    Returns:
+    --------
+    bad: boolean mask of faulty ports
+    score: final score of each port
+    '''
+    n = np.shape(p)[-1]
+    max_bad = n//4 if max_bad is None else max_bad
+    bad = np.zeros(n, dtype=bool) if bad is None else np.array(bad, dtype=bool)
+
+    score = PortScores(p, dp, feature, pos, segments, bad)
+    # dead ports are flagged whatever the number of AoAs
+    bad |= np.isinf(score)
+    if np.shape(np.atleast_2d(p))[0] < min_rows:
+        return bad, score
+    while bad.sum() < max_bad:
+        cand = ~bad & (score > thresh)
+        if not cand.any():
+            break
+        bad[np.argmax(np.where(cand, score, -np.inf))] = True
+        score = np.where(bad, score, PortScores(p, dp, feature, pos, segments, bad))
+
+    return bad, score
+
+def PortMask(ports: list, n: int):
+    '''
+    Returns the boolean mask of the listed ports (numbered from 1, as in the CSVs).
+
+    Parameters:
+    -----------
+    ports : list
+        port numbers
+    n : int
+        number of ports
+
+    Returns:
+    --------
+    bad: boolean mask of the ports
+    '''
+    return np.isin(np.arange(1, n + 1), ports)
+
+def PortMargin(bad: np.array, score: np.array, thresh: float=port_thresh, known: np.array=None):
+    '''
+    Returns how clearly PortHealth separated the faulty ports from the healthy
+    ones, to be reported with the mask: a factor close to 1 means a port
+    was flagged (or left) by a hair and the mask deserves a look.
+
+    Parameters:
+    -----------
+    bad : np.array
+        boolean mask of faulty ports (see PortHealth)
+    score : np.array
+        final score of each port (see PortHealth)
+    thresh : float, optional
+        threshold the mask was found with
+    known : np.array, optional
+        ports given to PortHealth as known to be faulty, left out of the flagged margin
+
+    Returns:
+    --------
+    flagged: lowest score of a flagged port over the threshold, inf if none were flagged
+    healthy: threshold over the highest score of a healthy port, inf if all were flagged
+    '''
+    bad = np.asarray(bad, dtype=bool)
+    found = bad if known is None else bad & ~np.asarray(known, dtype=bool)
+    flagged = np.min(score[found])/thresh if found.any() else np.inf
+    healthy = thresh/np.max(score[~bad]) if (~bad).any() else np.inf
+
+    return flagged, healthy
@@ -0,0 +1,82 @@
+"""
+Functions related to reading the recordings ahead in background threads, so the disk
+    (or network share) and the processing of the previous recording overlap
+    {Depenancies}: scipy, numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+from concurrent.futures import ThreadPoolExecutor
+from scipy import io
+import numpy as np
+import os
+
+
+def LoadRecording(path: str, keys: list=None):
+    '''
+    Returns one recording, read from the lab .mat file, a cached .npz copy of it or its archive (see Archive).
+
+    Parameters:
+    -----------
+    path : str
+        recording file (.mat, .npz or .arc)
+    keys : list, optional
+        variables to read (e.g. ['p_airfoil', 'p_rake1', 'p_rake2']), all when None.
+        skipping the time series makes a .mat read much cheaper
+
+    Returns:
+    --------
+    data_raw: dict of variable name -> array, as io.loadmat returns it
+    '''
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.mat':
+        return io.loadmat(path, variable_names=keys)
+    if ext == '.npz':
+        with np.load(path, allow_pickle=False) as f:
+            return {k: f[k] for k in (f.files if keys is None else keys)}
+    if ext == '.arc':
+        # only imported when an archive is read
+        from Archive import ReadArchive
+        return ReadArchive(path, keys)
+    raise ValueError("unknown recording format: %s" % path)
+
+def Prefetch(paths: list, depth: int=2, keys: list=None, loader=LoadRecording, workers: int=None):
+    '''
+    Yields the recordings in order while the next ones are read in background threads.
+    At most depth recordings are read ahead, so memory stays bounded whatever the number of files,
+    and reading waits for the consumer when it falls behind.
+
+    Parameters:
+    -----------
+    paths : list
+        recording files, in processing order
+    depth : int, optional
+        recordings read ahead of the one being processed
+    keys : list, optional
+        variables to read (see LoadRecording)
+    loader : function, optional
+        loader(path, keys) reading one recording
+    workers : int, optional
+        reading threads, defaults to depth
+
+    Yields:
+    --------
+    path: recording file
+    data_raw: recording as returned by the loader (errors are raised here, in order)
+    '''
+    paths = list(paths)
+    depth = max(int(depth), 1)
+    pool = ThreadPoolExecutor(max_workers=workers or depth)
+    pending = {}
+    try:
+        for i, path in enumerate(paths):
+            # keeping depth reads in flight ahead of the current one
+            for k in range(i, min(i + depth + 1, len(paths))):
+                if k not in pending:
+                    pending[k] = pool.submit(loader, paths[k], keys)
+            yield path, pending.pop(i).result()
+    finally:
+        # stopped early (break or error): nothing more is read
+        for f in pending.values():
+            f.cancel()
+        pool.shutdown(wait=True)
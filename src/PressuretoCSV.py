@@ -89,4 +89,162 @@ def RakeUncertaintytoCSV(alpha: np.array, dp_rake: np.array , y: np.array):
                           index=y[i].T, columns=['Pressure Uncertainty (Pa)'])
         df.index.name = 'y Position (cm)'
         
-        df.to_csv('.\data\CSV\Rake_Pressure_Uncertainty_AoA%d.csv'%alpha[i], index=True)
\ No newline at end of file
+        df.to_csv('.\data\CSV\Rake_Pressure_Uncertainty_AoA%d.csv'%alpha[i], index=True)
+
+def PolartoCSV(polar: np.array, path: str='.\data\CSV\Polar.csv'):
+    """
+    exports the polar (coefficients and uncertainties for each AoA) to a CSV file,
+    Cm about the leading edge (see PolarRecord)
+
+    Parameters
+    ----------
+    polar : np.array (structured, see PolarRecord)
+        one record per AoA
+    path : str, optional
+        CSV file to write
+    Returns
+    -------
+    0
+    """
+    df = pd.DataFrame(polar)
+    df = df.set_index('alpha')
+    df.index.name = 'AoA (deg)'
+
+    df.to_csv(path, index=True)
+    return 0
+
+def WakeFittoCSV(alpha: np.array, fit: dict, Cdw: np.array, dCdw: np.array):
+    """
+    exports the fitted wake (see WakeFit) of each AoA to a CSV file
+
+    Parameters
+    ----------
+    alpha : np.array
+        array containing AoA values
+    fit : dict
+        wake fit as returned by WakeFit
+    Cdw : np.array
+        total drag coefficient from the fitted wake
+    dCdw : np.array
+        uncertainty in Cdw
+    Returns
+    -------
+    0
+    """
+    df = pd.DataFrame({'Cdt wake fit': Cdw, 'dCdt wake fit': dCdw,
+                       'Drag (N/m)': fit['drag'], 'dDrag (N/m)': fit['drag_err'],
+                       'Width (m)': fit['width'], 'dWidth (m)': fit['width_err'],
+                       'Deficit (m/s)': fit['deficit'], 'dDeficit (m/s)': fit['deficit_err'],
+                       'Center (m)': fit['params'][:, 2], 'Edge velocity (m/s)': fit['params'][:, 0],
+                       'chi2': fit['chi2'], 'converged': fit['converged'], 'stalled': fit['stalled']},
+                      index=alpha)
+    df.index.name = 'AoA (deg)'
+
+    df.to_csv('.\data\CSV\Wake_Fit.csv', index=True)
+    return 0
+
+def SyncedLoadstoCSV(alpha: np.array, sync: dict):
+    """
+    exports the sample aligned lift and wake drag statistics (see SyncedLoads) of each AoA and rake position to a CSV file
+
+    Parameters
+    ----------
+    alpha : np.array
+        array containing AoA values
+    sync : dict
+        arrays (AoA, rake position) of the SyncedLoads results
+    Returns
+    -------
+    0
+    """
+    df = pd.DataFrame(index=alpha)
+    for k in range(2):
+        df['n pos%d' % (k + 1)] = sync['n'][:, k]
+        df['L pos%d (N/m)' % (k + 1)] = sync['L'][:, k]
+        df['L std pos%d (N/m)' % (k + 1)] = sync['L_std'][:, k]
+        df['Dt pos%d (N/m)' % (k + 1)] = sync['Dt'][:, k]
+        df['Dt std pos%d (N/m)' % (k + 1)] = sync['Dt_std'][:, k]
+        df['r pos%d' % (k + 1)] = sync['r'][:, k]
+    df.index.name = 'AoA (deg)'
+
+    df.to_csv('.\data\CSV\Synced_Loads.csv', index=True)
+    return 0
+
+def MomentstoCSV(alpha: np.array, x_ref: np.array, Cm: np.array, dCm: np.array, x_cp: np.array, dx_cp: np.array):
+    """
+    exports the moment coefficients about each reference point and the center of pressure of each AoA to a CSV file
+
+    Parameters
+    ----------
+    alpha : np.array
+        array containing AoA values
+    x_ref : np.array
+        x/c of the reference points
+    Cm : np.array (AoA, reference points)
+        moment coefficient about each reference point
+    dCm : np.array (AoA, reference points)
+        uncertainty in Cm
+    x_cp : np.array
+        x/c of the center of pressure
+    dx_cp : np.array
+        uncertainty in x_cp
+    Returns
+    -------
+    0
+    """
+    df = pd.DataFrame(index=alpha)
+    for k, x in enumerate(x_ref):
+        df['Cm x/c=%g' % x] = Cm[:, k]
+        df['dCm x/c=%g' % x] = dCm[:, k]
+    df['x_cp/c'] = x_cp
+    df['dx_cp/c'] = dx_cp
+    df.index.name = 'AoA (deg)'
+
+    df.to_csv('.\data\CSV\Moments.csv', index=True)
+    return 0
+
+def PortBiastoCSV(stats: dict):
+    """
+    exports the per port agreement of the measured Cp with XFOIL over all AoAs to a CSV file
+
+    Parameters
+    ----------
+    stats : dict
+        residual statistics of each of the 19 ports (see ResidualStats)
+    Returns
+    -------
+    0
+    """
+    df = pd.DataFrame({'bias (sigma)': stats['bias'], 'dbias (sigma)': stats['bias_err'],
+                       'chi2/n': stats['red_chi2'], 'n': stats['n']},
+                      index=pd.Index(np.arange(1, len(stats['n']) + 1), name='Port'))
+
+    df.to_csv('.\data\CSV\Cp_Port_Bias.csv', index=True)
+    return 0
+
+def CptoCSV(alpha: np.array, Cp: np.array, Cp_err: np.array):
+    """
+    exports the pressure coefficient at every airfoil port and AoA, with its uncertainty, to a CSV file
+
+    Parameters
+    ----------
+    alpha : np.array
+        array containing AoA values
+    Cp : np.array (AoA, 19)
+        pressure coefficient of each port, top then bottom surface
+    Cp_err : np.array (AoA, 19)
+        uncertainty in Cp
+    Returns
+    -------
+    0
+    """
+    Cp, Cp_err = np.asarray(Cp), np.asarray(Cp_err)
+    df = pd.DataFrame(index=alpha)
+    for k in range(Cp.shape[1]):
+        df['Cp %d' % (k + 1)] = Cp[:, k]
+    for k in range(Cp.shape[1]):
+        df['dCp %d' % (k + 1)] = Cp_err[:, k]
+    df.index.name = 'AoA (deg)'
+
+    df.to_csv('.\data\CSV\Cp.csv', index=True)
+    return 0
@@ -0,0 +1,194 @@
+"""
+Functions related to quick look previews of the recordings, the means and uncertainties found from
+    a truncated and anti-alias decimated part of each time series, with bounds on how far they can be
+    from the full resolution result, refined level by level towards full resolution
+    {Depenancies}: scipy, numpy, statsmodels
+"""
+# IMPORTS
+#####################
+# Dependancies
+from scipy import signal, stats
+import numpy as np
+import threading
+import queue
+
+# Custom Functions/libraies
+from Uncertainty import *
+from Pipeline import CorrectedChannels
+from Prefetch import Prefetch
+
+
+# (fraction of the record kept, decimation factor) of each refinement level, coarsest first
+preview_levels = ((0.1, 8), (0.25, 4), (1, 4), (1, 1))
+
+
+def Decimate(x: np.array, q: int):
+    '''
+    Returns the time series anti-alias filtered and decimated (zero phase FIR, see scipy.signal.decimate).
+
+    Parameters:
+    -----------
+    x : np.array (channels, N)
+        time series
+    q : int
+        decimation factor, 1 to keep every sample
+
+    Returns:
+    --------
+    x_q: np.array (channels, N/q)
+    '''
+    if q <= 1:
+        return x
+    # the filter pads the ends with zeros, so the mean is taken out first or the edges ring
+    mean = np.mean(x, axis=-1, keepdims=True)
+    return signal.decimate(x - mean, int(q), ftype='fir', axis=-1, zero_phase=True) + mean
+
+def PreviewErr(raw_p: np.array, f_s: float, frac: float, q: int, method: str='acf', n_seg: int=4):
+    '''
+    Returns the preview mean and uncertainty of several ports from the first frac of the record,
+    decimated by q for the uncertainty, both scaled to what the full record would give.
+
+    The mean of the kept part differs from the full record mean by at most dP_part*sqrt(1 - frac)
+    (95%, dP_part the uncertainty of the kept part's mean). The uncertainty estimate is checked by
+    repeating it on n_seg segments of the kept part, their scatter bounding its own error.
+
+    Parameters:
+    -----------
+    raw_p : np.array (channels, N)
+        time series, one row per port
+    f_s : float
+        sample rate (Hz)
+    frac : float
+        fraction of the record used, from its start
+    q : int
+        decimation factor of the uncertainty estimate
+    method : str, optional
+        uncertainty method (see PortErr)
+    n_seg : int, optional
+        segments the uncertainty estimate is repeated on
+
+    Returns:
+    --------
+    p: mean of each port
+    dP: uncertainty of the full record mean
+    p_bound: largest expected |p - full resolution mean|
+    dP_bound: largest expected |dP - full resolution dP|
+    '''
+    M = max(int(round(frac*raw_p.shape[-1])), 2*q)
+    part = raw_p[..., :M]
+    p = np.mean(part, axis=-1)
+
+    if frac >= 1 and q <= 1:
+        return p, PortErr(part, f_s, method), np.zeros_like(p), np.zeros_like(p)
+
+    dP_part = PortErr(Decimate(part, q), f_s/q, method)
+    dP = dP_part*np.sqrt(M/raw_p.shape[-1])
+
+    # repeated on segments of the kept part, each scaled to the full record: the estimate from the
+    # whole part scatters sqrt(n_seg) times less than they do (95%, Student t with n_seg - 1 dof),
+    # and short records bias it, by no more than the shift from the segments to the whole part
+    h = M//n_seg
+    dP_seg = np.array([PortErr(Decimate(part[..., k*h:(k + 1)*h], q), f_s/q, method) for k in range(n_seg)])*np.sqrt(h/raw_p.shape[-1])
+    dP_bound = stats.t.ppf(0.975, n_seg - 1)*np.std(dP_seg, axis=0, ddof=1)/np.sqrt(n_seg) + np.abs(np.mean(dP_seg, axis=0) - dP)
+
+    return p, dP, dP_part*np.sqrt(max(1 - M/raw_p.shape[-1], 0)), dP_bound
+
+def PreviewRecording(data_raw: dict, gain: float, offset: float, Hg2Pa: float, frac: float, q: int, air_tubes: list=None, rake_tubes: list=None, f_s: float=30000, nfft: int=8192, method: str='acf'):
+    '''
+    Returns the preview means and uncertainties of every port of one recording (see PreviewErr).
+
+    Parameters:
+    -----------
+    data_raw : dict
+        recording as loaded by io.loadmat
+    gain : float
+        calibration gain
+    offset : float
+        calibration offset
+    Hg2Pa : float
+        inHg to Pa convertion factor
+    frac : float
+        fraction of the record used
+    q : int
+        decimation factor of the uncertainty estimate
+    air_tubes, rake_tubes, f_s, nfft : optional
+        tubing correction settings, see CorrectedChannels
+    method : str, optional
+        uncertainty method (see PortErr)
+
+    Returns:
+    --------
+    rec: dict with, for 'a' (19 airfoil ports), 'r1' and 'r2' (17 rake ports in each position),
+         'p_*', 'dP_*', 'p_bound_*' and 'dP_bound_*' (see PreviewErr)
+    '''
+    rec = {}
+    channels = CorrectedChannels(data_raw, air_tubes, rake_tubes, f_s, nfft)
+    for name, x, n in zip(('a', 'r1', 'r2'), channels, (19, 17, 17)):
+        # calibrated after the reduction: the mean is affine in the readings, the rest scale with the gain
+        p, dP, p_bound, dP_bound = PreviewErr(x[:n], f_s, frac, q, method)
+        rec['p_' + name] = (p*gain + offset)*Hg2Pa
+        for key, v in zip(('dP_', 'p_bound_', 'dP_bound_'), (dP, p_bound, dP_bound)):
+            rec[key + name] = v*abs(gain*Hg2Pa)
+
+    return rec
+
+def Refine(paths: list, levels: tuple=preview_levels, depth: int=2, **kwargs):
+    '''
+    Yields the preview of every recording at each level in turn, coarsest first,
+    so a complete quick look is available long before the full resolution one.
+
+    Parameters:
+    -----------
+    paths : list
+        recording files
+    levels : tuple, optional
+        (fraction, decimation factor) of each level
+    depth : int, optional
+        recordings read ahead (see Prefetch)
+    kwargs :
+        gain, offset, Hg2Pa and the optional settings of PreviewRecording
+
+    Yields:
+    --------
+    level: index of the level
+    i: index of the recording
+    rec: preview of the recording (see PreviewRecording)
+    '''
+    for level, (frac, q) in enumerate(levels):
+        for i, (path, data_raw) in enumerate(Prefetch(paths, depth, keys=['spdata', 'wpdata', 'wpdata2'])):
+            yield level, i, PreviewRecording(data_raw, frac=frac, q=q, **kwargs)
+
+def RefineInBackground(paths: list, levels: tuple=preview_levels, maxsize: int=0, **kwargs):
+    '''
+    Runs Refine in a background thread, the results collected from the returned queue.
+    An item of None marks the end, an exception raised in the thread is put on the queue instead.
+
+    Parameters:
+    -----------
+    paths : list
+        recording files
+    levels : tuple, optional
+        (fraction, decimation factor) of each level
+    maxsize : int, optional
+        queue length the thread waits at (0 for no limit)
+    kwargs :
+        see Refine
+
+    Returns:
+    --------
+    results: queue.Queue of (level, i, rec)
+    thread: the refining thread (a daemon, stops with the program)
+    '''
+    results = queue.Queue(maxsize)
+
+    def run():
+        try:
+            for item in Refine(paths, levels, **kwargs):
+                results.put(item)
+            results.put(None)
+        except Exception as e:
+            results.put(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return results, thread
@@ -0,0 +1,317 @@
+"""
+Functions related to the reference database, the XFOIL polars and Cp distributions of every
+    Reynolds number available gridded in (Re, alpha[, x/c]) in one npz file, interpolated to the Re of each run
+    {Depenancies}: numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+import glob
+import json
+import os
+import re
+import zipfile
+
+# Custom Functions/libraies
+from Residuals import BatchInterp
+from Checkpoint import FileSignature
+
+
+_number = re.compile(r'-?\d+\.\d+')
+
+# coefficients along the last axis of the gridded polar, Cd is the pressure drag (XFOIL's CDp) as integrated
+# from the taps and Cdt the total drag (XFOIL's CD) as found from the wake
+polar_columns = ('Cl', 'Cd', 'Cdt', 'Cm')
+
+
+# READERS
+#####################
+def ReadXfoilPolar(path: str):
+    '''
+    Returns an XFOIL polar file (as saved by PACC), with its Reynolds number from the header.
+
+    Parameters:
+    -----------
+    path : str
+        polar file
+
+    Returns:
+    --------
+    Re: Reynolds number
+    alpha, Cl, Cd, Cdp, Cm: np.array, one value per converged AoA (Cd total and Cdp pressure drag)
+    '''
+    with open(path) as f:
+        text = f.read()
+    m = re.search(r'Re =\s*([\d.]+)\s*e\s*(\d+)', text)
+    Re = float(m.group(1))*10**int(m.group(2))
+
+    rows = []
+    for line in text.split('------')[-1].split('\n'):
+        values = _number.findall(line)
+        if len(values) >= 5:
+            rows.append([float(v) for v in values[:5]])
+    rows = np.array(rows).reshape(-1, 5)
+
+    return Re, rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3], rows[:, 4]
+
+def ReadXfoilCp(path: str):
+    '''
+    Returns an XFOIL Cp distribution file (as saved by CPWR), with its AoA and Reynolds number from the header.
+
+    Parameters:
+    -----------
+    path : str
+        Cp file
+
+    Returns:
+    --------
+    alpha: AoA (degrees)
+    Re: Reynolds number
+    x, Cp: np.array, from the trailing edge over the top surface and back under the bottom
+    '''
+    with open(path) as f:
+        lines = f.read().split('\n')
+    m = re.search(r'Alfa =\s*(-?[\d.]+)\s+Re =\s*([\d.]+)', lines[1])
+
+    # columns may run together where a value is negative
+    rows = np.array([[float(v) for v in _number.findall(line)] for line in lines[3:] if len(_number.findall(line)) == 3])
+
+    return float(m.group(1)), float(m.group(2)), rows[:, 0], rows[:, 2]
+
+
+# DATABASE
+#####################
+def BuildReferenceDB(polar_files: list, cp_files: list, alpha: np.array=None, x: np.array=None):
+    '''
+    Returns the reference database gridded from XFOIL files, grouped by the Reynolds number in their headers.
+    Grid points without a reference (AoA out of range, no Cp at that Re...) are NaN.
+
+    Parameters:
+    -----------
+    polar_files : list
+        XFOIL polar files (see ReadXfoilPolar)
+    cp_files : list
+        XFOIL Cp files (see ReadXfoilCp), any number of AoAs per Re
+    alpha : np.array, optional
+        AoA grid (degrees), defaults to -5 to 20 in 0.25 steps
+    x : np.array, optional
+        x/c grid of the Cp, defaults to 401 cosine spaced points (fine enough near the leading edge
+        that interpolating again to the taps changes Cp by less than 1e-3)
+
+    Returns:
+    --------
+    db: dict with
+        'Re': np.array (nRe) Reynolds numbers
+        'alpha': np.array (nA) AoA grid
+        'x': np.array (nX) x/c grid
+        'polar': np.array (nRe, nA, 4) Cl, Cd, Cdt, Cm (see polar_columns)
+        'Cp': np.array (nRe, nA, 2, nX) top and bottom surface Cp
+    '''
+    alpha = np.arange(-5, 20.25, 0.25) if alpha is None else np.asarray(alpha, dtype=np.float64)
+    x = 0.5*(1 - np.cos(np.linspace(0, np.pi, 401))) if x is None else np.asarray(x, dtype=np.float64)
+    key = lambda Re: float(np.round(Re, -2))
+
+    polars = {key(P[0]): P[1:] for P in map(ReadXfoilPolar, polar_files)}
+    cps = {}
+    for path in cp_files:
+        a, Re, xc, cp = ReadXfoilCp(path)
+        le = int(np.argmin(xc))
+        top = np.interp(x, xc[:le + 1][::-1], cp[:le + 1][::-1])
+        bot = np.interp(x, xc[le:], cp[le:])
+        cps.setdefault(key(Re), []).append((a, np.stack((top, bot))))
+
+    Re_grid = np.array(sorted(set(polars) | set(cps)))
+    polar = np.full((len(Re_grid), len(alpha), len(polar_columns)), np.nan)
+    Cp = np.full((len(Re_grid), len(alpha), 2, len(x)), np.nan)
+    for i, Re in enumerate(Re_grid):
+        if Re in polars:
+            a, Cl, Cd, Cdp, Cm = polars[Re]
+            o = np.argsort(a)
+            polar[i] = BatchInterp(np.broadcast_to(a[o], (4, len(a))), np.stack((Cl, Cdp, Cd, Cm))[:, o],
+                                   np.broadcast_to(alpha, (4, len(alpha)))).T
+        if Re in cps:
+            # every (surface, x) column interpolated along the AoAs at once
+            runs = sorted(cps[Re], key=lambda r: r[0])
+            a = np.array([r[0] for r in runs])
+            v = np.stack([r[1] for r in runs], axis=-1).reshape(2*len(x), len(a))
+            if len(a) > 1:
+                f = BatchInterp(np.broadcast_to(a, v.shape), v, np.broadcast_to(alpha, (len(v), len(alpha))))
+            else:
+                f = np.where(alpha == a[0], v, np.nan)
+            Cp[i] = f.T.reshape(len(alpha), 2, len(x))
+
+    return {'Re': Re_grid, 'alpha': alpha, 'x': x, 'polar': polar, 'Cp': Cp}
+
+def SaveReferenceDB(db: dict, path: str="data\XFOIL\\reference_db.npz"):
+    '''
+    Saves the reference database (see BuildReferenceDB) to a compressed npz file.
+
+    Parameters:
+    -----------
+    db : dict
+        reference database
+    path : str, optional
+        file to write
+    '''
+    np.savez_compressed(path, **db)
+
+def LoadReferenceDB(path: str="data\XFOIL\\reference_db.npz"):
+    '''
+    Returns the reference database saved by SaveReferenceDB.
+
+    Parameters:
+    -----------
+    path : str, optional
+        file to read
+
+    Returns:
+    --------
+    db: reference database (see BuildReferenceDB)
+    '''
+    with np.load(path, allow_pickle=False) as f:
+        return {k: f[k] for k in f.files}
+
+def ReferenceDB(path: str="data\XFOIL\\reference_db.npz", polar_globs: list=("data\XFOIL\*coeff*.txt", "data\XFOIL\*\*coeff*.txt"),
+                cp_globs: list=("data\XFOIL\\a*.txt", "data\XFOIL\*\\a*.txt")):
+    '''
+    Returns the reference database, rebuilt from the XFOIL files only when they changed: the database
+    keeps the list of files it was built from with their signatures, so a file added, removed or
+    rewritten (even with an older modification time, e.g. restored from a copy) triggers a rebuild.
+
+    Parameters:
+    -----------
+    path : str, optional
+        database file
+    polar_globs : list, optional
+        XFOIL polar files, in the XFOIL folder or a subfolder of it (e.g. one per Reynolds number)
+    cp_globs : list, optional
+        XFOIL Cp files
+
+    Returns:
+    --------
+    db: reference database (see BuildReferenceDB), with 'sources' the JSON list of [file, modification time (ns), size]
+    '''
+    polar_files = sorted(set(f for g in polar_globs for f in glob.glob(g)))
+    cp_files = sorted(set(f for g in cp_globs for f in glob.glob(g)))
+    if not polar_files and not cp_files:
+        raise FileNotFoundError("no XFOIL reference files match %s or %s" % (polar_globs, cp_globs))
+    sources = json.dumps([[f] + FileSignature(f) for f in polar_files + cp_files])
+
+    if os.path.exists(path):
+        try:
+            db = LoadReferenceDB(path)
+        except (OSError, ValueError, zipfile.BadZipFile):
+            db = {}
+        # a database from before the pressure drag column was added is rebuilt too
+        if 'sources' in db and str(db['sources']) == sources and db['polar'].shape[-1] == len(polar_columns):
+            return db
+
+    db = BuildReferenceDB(polar_files, cp_files)
+    db['sources'] = np.array(sources)
+    SaveReferenceDB(db, path)
+    return db
+
+
+# QUERIES
+#####################
+def GridInterp(axes: list, grid: np.array, points: list, clamp: list=None):
+    '''
+    Returns the multilinear interpolation of a gridded table at any number of points.
+
+    Parameters:
+    -----------
+    axes : list
+        ascending grid points of each leading axis of grid
+    grid : np.array (n1, ..., nk, ...)
+        table, any trailing axes are carried along
+    points : list
+        coordinate along each axis, arrays broadcast against each other
+    clamp : list, optional
+        per axis, True to hold the end values outside the grid instead of returning NaN
+
+    Returns:
+    --------
+    f: np.array (broadcast shape of points, trailing axes of grid)
+        corners of the cell without a value (e.g. an AoA one Re did not converge at) are left out and the
+        weights of the others renormalized, NaN only where no weighted corner has a value
+    '''
+    clamp = clamp or [False]*len(axes)
+    points = np.broadcast_arrays(*[np.asarray(p, dtype=np.float64) for p in points])
+    trail = (None,)*(grid.ndim - len(axes))
+
+    idx, wts, inside = [], [], np.ones(points[0].shape, dtype=bool)
+    for ax, p, cl in zip(axes, points, clamp):
+        if len(ax) == 1:
+            k, t = np.zeros(p.shape, dtype=np.int64), np.zeros(p.shape)
+            inside &= cl | (p == ax[0])
+        else:
+            k = np.clip(np.searchsorted(ax, p, side='right') - 1, 0, len(ax) - 2)
+            t = (p - ax[k])/(ax[k + 1] - ax[k])
+            if cl:
+                t = np.clip(t, 0, 1)
+            else:
+                inside &= (p >= ax[0]) & (p <= ax[-1])
+        idx.append(k)
+        wts.append(t)
+
+    # sum over the 2^k corners of each cell, corners with no weight or no value skipped so NaN neighbours don't leak in
+    f, w_sum = 0, 0
+    for corner in np.ndindex(*(2,)*len(axes)):
+        w = np.ones(points[0].shape)
+        sel = []
+        for k, t, b, ax in zip(idx, wts, corner, axes):
+            w = w*(t if b else 1 - t)
+            sel.append(np.minimum(k + b, len(ax) - 1))
+        v = grid[tuple(sel)]
+        w = np.where((w[(...,) + trail] > 0) & np.isfinite(v), w[(...,) + trail], 0)
+        f = f + np.where(w > 0, w*v, 0)
+        w_sum = w_sum + w
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(inside[(...,) + trail] & (w_sum > 0), f/w_sum, np.nan)
+
+def QueryPolarDB(db: dict, Re: np.array, alpha: np.array):
+    '''
+    Returns the reference coefficients at any (Re, alpha), bilinear in (log Re, alpha).
+    Outside the Re range the nearest Re is used, outside the AoA range the values are NaN.
+
+    Parameters:
+    -----------
+    db : dict
+        reference database (see BuildReferenceDB)
+    Re : np.array
+        Reynolds numbers
+    alpha : np.array
+        AoAs (degrees), broadcast against Re
+
+    Returns:
+    --------
+    ref: dict of 'Cl', 'Cd', 'Cdt', 'Cm' (see polar_columns) -> np.array
+    '''
+    f = GridInterp([np.log(db['Re']), db['alpha']], db['polar'], [np.log(Re), alpha], [True, False])
+    return {q: f[..., i] for i, q in enumerate(polar_columns)}
+
+def QueryCpDB(db: dict, Re: np.array, alpha: np.array, x: np.array, surface: int=0):
+    '''
+    Returns the reference Cp at any (Re, alpha, x/c), trilinear in (log Re, alpha, x/c).
+    Outside the Re range the nearest Re is used, outside the AoA range the values are NaN.
+
+    Parameters:
+    -----------
+    db : dict
+        reference database (see BuildReferenceDB)
+    Re : np.array
+        Reynolds numbers
+    alpha : np.array
+        AoAs (degrees)
+    x : np.array
+        x/c, all three broadcast against each other
+    surface : int, optional
+        0 for the top surface, 1 for the bottom
+
+    Returns:
+    --------
+    Cp: np.array
+    '''
+    return GridInterp([np.log(db['Re']), db['alpha'], db['x']], db['Cp'][:, :, surface], [np.log(Re), alpha, x], [True, False, False])
@@ -0,0 +1,166 @@
+"""
+Functions related to comparing the measurements with the XFOIL and UIUC reference data,
+    residuals normalized by the measurement uncertainty for whole sweeps and many runs at once
+    {Depenancies}: numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+
+# Custom Functions/libraies
+from Graphing import XfoilPolar, UIUCPolar
+
+
+def BatchInterp(xp: np.array, fp: np.array, x: np.array):
+    '''
+    Returns the linear interpolation of many curves at once, NaN outside each curve.
+
+    Parameters:
+    -----------
+    xp : np.array (B, n)
+        ascending points of each curve (pad short curves with NaN at the end)
+    fp : np.array (B, n)
+        values of each curve
+    x : np.array (B, m)
+        points to interpolate each curve at
+
+    Returns:
+    --------
+    f: np.array (B, m)
+    '''
+    xp = np.asarray(xp, dtype=np.float64)
+    fp = np.asarray(fp, dtype=np.float64)
+    x = np.asarray(x, dtype=np.float64)
+    n = np.sum(np.isfinite(xp), axis=-1)
+
+    # every curve shifted into its own band, so one search covers all of them
+    lo = np.nanmin(xp)
+    span = np.nanmax(xp) - lo + 1
+    rows = np.arange(len(xp))[:, None]
+    flat = np.where(np.isfinite(xp), xp - lo, span - 0.5) + rows*span
+    g = np.searchsorted(flat.ravel(), (np.clip(x - lo, 0, span - 1) + rows*span).ravel(), side='right').reshape(x.shape) - 1
+    k = np.clip(g - rows*xp.shape[1], 0, np.maximum(n - 2, 0)[:, None])
+
+    x0 = np.take_along_axis(xp, k, axis=-1)
+    x1 = np.take_along_axis(xp, k + 1, axis=-1)
+    f0 = np.take_along_axis(fp, k, axis=-1)
+    f1 = np.take_along_axis(fp, k + 1, axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        f = f0 + (f1 - f0)*(x - x0)/(x1 - x0)
+
+    inside = (x >= xp[:, :1]) & (x <= np.take_along_axis(xp, np.maximum(n - 1, 0)[:, None], axis=-1)) & (n[:, None] > 1)
+    return np.where(inside, f, np.nan)
+
+def _Pad(curves: list):
+    # ragged (x, y) curves stacked into NaN padded arrays
+    n = max([len(x) for x, _ in curves] + [2])
+    xp = np.full((len(curves), n), np.nan)
+    fp = np.full((len(curves), n), np.nan)
+    for i, (x, y) in enumerate(curves):
+        xp[i, :len(x)] = x
+        fp[i, :len(y)] = y
+    return xp, fp
+
+def ReferencePolar(alpha: np.array):
+    '''
+    Returns the XFOIL and UIUC coefficients at the tested AoAs, NaN outside their range.
+
+    Parameters:
+    -----------
+    alpha : np.array
+        AoAs (degrees)
+
+    Returns:
+    --------
+    ref: dict of source ('XFOIL', 'UIUC') -> dict of 'Cl', 'Cd', 'Cdt', 'Cm' -> np.array (AoA)
+        Cd is the pressure drag, as integrated from the taps, and Cdt the total drag, as found from the wake.
+        UIUC only measured the wake, so its Cd is NaN
+    '''
+    xa, xcl, xcd, xcdp, xcm = (np.array(v) for v in XfoilPolar())
+    ua, ucl2, ucd, ual, ucl, uam, ucm = (np.array(v) for v in UIUCPolar())
+
+    curves = [(xa, xcl), (xa, xcdp), (xa, xcd), (xa, xcm), (ual, ucl), (ua, ucd), (uam, ucm)]
+    order = [np.argsort(x) for x, _ in curves]
+    xp, fp = _Pad([(x[o], y[o]) for (x, y), o in zip(curves, order)])
+    f = BatchInterp(xp, fp, np.broadcast_to(np.asarray(alpha, dtype=np.float64), (len(curves), len(alpha))))
+
+    return {'XFOIL': dict(zip(('Cl', 'Cd', 'Cdt', 'Cm'), f[:4])),
+            'UIUC': dict(zip(('Cl', 'Cd', 'Cdt', 'Cm'), (f[4], np.full(len(alpha), np.nan), f[5], f[6])))}
+
+def NormResiduals(x: np.array, dx: np.array, ref: np.array, ref_err: np.array=0):
+    '''
+    Returns the residuals from the reference in units of the combined uncertainty.
+
+    Parameters:
+    -----------
+    x : np.array
+        measured values, any shape (runs, AoA, ports...)
+    dx : np.array
+        their uncertainties
+    ref : np.array
+        reference values, broadcast against x
+    ref_err : np.array, optional
+        reference uncertainties (e.g. a model discrepancy allowance)
+
+    Returns:
+    --------
+    z: np.array, NaN where either side is missing or the uncertainty is not positive
+    '''
+    var = np.asarray(dx, dtype=np.float64)**2 + np.asarray(ref_err, dtype=np.float64)**2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (np.asarray(x) - ref)/np.sqrt(var)
+    return np.where(var > 0, z, np.nan)
+
+def ResidualStats(z: np.array, axis=None):
+    '''
+    Returns the chi-square statistics of normalized residuals over the given axes, missing values skipped.
+
+    Parameters:
+    -----------
+    z : np.array
+        normalized residuals (see NormResiduals)
+    axis : int or tuple, optional
+        axes to reduce, e.g. the AoA axis for the bias of every port
+
+    Returns:
+    --------
+    stats: dict with
+        'chi2': sum of z^2
+        'n': number of residuals
+        'red_chi2': chi2/n
+        'bias': mean z (a consistent offset from the reference)
+        'bias_err': its standard error, 1/sqrt(n) for unit variance residuals
+    '''
+    ok = np.isfinite(z)
+    z0 = np.where(ok, z, 0)
+    n = np.sum(ok, axis=axis)
+    chi2 = np.sum(z0**2, axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {'chi2': chi2, 'n': n, 'red_chi2': chi2/n, 'bias': np.sum(z0, axis=axis)/n, 'bias_err': 1/np.sqrt(n)}
+
+def RankRuns(names: list, polars: np.array, ref: dict, quantities: tuple=('Cl', 'Cd', 'Cdt', 'Cm')):
+    '''
+    Returns the runs ordered by their agreement with a reference polar, all runs compared at once.
+
+    Parameters:
+    -----------
+    names : list
+        run names
+    polars : np.array (structured, see PolarRecord) (runs, AoA)
+        polar of every run on the same AoAs, with Cm about the quarter chord as in the references
+    ref : dict
+        reference coefficients at those AoAs (one source of ReferencePolar)
+    quantities : tuple, optional
+        coefficients compared, those the reference lacks (NaN) are skipped
+
+    Returns:
+    --------
+    ranking: list of (run name, reduced chi^2, number of residuals), best agreement first
+    z: dict of coefficient -> np.array (runs, AoA) normalized residuals
+    '''
+    z = {q: NormResiduals(polars[q], polars['d' + q], ref[q][None, :]) for q in quantities}
+    stats = ResidualStats(np.stack([z[q] for q in quantities], axis=-1), axis=(1, 2))
+
+    order = np.argsort(np.where(np.isfinite(stats['red_chi2']), stats['red_chi2'], np.inf), kind='stable')
+    return [(names[i], float(stats['red_chi2'][i]), int(stats['n'][i])) for i in order], z
@@ -0,0 +1,335 @@
+"""
+Functions related to the results index, the CSV results of every campaign loaded once into arrays indexed
+    by (campaign, AoA, port), kept up to date as runs are written and queried locally over HTTP
+    {Depenancies}: numpy, pandas
+"""
+# IMPORTS
+#####################
+# Dependancies
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+import threading
+import glob
+import json
+import time
+import os
+
+# Custom Functions/libraies
+from Aggregate import LoadRun, polar_quantities
+from Checkpoint import FileSignature
+
+
+# INDEX
+#####################
+def RunSignature(path: str):
+    '''
+    Returns a cheap signature of a run folder, changes whenever one of its CSVs is written.
+
+    Parameters:
+    -----------
+    path : str
+        run folder
+
+    Returns:
+    --------
+    sig: sorted list of [file name, modification time (ns), size (bytes)]
+    '''
+    return sorted([name] + FileSignature(os.path.join(path, name)) for name in os.listdir(path) if name.endswith('.csv'))
+
+def _Stack(by_aoa: dict, alpha: np.array, k: int):
+    # per AoA rows of LoadRun stacked into (AoA, ports), NaN where missing
+    rows = [by_aoa[a][k] if a in by_aoa else None for a in alpha]
+    out = np.full((len(alpha), max([len(r) for r in rows if r is not None] + [0])), np.nan)
+    for i, r in enumerate(rows):
+        if r is not None:
+            out[i, :len(r)] = r
+    return out
+
+def _Table(path: str, name: str, alpha: np.array):
+    # optional per AoA CSV, one row per AoA in the order of alpha
+    name = os.path.join(path, name)
+    return pd.read_csv(name, index_col=0).reindex(alpha) if os.path.exists(name) else None
+
+def LoadCampaign(path: str, sig: list=None):
+    '''
+    Returns the results of one run folder (a copy of data\\CSV) as arrays, one row per AoA.
+
+    Parameters:
+    -----------
+    path : str
+        run folder (see LoadRun)
+    sig : list, optional
+        its signature, found when not given (see RunSignature)
+
+    Returns:
+    --------
+    campaign: dict with
+        'alpha': np.array (AoA) ascending
+        'arrays': dict of name -> np.array (AoA) or (AoA, ports), NaN where not recorded
+        'quantities': dict of quantity -> names of its arrays
+        'sig': signature the arrays were loaded at
+    '''
+    sig = RunSignature(path) if sig is None else sig
+    run = LoadRun(path)
+    alpha = np.array(sorted(run['Cl']), dtype=np.float64)
+
+    arrays = {}
+    for q in polar_quantities:
+        arrays[q] = _Stack(run[q], alpha, 0)[:, 0]
+        arrays['d' + q] = _Stack(run[q], alpha, 1)[:, 0]
+    arrays['p'] = _Stack(run['p_airfoil'], alpha, 0)
+    arrays['dP'] = _Stack(run['p_airfoil'], alpha, 1)
+    arrays['y'] = _Stack(run['y_rake'], alpha, 0)
+    arrays['p_rake'] = _Stack(run['p_rake'], alpha, 0)
+    arrays['dp_rake'] = _Stack(run['p_rake'], alpha, 1)
+    quantities = {'polar': [n for q in polar_quantities for n in (q, 'd' + q)], 'pressure': ['p', 'dP'],
+                  'wake': ['y', 'p_rake', 'dp_rake']}
+
+    Cp = _Table(path, 'Cp.csv', alpha)
+    if Cp is not None:
+        arrays['Cp'] = Cp[[n for n in Cp.columns if n.startswith('Cp ')]].to_numpy(dtype=np.float64)
+        arrays['dCp'] = Cp[[n for n in Cp.columns if n.startswith('dCp ')]].to_numpy(dtype=np.float64)
+        quantities['Cp'] = ['Cp', 'dCp']
+    for quantity, name in (('wakefit', 'Wake_Fit.csv'), ('moments', 'Moments.csv')):
+        table = _Table(path, name, alpha)
+        if table is not None:
+            for n in table.columns:
+                arrays[n] = table[n].to_numpy(dtype=np.float64)
+            quantities[quantity] = list(table.columns)
+
+    return {'alpha': alpha, 'arrays': arrays, 'quantities': quantities, 'sig': sig}
+
+def FindCampaigns(runs_glob: str=".\data\Runs\*", current: str=".\data\CSV"):
+    '''
+    Returns every campaign with results: the run folders (see campaign.py) and the latest main.py results.
+
+    Parameters:
+    -----------
+    runs_glob : str, optional
+        run folders
+    current : str, optional
+        folder main.py writes to, indexed as 'current'
+
+    Returns:
+    --------
+    campaigns: dict of campaign name -> folder
+    '''
+    campaigns = {os.path.basename(r): r for r in sorted(glob.glob(runs_glob)) if os.path.isfile(os.path.join(r, 'Polar.csv'))}
+    if os.path.isfile(os.path.join(current, 'Polar.csv')):
+        campaigns['current'] = current
+    return campaigns
+
+def UpdateIndex(index: dict, campaigns: dict):
+    '''
+    Returns the index with only the campaigns whose files changed reloaded.
+    The given index is left as it is, so queries still running on it are unaffected.
+    A campaign that fails to load (e.g. a CSV being written) keeps its previous arrays and is retried next time.
+
+    Parameters:
+    -----------
+    index : dict
+        campaign name -> campaign (see LoadCampaign), empty to build it
+    campaigns : dict
+        campaign name -> folder (see FindCampaigns)
+
+    Returns:
+    --------
+    index: the updated index, campaigns no longer listed left out
+    changed: names of the campaigns (re)loaded
+    '''
+    new, changed = {}, []
+    for name, path in campaigns.items():
+        try:
+            sig = RunSignature(path)
+            if name in index and index[name]['sig'] == sig:
+                new[name] = index[name]
+                continue
+            new[name] = LoadCampaign(path, sig)
+            changed.append(name)
+        except (OSError, ValueError, KeyError):
+            if name in index:
+                new[name] = index[name]
+
+    return new, changed
+
+
+# QUERIES
+#####################
+def _Json(x: np.array):
+    # NaN is not valid JSON, missing values are sent as null
+    x = np.asarray(x, dtype=np.float64)
+    return np.where(np.isfinite(x), x, None).tolist()
+
+def QueryIndex(index: dict, query: dict):
+    '''
+    Returns one quantity of one campaign at the requested AoAs and ports.
+
+    Parameters:
+    -----------
+    index : dict
+        results index (see UpdateIndex)
+    query : dict with
+        'campaign': campaign name, defaults to 'current'
+        'quantity': 'polar', 'pressure', 'Cp', 'wake', 'wakefit' or 'moments', defaults to 'polar'
+        'alpha': AoAs, all by default (AoAs not recorded are returned as null)
+        'ports': ports numbered from 1 as in the CSVs, all by default (ignored by per AoA quantities)
+
+    Returns:
+    --------
+    result: dict of 'campaign', 'quantity', 'alpha', 'ports' and 'values' (array name -> nested lists)
+    '''
+    name = query.get('campaign', 'current')
+    if name not in index:
+        raise KeyError("unknown campaign: %s" % name)
+    camp = index[name]
+    quantity = query.get('quantity', 'polar')
+    if quantity not in camp['quantities']:
+        raise KeyError("no %s results for campaign %s" % (quantity, name))
+
+    alpha = camp['alpha'] if query.get('alpha') is None else np.atleast_1d(np.asarray(query['alpha'], dtype=np.float64))
+    if not len(camp['alpha']):
+        raise KeyError("campaign %s has no AoAs" % name)
+    rows = np.clip(np.searchsorted(camp['alpha'], alpha), 0, len(camp['alpha']) - 1)
+    found = camp['alpha'][rows] == alpha
+
+    ports = query.get('ports')
+    values = {}
+    for n in camp['quantities'][quantity]:
+        x = camp['arrays'][n]
+        if x.ndim > 1 and ports is not None:
+            cols = np.atleast_1d(np.asarray(ports, dtype=np.int64)) - 1
+            if np.any((cols < 0) | (cols >= x.shape[1])):
+                raise ValueError("%s has ports 1 to %d" % (n, x.shape[1]))
+            x = x[:, cols]
+        x = x[rows]
+        values[n] = _Json(np.where(found.reshape((-1,) + (1,)*(x.ndim - 1)), x, np.nan))
+
+    return {'campaign': name, 'quantity': quantity, 'alpha': alpha.tolist(),
+            'ports': None if ports is None else np.atleast_1d(ports).tolist(), 'values': values}
+
+def BatchQuery(index: dict, queries: list):
+    '''
+    Returns the results of many queries on the same version of the index.
+
+    Parameters:
+    -----------
+    index : dict
+        results index (see UpdateIndex)
+    queries : list
+        queries (see QueryIndex)
+
+    Returns:
+    --------
+    results: list, one result per query, {'error': message} for a query that failed
+    '''
+    results = []
+    for query in queries:
+        try:
+            results.append(QueryIndex(index, query))
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
+            results.append({'error': str(e.args[0]) if e.args else repr(e)})
+    return results
+
+def IndexSummary(index: dict):
+    '''
+    Returns the campaigns in the index, with their AoAs and quantities.
+
+    Parameters:
+    -----------
+    index : dict
+        results index (see UpdateIndex)
+
+    Returns:
+    --------
+    summary: dict of campaign name -> {'alpha': AoAs, 'quantities': quantity -> array names}
+    '''
+    return {name: {'alpha': camp['alpha'].tolist(), 'quantities': camp['quantities']} for name, camp in index.items()}
+
+
+# SERVICE
+#####################
+def ResultsServer(campaigns, host: str='127.0.0.1', port: int=8303, poll: float=2.0):
+    '''
+    Returns a local HTTP server answering queries on the results index, started with serve_forever().
+    A background thread rescans the campaigns every poll seconds and reloads only those that changed
+    (a failed rescan is reported and retried), each request is answered from one version of the index.
+
+        GET  /campaigns                                               IndexSummary
+        GET  /query?campaign=run01&quantity=Cp&alpha=4,6&ports=1,2    QueryIndex
+        POST /batch   (JSON list of queries)                          BatchQuery
+
+    Parameters:
+    -----------
+    campaigns : function
+        campaigns() returning campaign name -> folder (e.g. FindCampaigns)
+    host : str, optional
+        address to listen on, local only by default
+    port : int, optional
+        port to listen on
+    poll : float, optional
+        s between rescans
+
+    Returns:
+    --------
+    server: ThreadingHTTPServer, server.index() returns the current index
+    '''
+    state = {'index': UpdateIndex({}, campaigns())[0]}
+
+    def refresh():
+        # an error in one rescan (e.g. the runs folder briefly unreadable) must not stop the reloads,
+        # the current index is kept and the next rescan tries again
+        while True:
+            time.sleep(poll)
+            try:
+                state['index'], changed = UpdateIndex(state['index'], campaigns())
+            except Exception as e:
+                print("Rescan failed, keeping the current index: %r" % e)
+                continue
+            if changed:
+                print("Reloaded:", ", ".join(changed))
+
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, code, body):
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            index = state['index']
+            if url.path == '/campaigns':
+                return self.reply(200, IndexSummary(index))
+            if url.path != '/query':
+                return self.reply(404, {'error': "unknown path: %s" % url.path})
+            query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                for k, kind in (('alpha', float), ('ports', int)):
+                    if k in query:
+                        query[k] = [kind(v) for v in query[k].split(',')]
+                self.reply(200, QueryIndex(index, query))
+            except (KeyError, ValueError) as e:
+                self.reply(400, {'error': str(e.args[0]) if e.args else repr(e)})
+
+        def do_POST(self):
+            if urlparse(self.path).path != '/batch':
+                return self.reply(404, {'error': "unknown path: %s" % self.path})
+            try:
+                queries = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                if not isinstance(queries, list):
+                    raise ValueError("expected a JSON list of queries")
+            except ValueError as e:
+                return self.reply(400, {'error': str(e)})
+            self.reply(200, BatchQuery(state['index'], queries))
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.index = lambda: state['index']
+    threading.Thread(target=refresh, daemon=True).start()
+    return server
@@ -0,0 +1,188 @@
+"""
+Functions for evaluating the whole calibration -> velocity -> force -> coefficient
+    chain over a grid of parameter values in one vectorized pass
+    {Depenancies}: numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+
+# Custom Functions/libraies
+from Forces import ResultantWeights, SurfaceResultants, MomentAbout
+from PortHealth import RepairPorts
+from Kernels import MomentumDeficit, Interleave
+from Velocity import rake_pos
+import Config
+
+
+# nominal parameter values, the calibration, chord and AoA uncertainty of the campaign (Config.py)
+# and the densities used by Velocity, DynPressure and TotalDrag
+sweep_defaults = {'gain': float(Config.gain), 'offset': float(Config.offset), 'rho_vel': 1.225, 'rho_dyn': 1.293, 'rho_drag': 1.29,
+                  'c': float(Config.c), 'dalpha': float(Config.dalpha)}
+
+
+def _Chain(raw: dict, err: dict, W: np.array, alpha: np.array, y_0: np.array, dir: np.array, air_bad: np.array, rake_bad: np.array, prm: dict, Hg2Pa: float, gain_ref: float):
+    # every parameter has shape (P, 1, 1), the AoAs run along axis 1 and the ports along axis 2
+    gain, offset = prm['gain'], prm['offset']
+    scale = gain/gain_ref
+
+    # calibration
+    p_a = (raw['p_airfoil']*gain + offset)*Hg2Pa
+    p_r1 = (raw['p_rake1']*gain + offset)*Hg2Pa
+    p_r2 = (raw['p_rake2']*gain + offset)*Hg2Pa
+    e_a = err['dP_a']*scale
+    e_r1 = err['dP_r1']*scale
+    e_r2 = err['dP_r2']*scale
+
+    # velocity
+    v_r1 = RepairPorts(np.sqrt(2*p_r1/prm['rho_vel']), rake_bad)
+    v_r2 = RepairPorts(np.sqrt(2*p_r2/prm['rho_vel']), rake_bad)
+    U_inf = 0.25*(v_r1[..., 1] + v_r1[..., -2] + v_r2[..., 1] + v_r2[..., -2])
+    v_r1_err = 0.5*U_inf[..., None]*e_r1/p_r1
+    v_r2_err = 0.5*U_inf[..., None]*e_r2/p_r2
+    U_inf_err = 0.5*np.sqrt(v_r1_err[..., 1]**2 + v_r1_err[..., -2]**2 + v_r2_err[..., 1]**2 + v_r2_err[..., -2]**2)
+
+    # merging the rake positions, lower one first
+    pos_r1 = y_0[:, None] + rake_pos
+    pos_r2 = (y_0 + np.asarray(dir)*0.5)[:, None] + rake_pos
+    r1_first = (pos_r1[:, 0] < pos_r2[:, 0])[:, None]
+    V_pos = np.sort(np.concatenate((pos_r1, pos_r2), axis=-1), axis=-1)
+    V_r = np.where(r1_first, Interleave(v_r1, v_r2), Interleave(v_r2, v_r1))
+    V_r_err = np.where(r1_first, Interleave(v_r1_err, v_r2_err), Interleave(v_r2_err, v_r1_err))
+
+    # dynamic pressure
+    q_inf = 0.5*prm['rho_dyn'][..., 0]*U_inf**2
+    q_inf_err = prm['rho_dyn'][..., 0]*U_inf*U_inf_err
+
+    # total drag from the wake momentum deficit, linear in the density
+    Dt, Dt_err = MomentumDeficit(V_pos/100, V_r, V_r_err, U_inf, U_inf_err, 1.0)
+    Dt, Dt_err = prm['rho_drag'][..., 0]*Dt, prm['rho_drag'][..., 0]*np.sqrt(Dt_err)
+
+    # surface integration on the unit chord geometry, the forces scale with c and the moment with c^2
+    c = prm['c'][..., 0]
+    p_a = np.concatenate((RepairPorts(p_a[..., 0:12], air_bad[0:12]), RepairPorts(p_a[..., 12:19], air_bad[12:19])), axis=-1)
+    F, F_cov = SurfaceResultants(p_a, e_a, W)
+    N, dN = c*F[..., 0], c*np.sqrt(F_cov[..., 0, 0])
+    A, dA = c*F[..., 1], c*np.sqrt(F_cov[..., 1, 1])
+    M, dM = (c**2*m[..., 0] for m in MomentAbout(F, F_cov, 0))
+
+    # lift and pressure drag
+    a = np.deg2rad(alpha)
+    da = np.deg2rad(prm['dalpha'][..., 0])
+    L = N*np.cos(a) - A*np.sin(a)
+    dL = np.sqrt((np.cos(a)*dN)**2 + (np.sin(a)*dA)**2 + ((-N*np.sin(a) - A*np.cos(a))*da)**2)
+    D = N*np.sin(a) + A*np.cos(a)
+    dD = np.sqrt((np.sin(a)*dN)**2 + (np.cos(a)*dA)**2 + ((N*np.cos(a) - A*np.sin(a))*da)**2)
+
+    # coefficients
+    out = {'U_inf': U_inf, 'q_inf': q_inf}
+    for name, F, dF, ref in (('Cl', L, dL, c), ('Cd', D, dD, c), ('Cm', M, dM, c**2), ('Cdt', Dt, Dt_err, c)):
+        out[name] = F/(q_inf*ref)
+        out['d' + name] = np.sqrt((dF/(q_inf*ref))**2 + (q_inf_err*F/(q_inf**2*ref))**2)
+
+    return out
+
+def ParameterSweep(raw: dict, err: dict, airfoil_top: np.array, airfoil_bot: np.array, alpha: np.array, y_0: np.array, dir: np.array, air_bad: np.array=None, rake_bad: np.array=None, Hg2Pa: float=Config.Hg2Pa, gain_ref: float=Config.gain, chunk: int=4096, **params):
+    '''
+    Returns the polar evaluated over the full grid of the given parameter values.
+    Every parameter that is not given is held at its nominal value (sweep_defaults).
+
+    Parameters:
+    -----------
+    raw : dict
+        uncalibrated mean readings, 'p_airfoil' (AoA x 19), 'p_rake1' and 'p_rake2' (AoA x 17)
+    err : dict
+        pressure uncertainties in Pa at gain_ref, 'dP_a' (AoA x 19), 'dP_r1' and 'dP_r2' (AoA x 17)
+    airfoil_top : np.array
+        top airfoil pressure tap positions [x; y] per unit chord
+    airfoil_bot : np.array
+        bottom airfoil pressure tap positions [x; y] per unit chord
+    alpha : np.array
+        AoA values (degrees)
+    y_0 : np.array
+        inital position of the bottom rake port for each AoA (cm)
+    dir : np.array
+        direction the rake was moved for each AoA (-1 = down 1 = up)
+    air_bad : np.array, optional
+        boolean mask of faulty airfoil ports (see PortHealth)
+    rake_bad : np.array, optional
+        boolean mask of faulty rake ports (see PortHealth)
+    Hg2Pa : float, optional
+        inHg to Pa convertion factor
+    gain_ref : float, optional
+        calibration gain the uncertainties in err were calculated with (errorcalcs.py uses the one in Config.py)
+    chunk : int, optional
+        number of grid points evaluated at once, bounds the memory use
+    **params : float or np.array
+        values of any of gain, offset, rho_vel, rho_dyn, rho_drag, c (m), dalpha (deg)
+
+    Returns:
+    --------
+    cube: dict with 'dims' (swept parameter names then 'alpha'), 'coords' (their values)
+          and U_inf, q_inf, Cl, dCl, Cd, dCd, Cm, dCm, Cdt, dCdt, each of shape
+          (len of each swept parameter..., len(alpha))
+    '''
+    unknown = set(params) - set(sweep_defaults)
+    if unknown:
+        raise KeyError("unknown sweep parameters: %s" % sorted(unknown))
+
+    alpha = np.asarray(alpha, dtype=np.float64)
+    if air_bad is None:
+        air_bad = np.zeros(19, dtype=bool)
+    if rake_bad is None:
+        rake_bad = np.zeros(17, dtype=bool)
+
+    raw = {k: np.asarray(raw[k], dtype=np.float64)[None] for k in ('p_airfoil', 'p_rake1', 'p_rake2')}
+    err = {k: np.asarray(err[k], dtype=np.float64)[None] for k in ('dP_a', 'dP_r1', 'dP_r2')}
+    W = ResultantWeights(airfoil_top, airfoil_bot)
+    y_0 = np.asarray(y_0, dtype=np.float64)
+
+    # flattened outer grid of the swept parameters
+    names = [k for k in sweep_defaults if k in params]
+    coords = {k: np.atleast_1d(np.asarray(params[k], dtype=np.float64)) for k in names}
+    shape = tuple(len(coords[k]) for k in names)
+    grid = dict(zip(names, (g.ravel() for g in np.meshgrid(*[coords[k] for k in names], indexing='ij'))))
+    P = int(np.prod(shape))
+
+    cube = None
+    for s in range(0, P, chunk):
+        n = min(chunk, P - s)
+        prm = {k: (grid[k][s:s+n] if k in grid else np.full(n, v))[:, None, None] for k, v in sweep_defaults.items()}
+        out = _Chain(raw, err, W, alpha, y_0, dir, air_bad, rake_bad, prm, Hg2Pa, gain_ref)
+        if cube is None:
+            cube = {k: np.empty((P, len(alpha))) for k in out}
+        for k, v in out.items():
+            cube[k][s:s+n] = v
+
+    cube = {k: v.reshape(shape + (len(alpha),)) for k, v in cube.items()}
+    cube['dims'] = tuple(names) + ('alpha',)
+    cube['coords'] = dict(coords, alpha=alpha)
+
+    return cube
+
+def SweepMismatch(cube: dict, polar, quantities: tuple=('Cl', 'Cd', 'Cm', 'Cdt')):
+    '''
+    Returns the largest difference between an unswept ParameterSweep and a polar from the full chain of main.py
+    on the same recordings, uncertainties and port masks. _Chain repeats that chain vectorized, so any
+    difference beyond rounding means the two have drifted apart.
+
+    Parameters:
+    -----------
+    cube : dict
+        ParameterSweep result with no swept parameters (nominal values)
+    polar : np.array (structured, see PolarRecord) or pd.DataFrame
+        polar written by main.py, with the same AoAs
+    quantities : tuple, optional
+        coefficients compared, with their uncertainties
+
+    Returns:
+    --------
+    mismatch: dict of coefficient -> largest absolute difference over the AoAs
+    '''
+    if cube['dims'] != ('alpha',):
+        raise ValueError("the mismatch is only defined at the nominal point, got a sweep over %s" % (cube['dims'][:-1],))
+    if not np.array_equal(np.asarray(polar['alpha'], dtype=np.float64), cube['coords']['alpha']):
+        raise ValueError("the polar and the sweep are not on the same AoAs")
+
+    return {q: float(np.max(np.abs(np.asarray(polar[q], dtype=np.float64) - cube[q]))) for q in quantities + tuple('d' + q for q in quantities)}
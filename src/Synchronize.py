@@ -0,0 +1,140 @@
+"""
+Functions related to resampling the airfoil and rake channel groups
+    onto a common time grid so they can be compared sample by sample
+    {Depenancies}: numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+
+
+def CommonClock(times: list, dt: float=None):
+    '''
+    Returns a uniform time grid covering the span shared by all channel groups.
+
+    Parameters:
+    -----------
+    times : list
+        time bases of each channel group (e.g. sptime, wptime1, wptime2)
+    dt : float, optional
+        grid spacing (s), defaults to the coarsest sample spacing of the groups
+
+    Returns:
+    --------
+    grid: common time grid (s)
+    '''
+    times = [np.ravel(t) for t in times]
+    t0 = max(t[0] for t in times)
+    t1 = min(t[-1] for t in times)
+    if t1 <= t0:
+        raise ValueError("channel groups do not overlap in time")
+    if dt is None:
+        dt = max(np.median(np.diff(t[:1000])) for t in times)
+
+    n = int(np.floor((t1 - t0)/dt + 1e-9)) + 1
+    return t0 + dt*np.arange(n)
+
+def InterpWeights(t: np.array, grid: np.array):
+    '''
+    Returns the left sample index and linear weight of every grid point,
+    found with a single vectorized searchsorted over the sorted time base.
+
+    Parameters:
+    -----------
+    t : np.array
+        sorted time base of a channel group (s)
+    grid : np.array
+        time points to resample to (s)
+
+    Returns:
+    --------
+    idx: index of the sample at or before each grid point
+    w: weight of the following sample (0 to 1)
+    '''
+    idx = np.clip(np.searchsorted(t, grid, side='right') - 1, 0, len(t) - 2)
+    w = (grid - t[idx])/(t[idx+1] - t[idx])
+
+    return idx, np.clip(w, 0, 1)
+
+def Resample(t: np.array, x: np.array, grid: np.array):
+    '''
+    Returns all channels of a group linearly interpolated onto the grid.
+    Only the samples bracketing the grid are read, so x may be a memory
+    mapped or otherwise lazily loaded array.
+
+    Parameters:
+    -----------
+    t : np.array
+        sorted time base of the channel group (s)
+    x : np.array (2D)
+        channel data where each row is a different channel
+    grid : np.array
+        time points to resample to (s)
+
+    Returns:
+    --------
+    x_grid: resampled channel data, one row per channel
+    '''
+    t = np.ravel(t)
+    # restricting the search to the stretch of the recording spanned by the grid
+    lo = max(np.searchsorted(t, grid[0], side='right') - 1, 0)
+    hi = min(np.searchsorted(t, grid[-1], side='left') + 1, len(t) - 1)
+    lo = min(lo, hi - 1)
+
+    idx, w = InterpWeights(t[lo:hi+1], grid)
+    x0 = x[:, lo + idx]
+    x1 = x[:, lo + idx + 1]
+
+    return x0 + (x1 - x0)*w
+
+def SyncChunks(groups: list, grid: np.array, chunk: int=65536):
+    '''
+    Yields the channel groups resampled onto consecutive chunks of the grid.
+
+    Parameters:
+    -----------
+    groups : list
+        (time base, channel data) pair of each channel group
+    grid : np.array
+        common time grid (s), see CommonClock
+    chunk : int, optional
+        number of grid points per chunk
+
+    Returns:
+    --------
+    t: grid points of the chunk
+    x: list with the resampled data of each group for the chunk
+    '''
+    for s in range(0, len(grid), chunk):
+        t = grid[s:s+chunk]
+        yield t, [Resample(t_g, x_g, t) for t_g, x_g in groups]
+
+def SyncRecording(data: dict, dt: float=None, chunk: int=65536):
+    '''
+    Yields the airfoil and both rake position recordings of one .mat file
+    resampled onto their common time grid in chunks.
+
+    Parameters:
+    -----------
+    data : dict
+        recording as loaded by io.loadmat
+    dt : float, optional
+        grid spacing (s), defaults to the coarsest sample spacing
+    chunk : int, optional
+        number of grid points per chunk
+
+    Returns:
+    --------
+    t: grid points of the chunk
+    sp: airfoil tap channels on the grid (19 rows)
+    wp1: rake position 1 channels on the grid (17 rows)
+    wp2: rake position 2 channels on the grid (17 rows)
+    '''
+    groups = [(data['sptime'], data['spdata']),
+              (data['wptime1'], data['wpdata'][:17]),
+              (data['wptime2'], data['wpdata2'][:17])]
+    grid = CommonClock([g[0] for g in groups], dt)
+
+    for t, (sp, wp1, wp2) in SyncChunks(groups, grid, chunk):
+        yield t, sp, wp1, wp2
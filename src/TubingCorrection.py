@@ -0,0 +1,175 @@
+"""
+Functions related to correcting the pneumatic tubing response of the
+    pressure taps and rake ports (amplitude attenuation and phase lag)
+    {Depenancies}: scipy, numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+from functools import lru_cache
+from scipy import special
+import numpy as np
+
+
+def TubeResponse(f: np.array, L: float, d: float, V_t: float=0.0, T: float=293.15, p_s: float=101325.0, mu: float=1.825e-5, gamma: float=1.4, Pr: float=0.71, R: float=287.05):
+    '''
+    Returns the modelled transfer function of a single pneumatic tube
+    terminated by a transducer volume (Bergh & Tijdeman, 1965).
+
+    Parameters:
+    -----------
+    f : np.array
+        frequencies to evaluate the response at (Hz)
+    L : float
+        tube length (m)
+    d : float
+        tube inner diameter (m)
+    V_t : float, optional
+        transducer (dead) volume at the end of the tube (m^3)
+    T : float, optional
+        air temperature (K)
+    p_s : float, optional
+        mean static pressure in the tube (Pa)
+    mu : float, optional
+        dynamic viscosity (kg/m*s)
+    gamma : float, optional
+        ratio of specific heats
+    Pr : float, optional
+        Prandtl number
+    R : float, optional
+        gas constant of air (J/kg*K)
+
+    Returns:
+    --------
+    H: complex response p_transducer/p_tap at each frequency
+    '''
+    f = np.asarray(f, dtype=np.float64)
+    r = 0.5*d
+    rho = p_s/(R*T)
+    a0 = np.sqrt(gamma*R*T)
+    V_tube = np.pi*r**2*L
+
+    H = np.ones(f.shape, dtype=np.complex128)
+    w = 2*np.pi*f[f > 0]
+
+    # shear wave number (complex) and its thermal counterpart
+    alpha = 1j**1.5*r*np.sqrt(rho*w/mu)
+    # exponentially scaled bessel functions, the scaling cancels in the ratios
+    n = 1/(1 + (gamma - 1)/gamma*special.jve(2, alpha*np.sqrt(Pr))/special.jve(0, alpha*np.sqrt(Pr)))
+    phi = w/a0*np.sqrt(special.jve(0, alpha)/special.jve(2, alpha))*np.sqrt(gamma/n)
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        denom = np.cosh(phi*L) + V_t/V_tube/gamma*n*phi*L*np.sinh(phi*L)
+        H[f > 0] = 1/denom
+    # responses past overflow are fully attenuated
+    H[~np.isfinite(H)] = 0
+
+    return H
+
+def MeasuredResponse(f_meas: np.array, H_meas: np.array, nfft: int, fs: float):
+    '''
+    Returns a measured tubing transfer function resampled onto the FFT bins.
+    Magnitude and unwrapped phase are interpolated separately, and the
+    response is held at its last measured value beyond the measured band.
+
+    Parameters:
+    -----------
+    f_meas : np.array
+        frequencies the response was measured at (Hz)
+    H_meas : np.array
+        complex measured response p_transducer/p_tap
+    nfft : int
+        FFT block length (samples)
+    fs : float
+        sample rate (Hz)
+
+    Returns:
+    --------
+    H: complex response at the nfft//2+1 bins of np.fft.rfftfreq(nfft, 1/fs)
+    '''
+    f = np.fft.rfftfreq(nfft, 1/fs)
+    mag = np.interp(f, f_meas, np.abs(H_meas))
+    phase = np.interp(f, f_meas, np.unwrap(np.angle(H_meas)))
+
+    return mag*np.exp(1j*phase)
+
+@lru_cache(maxsize=64)
+def _CachedResponse(tube: tuple, nfft: int, fs: float):
+    # one read-only response per (tube configuration, block length, sample rate)
+    H = TubeResponse(np.fft.rfftfreq(nfft, 1/fs), *tube)
+    H.setflags(write=False)
+    return H
+
+def TubingResponse(tubes: list, nfft: int, fs: float):
+    '''
+    Returns the stacked modelled transfer functions for every channel.
+    Responses are cached per tube configuration, so channels sharing
+    a configuration (and repeated calls) only compute it once.
+
+    Parameters:
+    -----------
+    tubes : list
+        per channel tube configuration (L, d) or (L, d, V_t), see TubeResponse
+    nfft : int
+        FFT block length (samples)
+    fs : float
+        sample rate (Hz)
+
+    Returns:
+    --------
+    H: complex response array, one row per channel
+    '''
+    return np.stack([_CachedResponse(tuple(float(v) for v in tube), int(nfft), float(fs)) for tube in tubes])
+
+def TubingCorrect(data: np.array, fs: float, H: np.array, nfft: int=8192, eps: float=0.1):
+    '''
+    Returns the tubing corrected signals, found by FFT deconvolution of
+    all channels at once in 50% overlapping Hann windowed blocks (overlap-add).
+
+    Parameters:
+    -----------
+    data : np.array (2D)
+        raw time series where each row is a different channel
+    fs : float
+        sample rate (Hz)
+    H : np.array
+        complex tubing response on the rfft bins, either one row per channel
+        or a single row shared by all channels (see TubingResponse, MeasuredResponse)
+    nfft : int, optional
+        block length (samples), should be long compared to the tube response time
+    eps : float, optional
+        regularization of the inverse, relative to the peak response of each channel:
+        the exact inverse where |H| >= eps*max|H|, below that the gain is
+        |H|/(eps*max|H|)^2, never above 1/(eps*max|H|) and falling off with |H|,
+        so out of band noise is not amplified (the passband, DC included, is not scaled)
+
+    Returns:
+    --------
+    corrected: corrected time series with the same shape as data
+    '''
+    data = np.atleast_2d(data)
+    C, N = data.shape
+    # a steady pressure passes the tubing unchanged, so the mean of each channel is removed
+    # before deconvolving and added back after, the zero padded ends are then no step to ring on
+    mean = np.mean(data, axis=-1, keepdims=True)
+    data = data - mean
+    hop = nfft//2
+
+    # regularized inverse filter, exact in the band
+    H = np.broadcast_to(H, (C, nfft//2 + 1))
+    floor = eps*np.max(np.abs(H), axis=-1, keepdims=True)
+    H_inv = np.conj(H)/np.maximum(np.abs(H)**2, floor**2)
+
+    # periodic hann window sums to one at 50% overlap
+    win = 0.5 - 0.5*np.cos(2*np.pi*np.arange(nfft)/nfft)
+
+    corrected = np.zeros((C, N))
+    block = np.zeros((C, nfft))
+    for s in range(-hop, N, hop):
+        lo, hi = max(s, 0), min(s + nfft, N)
+        block[:] = 0
+        block[:, lo - s:hi - s] = data[:, lo:hi]
+        out = np.fft.irfft(np.fft.rfft(block*win, axis=-1)*H_inv, n=nfft, axis=-1)
+        corrected[:, lo:hi] += out[:, lo - s:hi - s]
+
+    return corrected + mean
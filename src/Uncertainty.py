@@ -13,7 +13,7 @@ import csv
 import statsmodels.api as sm
 
 
-def DataErr(raw_p: np.array):
+def DataErr(raw_p: np.array, fs: float=30000):
 
     '''
     Returns the uncertainty in measured pressure data.
@@ -22,6 +22,8 @@ def DataErr(raw_p: np.array):
     -----------   
     raw_p : np.array
         raw, filtered pressure data for single AoA and single port
+    fs : float, optional
+        sample rate (Hz)
 
     Returns:
     --------    
@@ -39,18 +41,95 @@ def DataErr(raw_p: np.array):
 
     # METHOD 2
     #calculate autocorrelations:
-    Bxx = sm.tsa.acf(raw_p, nlags=30000) #we know the crossing is before 30000
+    Bxx = sm.tsa.acf(raw_p, nlags=min(int(fs), len(raw_p) - 1)) #we know the crossing is before 1s
     # determined by now depricated code
      
-    #find index of first root:
-    lim = np.where(Bxx < 0)[0][0]
+    #find index of first root, integrating every lag if there is none:
+    roots = np.flatnonzero(Bxx < 0)
+    lim = roots[0] if len(roots) else len(Bxx)
 
     #finding the integral time scale:
-    dt = 1/30000
+    dt = 1/fs
     T = np.trapz(Bxx[:lim], dx=dt) 
+    # a series that is anticorrelated from the first lag has nothing to integrate (T = 0, infinite samples),
+    # its samples are taken as independent instead (T = dt/2 gives N = len(raw_p), the i.i.d. standard error)
+    T = max(T, dt/2)
 
     N = len(raw_p)/(2*T)*dt
     std = np.std(raw_p)
     dP = 1.96*std/np.sqrt(N)
 
-    return dP
\ No newline at end of file
+    return dP
+
+def BootstrapErr(raw_p: np.array, block: int=None, n_boot: int=1000, chunk: int=8, seed: int=0):
+
+    '''
+    Returns the uncertainty in measured pressure data from a moving block bootstrap of the mean,
+    an alternative to DataErr that needs no ACF zero crossing.
+    The sums of every block are found once from prefix sums, so each replicate only gathers
+    N/block of them. All channels share the resampled block starts and are done a few at a time.
+
+    Parameters:
+    -----------   
+    raw_p : np.array (N) or (channels, N)
+        raw, filtered pressure data for single AoA, one row per port
+    block : int, optional
+        block length in samples, longer than the correlation time, defaults to N/100
+    n_boot : int, optional
+        number of bootstrap replicates
+    chunk : int, optional
+        number of channels resampled at once, bounds the memory use
+    seed : int, optional
+        random seed, the same seed gives the same result
+
+    Returns:
+    --------    
+    dP: uncertainty in measurements for each input series (95% confidence)
+    '''
+    x = np.atleast_2d(np.asarray(raw_p, dtype=np.float64))
+    C, N = x.shape
+    if block is None:
+        block = N//100
+    block = int(np.clip(block, 1, N))
+    k = N//block
+
+    # replicate starts, shared by every channel
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(0, N - block + 1, size=(n_boot, k))
+
+    dP = np.empty(C)
+    for c0 in range(0, C, chunk):
+        xc = x[c0:c0+chunk]
+        xc = xc - xc.mean(axis=-1, keepdims=True)
+        S = np.concatenate((np.zeros((len(xc), 1)), np.cumsum(xc, axis=-1)), axis=-1)
+        sums = S[:, block:] - S[:, :-block]
+        means = sums[:, starts].sum(axis=-1)/(k*block)
+        dP[c0:c0+chunk] = 1.96*np.std(means, axis=-1, ddof=1)
+
+    return dP if np.ndim(raw_p) > 1 else dP[0]
+
+def PortErr(raw_p: np.array, fs: float=30000, method: str='acf', block: int=None, n_boot: int=1000, seed: int=0):
+
+    '''
+    Returns the uncertainty in measured pressure data of several ports with the chosen method.
+
+    Parameters:
+    -----------   
+    raw_p : np.array (channels, N)
+        raw, filtered pressure data for single AoA, one row per port
+    fs : float, optional
+        sample rate (Hz)
+    method : str, optional
+        'acf' for the integral time scale (DataErr) or 'bootstrap' (BootstrapErr)
+    block, n_boot, seed : optional
+        bootstrap block length, replicates and random seed (see BootstrapErr)
+
+    Returns:
+    --------    
+    dP: uncertainty in measurements for each port
+    '''
+    if method == 'acf':
+        return np.array([DataErr(x, fs) for x in raw_p])
+    if method == 'bootstrap':
+        return BootstrapErr(raw_p, block, n_boot, seed=seed)
+    raise ValueError("unknown uncertainty method: %s" % method)
@@ -1,6 +1,11 @@
 import numpy as np
+from PortHealth import RepairPorts
+from Kernels import Interleave
 
-def Velocity(p_r1: np.array, p_r2: np.array, p_r1_err: np.array, p_r2_err: np.array, pos_r1: np.array, pos_r2: np.array):
+# rake port positions relative to the bottom port (cm)
+rake_pos = np.array([0, 1.67, 3.33, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16.67, 18.33, 20])
+
+def Velocity(p_r1: np.array, p_r2: np.array, p_r1_err: np.array, p_r2_err: np.array, pos_r1: np.array, pos_r2: np.array, bad: np.array=None):
     '''
     Returns the Velocity Distribution over the rake and the free stream velocity.
 
@@ -18,6 +23,9 @@ def Velocity(p_r1: np.array, p_r2: np.array, p_r1_err: np.array, p_r2_err: np.ar
         positions of the pressure taps in config 1
     pos_r2 : np.array
         positions of the pressure taps in config 2
+    bad : np.array, optional
+        boolean mask of faulty rake ports (see PortHealth), these are interpolated over.
+        defaults to no faulty ports
 
     Returns:
     --------    
@@ -29,7 +37,6 @@ def Velocity(p_r1: np.array, p_r2: np.array, p_r1_err: np.array, p_r2_err: np.ar
     P_combined: combined pressure distribution
     P_combined_err: combined pressure distribution error
     '''
-    rake_pos = np.array([0, 1.67, 3.33, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16.67, 18.33, 20])
     pos_r1 = pos_r1 + rake_pos
     pos_r2 = pos_r2 + rake_pos
     V_pos = np.sort(np.concatenate((pos_r1, pos_r2)))
@@ -39,48 +46,31 @@ def Velocity(p_r1: np.array, p_r2: np.array, p_r1_err: np.array, p_r2_err: np.ar
     v_r1 = np.sqrt(2*p_r1/rho)
     v_r2 = np.sqrt(2*p_r2/rho)
 
+    # interpolating over the faulty ports:
+    if bad is None:
+        bad = np.zeros(len(rake_pos), dtype=bool)
+    v_r1 = RepairPorts(v_r1, bad)
+    v_r2 = RepairPorts(v_r2, bad)
+
     #using the most stable and largest measurements points
     U_inf = np.average([v_r1[0][1], v_r1[0][-2], v_r2[0][1], v_r2[0][-2]]) 
 
     v_r1_err = 0.5*U_inf*p_r1_err/p_r1
     v_r2_err = 0.5*U_inf*p_r2_err/p_r2
 
-    # it was found that one port in the rake was outputting abnormally high. interpolating over it:
-    k = 14 #index of bad port 
-    v_r1[0][k] = 0.5*(v_r1[0][k+1] + v_r1[0][k-1])
-    v_r2[0][k] = 0.5*(v_r2[0][k+1] + v_r2[0][k-1])
-
     U_inf_err = 0.5*np.sqrt(np.sum(np.square([v_r1_err[0][1], v_r1_err[0][-2], v_r2_err[0][1], v_r2_err[0][-2]])))
 
-    V_r = []
-    P_combined = []
-    P_combined_err = []
-    V_r_err = []
-    
-    if pos_r1[0]<pos_r2[0]:
-        for i in range(len(V_pos)):
-            if i%2 == 0:
-                P_combined.append(p_r1[0][int(i/2)])
-                P_combined_err.append(p_r1_err[int(i/2)])
-                V_r.append(v_r1[0][int(i/2)])
-                V_r_err.append(v_r1_err[0][int(i/2)])
-            else:
-                V_r.append(v_r2[0][int((i-1)/2)])
-                P_combined.append(p_r2[0][int((i-1)/2)])
-                P_combined_err.append(p_r2_err[int((i-1)/2)])
-                V_r_err.append(v_r2_err[0][int((i-1)/2)])
-    else:
-        for i in range(len(V_pos)):
-            if i%2 == 0:
-                V_r.append(v_r2[0][int(i/2)])
-                P_combined.append(p_r2[0][int(i/2)])
-                P_combined_err.append(p_r2_err[int(i/2)])
-                V_r_err.append(v_r2_err[0][int(i/2)])
-            else:
-                V_r.append(v_r1[0][int((i-1)/2)])
-                P_combined.append(p_r1[0][int((i-1)/2)])
-                P_combined_err.append(p_r1_err[int((i-1)/2)])
-                V_r_err.append(v_r1_err[0][int((i-1)/2)])
+    # alternating the ports of both configs, lowest one first (see Kernels)
+    first, second = (0, 1) if pos_r1[0]<pos_r2[0] else (1, 0)
+    p = (p_r1[0], p_r2[0])
+    p_err = (p_r1_err, p_r2_err)
+    v = (v_r1[0], v_r2[0])
+    v_err = (v_r1_err[0], v_r2_err[0])
+
+    V_r = Interleave(v[first], v[second])
+    V_r_err = Interleave(v_err[first], v_err[second])
+    P_combined = Interleave(p[first], p[second])
+    P_combined_err = Interleave(p_err[first], p_err[second])
 
     return U_inf, U_inf_err, V_r, V_r_err, V_pos, P_combined, P_combined_err
 
@@ -0,0 +1,169 @@
+"""
+Functions related to fitting a parametric wake deficit to the rake velocity profiles,
+    giving the total drag, wake width and centerline deficit from a whole batch of profiles at once
+    {Depenancies}: numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+
+
+# fitted parameters, in order
+wake_params = ('U_e', 'deficit', 'center', 'width')
+
+
+def WakeModel(y: np.array, theta: np.array):
+    '''
+    Returns the Gaussian wake profile and its derivatives with respect to the parameters.
+        V(y) = U_e - deficit*exp(-((y - center)/width)^2/2)
+
+    Parameters:
+    -----------
+    y : np.array (..., N)
+        positions across the wake (m)
+    theta : np.array (..., 4)
+        U_e (m/s), deficit (m/s), center (m), width (m), see wake_params
+
+    Returns:
+    --------
+    V: velocity profile (..., N)
+    J: derivatives of V (..., N, 4)
+    '''
+    U, A, yc, s = (theta[..., k, None] for k in range(4))
+    z = (y - yc)/s
+    g = np.exp(-0.5*z**2)
+
+    V = U - A*g
+    J = np.stack(np.broadcast_arrays(np.ones_like(g), -g, -A*g*z/s, -A*g*z**2/s), axis=-1)
+
+    return V, J
+
+def _Guess(y: np.array, V: np.array, w: np.array):
+    # edge velocity from the valid points furthest from the minimum, deficit and center from
+    # the minimum, width from the deficit area
+    V_m = np.where(w > 0, V, np.nan)
+    k = np.nanargmin(V_m, axis=-1)
+    yc = np.take_along_axis(y, k[:, None], axis=-1)[:, 0]
+    U = np.nanpercentile(V_m, 90, axis=-1)
+    A = np.maximum(U - np.nanmin(V_m, axis=-1), 1e-6)
+    area = np.trapz(np.where(w > 0, np.clip(U[:, None] - V, 0, None), 0), y, axis=-1)
+    s = np.clip(area/(A*np.sqrt(2*np.pi)), 1e-4, None)
+
+    return np.stack((U, A, yc, s), axis=-1)
+
+def WakeFit(y: np.array, V: np.array, V_err: np.array=None, rho: float=1.29, max_iter: int=100, tol: float=1e-10, absolute_sigma: bool=False):
+    '''
+    Returns the Gaussian wake fitted to each profile of the batch (Levenberg-Marquardt, all profiles solved together)
+    and the drag, width and deficit found from it, with their uncertainties.
+    The drag is the momentum deficit of the fitted wake integrated over the whole of y, so it does
+    not depend on where the rake ports fall.
+
+    Parameters:
+    -----------
+    y : np.array (B, N)
+        positions across the wake (m), one row per profile (rake positions V_pos/100 of each AoA)
+    V : np.array (B, N)
+        wake velocities (m/s), NaN points are ignored
+    V_err : np.array (B, N), optional
+        velocity uncertainties, used as the weights of the fit
+    rho : float, optional
+        air density, as used by TotalDrag
+    max_iter : int, optional
+        maximum number of iterations
+    tol : float, optional
+        relative change in chi^2 below which a profile has converged (its gradient test uses sqrt(tol))
+    absolute_sigma : bool, optional
+        if False the covariances are scaled by the reduced chi^2 (as curve_fit does)
+
+    Returns:
+    --------
+    fit: dict with
+        'params' (B, 4) and 'cov' (B, 4, 4): fitted wake_params and their covariance
+        'drag', 'width', 'deficit' (B,): drag per unit span (N/m), width (m) and centerline deficit (m/s)
+        'drag_err', 'width_err', 'deficit_err' (B,): their uncertainties
+        'derived_cov' (B, 3, 3): covariance of (drag, width, deficit)
+        'chi2' (B,), 'converged' (B,): whether the step or gradient test passed
+        'stalled' (B,): the damping ran away before either test passed, the fit is not a minimum
+    '''
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    V = np.atleast_2d(np.asarray(V, dtype=np.float64))
+    y, V = np.broadcast_arrays(y, V)
+    if V_err is None:
+        V_err = np.ones_like(V)
+    V_err = np.broadcast_to(np.asarray(V_err, dtype=np.float64), V.shape)
+
+    valid = np.isfinite(y) & np.isfinite(V) & np.isfinite(V_err) & (V_err > 0)
+    w = np.where(valid, 1/np.where(valid, V_err, 1), 0)
+    y0 = np.where(valid, y, 0)
+    V0 = np.where(valid, V, 0)
+    B, N = V.shape
+    P = len(wake_params)
+
+    def Chi2(theta):
+        m, J = WakeModel(y0, theta)
+        r = (V0 - m)*w
+        return np.sum(r**2, axis=-1), r, J*w[..., None]
+
+    theta = _Guess(y0, V0, w)
+    chi2, r, J = Chi2(theta)
+    lam = np.full(B, 1e-3)
+    converged = np.zeros(B, dtype=bool)
+    stalled = np.zeros(B, dtype=bool)
+
+    for it in range(max_iter):
+        active = ~converged & ~stalled
+        if not np.any(active):
+            break
+
+        # damped normal equations of every profile, solved as one batch
+        JTJ = np.einsum('bnp,bnq->bpq', J, J)
+        g = np.einsum('bnp,bn->bp', J, r)
+        D = np.diagonal(JTJ, axis1=-2, axis2=-1)
+
+        # gradient test: the residuals are orthogonal to every column of the Jacobian
+        cos = np.abs(g)/np.sqrt(np.maximum(chi2[:, None]*D, 1e-300))
+        converged |= active & (np.max(cos, axis=-1) <= np.sqrt(tol))
+        active &= ~converged
+        M = JTJ + (lam[:, None]*D + 1e-12*np.max(D, axis=-1, keepdims=True) + 1e-30)[..., None]*np.eye(P)
+        step = np.linalg.solve(M, g[..., None])[..., 0]
+
+        trial = theta + step
+        trial[:, 3] = np.abs(trial[:, 3])
+        chi2_t, r_t, J_t = Chi2(trial)
+
+        better = active & np.isfinite(chi2_t) & (chi2_t <= chi2)
+        small = better & (chi2 - chi2_t <= tol*np.maximum(chi2, 1e-300))
+        theta = np.where(better[:, None], trial, theta)
+        r = np.where(better[:, None], r_t, r)
+        J = np.where(better[:, None, None], J_t, J)
+        chi2 = np.where(better, chi2_t, chi2)
+        lam = np.where(better, lam*0.3, lam*10)
+        converged |= small
+        stalled |= active & ~converged & (lam > 1e12)
+
+    # parameter covariance from the final Jacobian
+    JTJ = np.einsum('bnp,bnq->bpq', J, J)
+    cov = np.linalg.pinv(JTJ)
+    dof = np.maximum(np.sum(valid, axis=-1) - P, 1)
+    if not absolute_sigma:
+        cov = cov*(chi2/dof)[:, None, None]
+
+    # momentum deficit of the fitted wake over all y:
+    # D = rho*int(V*(U_e - V)) = rho*(U_e*A*s*sqrt(2 pi) - A^2*s*sqrt(pi))
+    U, A, yc, s = theta.T
+    r2p, rp = np.sqrt(2*np.pi), np.sqrt(np.pi)
+    drag = rho*(U*A*s*r2p - A**2*s*rp)
+    G = np.zeros((B, 3, P))
+    G[:, 0, 0] = rho*A*s*r2p
+    G[:, 0, 1] = rho*(U*s*r2p - 2*A*s*rp)
+    G[:, 0, 3] = rho*(U*A*r2p - A**2*rp)
+    G[:, 1, 3] = 1
+    G[:, 2, 1] = 1
+    derived_cov = G @ cov @ np.swapaxes(G, -1, -2)
+    derived_err = np.sqrt(np.abs(np.diagonal(derived_cov, axis1=-2, axis2=-1)))
+
+    return {'params': theta, 'cov': cov,
+            'drag': drag, 'width': s, 'deficit': A,
+            'drag_err': derived_err[:, 0], 'width_err': derived_err[:, 1], 'deficit_err': derived_err[:, 2],
+            'derived_cov': derived_cov, 'chi2': chi2, 'converged': converged, 'stalled': stalled}
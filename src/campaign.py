@@ -0,0 +1,101 @@
+"""
+Script for pooling repeated runs of the campaign into one polar and flagging outlier runs.
+    Each run is a copy of the data\CSV folder main.py wrote for it, placed in data\Runs\<run name>.
+    {Depenancies}: numpy, pandas
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+import pandas as pd
+import glob
+import os
+
+# Custom Functions/libraies
+from Aggregate import *
+from PressuretoCSV import *
+from PolarRecord import *
+from Residuals import *
+
+
+# DEFINITIONS
+########################
+runs_glob = ".\data\Runs\*"
+outlier_thresh = 4 # runs further than this many between run standard deviations from the other runs are listed
+reference = 'XFOIL' # runs are also ranked by their agreement with this reference polar ('XFOIL' or 'UIUC')
+
+runs = sorted(r for r in glob.glob(runs_glob) if os.path.isfile(os.path.join(r, 'Polar.csv')))
+print("Pooling %d runs..." % len(runs))
+
+# FIRST PASS: running accumulators, the only pass over the files
+########################
+# every run's means are kept (a few kB each) for the scoring, the pooling without outliers and the ranking
+state = {}
+kept = {}
+moments = {}
+for r in runs:
+    kept[r] = LoadRun(r)
+    AddRun(state, kept[r])
+
+    # the references give Cm about the quarter chord and the polar about the leading edge,
+    # so Cm is only compared for runs whose Moments.csv has the quarter chord moment
+    name = os.path.join(r, 'Moments.csv')
+    moments[r] = pd.read_csv(name, index_col=0) if os.path.isfile(name) else None
+
+pooled = {name: Pooled(state, name) for name in state}
+polar = PooledPolar(state)
+PolartoCSV(polar, '.\data\CSV\Pooled_Polar.csv')
+
+scatter = pd.DataFrame({'AoA (deg)': pooled['Cl']['alpha']})
+for q in polar_quantities:
+    scatter[q + ' scatter'] = pooled[q]['scatter'][:, 0]
+    scatter[q + ' Birge ratio'] = pooled[q]['birge'][:, 0]
+scatter['runs'] = pooled['Cl']['n'][:, 0].astype(int)
+scatter.to_csv('.\data\CSV\Pooled_Scatter.csv', index=False)
+
+# SCORING: each run against the pool of the others
+########################
+scores = []
+for r in runs:
+    score, worst = RunScore(state, kept[r])
+    scores.append((os.path.basename(r), score, *(worst if worst else ('', np.nan))))
+
+scores = pd.DataFrame(scores, columns=['Run', 'Score', 'Quantity', 'AoA (deg)']).sort_values('Score', ascending=False)
+scores.to_csv('.\data\CSV\Run_Scores.csv', index=False)
+
+outliers = set(scores['Run'][scores['Score'] > outlier_thresh])
+print("Outlier runs:")
+print(scores[scores['Score'] > outlier_thresh].to_string(index=False))
+
+# POOLING again without the outlier runs
+########################
+if len(outliers) == len(runs):
+    print("Every run is an outlier, the pooled polar keeps them all (raise outlier_thresh?)")
+elif outliers:
+    state = {}
+    for r in runs:
+        if os.path.basename(r) not in outliers:
+            AddRun(state, kept[r])
+    PolartoCSV(PooledPolar(state), '.\data\CSV\Pooled_Polar.csv')
+    print("Pooled polar written without the %d outlier runs" % len(outliers))
+
+# RANKING: agreement of every run with the reference polar, all runs compared at once
+########################
+alpha = pooled['Cl']['alpha']
+polars = np.zeros((len(runs), len(alpha)), dtype=polar_dtype)
+polars['alpha'] = alpha
+for i, r in enumerate(runs):
+    for q in polar_quantities:
+        x = kept[r][q]
+        polars[q][i] = [x[a][0][0] if a in x else np.nan for a in alpha]
+        polars['d' + q][i] = [x[a][1][0] if a in x else np.nan for a in alpha]
+
+    m = {} if moments[r] is None else moments[r].reindex(alpha)
+    for q in ('Cm', 'dCm'):
+        polars[q][i] = m[q + ' x/c=0.25'] if q + ' x/c=0.25' in m else np.nan
+
+ranking, _ = RankRuns([os.path.basename(r) for r in runs], polars, ReferencePolar(alpha)[reference])
+ranking = pd.DataFrame(ranking, columns=['Run', 'chi2/n vs ' + reference, 'n'])
+ranking.to_csv('.\data\CSV\Run_Reference_Ranking.csv', index=False)
+print("Best agreement with %s:" % reference)
+print(ranking.head().to_string(index=False))
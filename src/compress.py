@@ -0,0 +1,54 @@
+"""
+Script for archiving the filtered recordings in the compact format of Archive.py, with the calibration they were taken with.
+    Point the recordings setting of Config.py at the archives to use them instead of the .mat files.
+    {Depenancies}: scipy, numpy
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+import os
+
+# Custom Functions/libraies
+from Prefetch import *
+from Archive import *
+from Config import *
+
+
+# DEFINITIONS
+########################
+# AoAs, calibration and sample rate of the campaign are set in Config.py, recordings must be the filtered .mat files
+
+chunk = 2**16 # samples per compressed chunk
+tol = 1e-4 # largest float32 rounding error kept, relative to each channel's standard deviation
+
+archive_dir = ".\data\Archive"
+archives = archive_dir + "\Experimental_data_%d.arc"
+
+
+# ARCHIVING
+########################
+if recordings.endswith('.arc'):
+    raise ValueError("recordings in Config.py already point at archives, point them back at the .mat files to archive them")
+os.makedirs(archive_dir, exist_ok=True)
+paths = [recordings%a for a in alpha]
+total_in, total_out = 0, 0
+for a, (path, data_raw) in zip(alpha, Prefetch(paths)):
+    out = archives%a
+    meta = WriteArchive(out, data_raw, gain, offset, Hg2Pa, f_s, chunk, tol)
+
+    # every series read back must match the recording to within the recorded rounding error
+    back = ReadArchive(out)
+    for name, series in meta['series'].items():
+        err = np.max(np.abs(back[name] - data_raw[name]), axis=-1)
+        if np.any(err > np.array([enc['max_err'] for enc in series['channels']])):
+            raise ValueError("%s: %s does not read back from %s" % (path, name, out))
+
+    size_in, size_out = os.path.getsize(path), os.path.getsize(out)
+    total_in += size_in
+    total_out += size_out
+    encs = [enc['dtype'] for series in meta['series'].values() for enc in series['channels']]
+    print("AoA = %d: %.1f MB -> %.1f MB (%.1fx), channels %s" % (a, size_in/1e6, size_out/1e6, size_in/size_out,
+          ", ".join("%d %s" % (encs.count(d), d) for d in ('int16', 'float32', 'float64') if d in encs)))
+
+print("Archived %d recordings: %.1f MB -> %.1f MB (%.1fx)" % (len(paths), total_in/1e6, total_out/1e6, total_in/total_out))
@@ -12,41 +12,90 @@ import csv
 
 # Custom Functions/libraies
 from Uncertainty import *
+from PortHealth import SpectralFraction
+from Pipeline import CorrectedChannels
+from Checkpoint import *
+from Prefetch import *
+from Config import *
 
 
 # DEFINITIONS
 ########################
-# airfoil tap positions: 
-air_top_tap_pos = [0, 0.03, 0.06, 0.10, 0.15, 0.20, 0.30, 0.40, 0.55, 0.70, 0.85, 1.00]
-air_bot_tap_pos = [0.90, 0.60, 0.40, 0.30, 0.20, 0.10, 0.05]
-gain = 115 # From in lab calibration code
-offset = 50 # From in lab calibration code
-Hg2Pa = 9.80665 #inHg to Pa convertion factor
-
-# Angles of Attack
-alpha = [0, 4, 6, 8, 9, 10, 11, 12, 13, 14, 15, 17]
+# taps, chord, AoAs, calibration, tubing, rake positions, recordings and the uncertainty settings of the campaign are set in Config.py
+prefetch_depth = 2 # recordings read ahead in the background while the current one is processed
 
 dP_a = np.zeros((len(alpha), 19))
 dP_r1 = np.zeros((len(alpha), 17))
 dP_r2 = np.zeros((len(alpha), 17))
+hf = {'airfoil': np.zeros((len(alpha), 19)), 'rake1': np.zeros((len(alpha), 17)), 'rake2': np.zeros((len(alpha), 17))}
+
+ckpt = LoadCheckpoint(checkpoint)
+dP = {'airfoil': dP_a, 'rake1': dP_r1, 'rake2': dP_r2}
 
+# reusing every port already in the checkpoint for this version of the recording
+jobs = []
 for i, a in enumerate(alpha):
+    path = recordings%a
+    sig = FileSignature(path)
+
+    todo = []
+    for group, n in (('airfoil', 19), ('rake1', 17), ('rake2', 17)):
+        for k in range(n):
+            value = CheckpointValue(ckpt, a, group, k, sig, err_key)
+            frac = CheckpointValue(ckpt, a, group + ' hf', k, sig, hf_key)
+            if value is None or frac is None:
+                todo.append((group, k))
+            else:
+                dP[group][i, k] = value
+                hf[group][i, k] = frac
+    if todo:
+        jobs.append((i, a, path, sig, todo))
+
+# an archive is only opened, and just the missing ports of one group decoded at a time,
+# unless the tubing correction needs every channel at once
+fused = recordings.endswith('.arc') and air_tubes is None and rake_tubes is None
+if fused:
+    # only imported when archives are read, as in LoadRecording
+    from Archive import OpenArchive, ReadSeries
+loader = (lambda path, keys: OpenArchive(path)) if fused else LoadRecording
+series = {'airfoil': 'spdata', 'rake1': 'wpdata', 'rake2': 'wpdata2'}
+
+# only the recordings with missing ports are read, the next ones while the current one is processed
+for (i, a, path, sig, todo), (_, data) in zip(jobs, Prefetch([job[2] for job in jobs], prefetch_depth, keys=list(series.values()), loader=loader)):
+    print("AoA = %d: computing %d of 53 ports..." % (a, len(todo)))
 
-    data = io.loadmat(".\data\Filtered\Experimental_data_%d.mat"%a)
     # ['__header__', '__version__', '__globals__', 'AoA', 'ask', 'None', 
     # 'f_s', 'i', 'k', 'p_airfoil', 'p_rake1', 'p_rake2', 'prompt', 'spdata', 'sptime', 
     # 't_s', 'wpdata', 'wpdata2', 'wptime1', 'wptime2', 'x', 'y', 'y2', '__function_workspace__']
 
-    #error calcs:
-    for k in range(1, 20):
-        dP_a[i, k-1] = DataErr((data['spdata'][k-1]*gain + offset)*Hg2Pa)
-        # Bxx = DataErr((data['spdata'][0]*gain + offset)*Hg2Pa)
-        if (k < 18):
-            dP_r1[i, k-1] = DataErr((data['wpdata'][k-1]*gain + offset)*Hg2Pa)
-            dP_r2[i, k-1] = DataErr((data['wpdata2'][k-1]*gain + offset)*Hg2Pa)
+    if not fused:
+        # tubing lag corrected first when configured
+        channels = dict(zip(series, CorrectedChannels(data, air_tubes, rake_tubes, f_s, nfft)))
+
+    #error calcs, the bootstrap does all missing ports of a group at once:
+    for group in series:
+        ports = [k for g, k in todo if g == group]
+        if not ports:
+            continue
+        raw = ReadSeries(data, series[group], ports) if fused else channels[group][ports]
+        step = 1 if err_method == 'acf' else len(ports)
+        for s in range(0, len(ports), step):
+            # the uncertainty ignores the calibration offset and scales with its gain, so no calibrated copy is made
+            values = PortErr(raw[s:s+step], f_s, err_method, boot_block, n_boot, boot_seed)*abs(gain*Hg2Pa)
+            fracs = SpectralFraction(raw[s:s+step], f_s, hf_split)
+            for k, value, frac in zip(ports[s:s+step], values, fracs):
+                dP[group][i, k] = value
+                hf[group][i, k] = frac
+                AppendCheckpoint(checkpoint, ckpt, a, group, k, sig, err_key, value)
+                AppendCheckpoint(checkpoint, ckpt, a, group + ' hf', k, sig, hf_key, frac)
+    if fused:
+        data['zip'].close()
 
 # Saving data to CSV files
 
 np.savetxt("data\CSV\dP_airfoil.csv", dP_a, delimiter=",")
 np.savetxt("data\CSV\dP_rakepos1.csv", dP_r1, delimiter=",")
-np.savetxt("data\CSV\dP_rakepos2.csv", dP_r2, delimiter=",")
\ No newline at end of file
+np.savetxt("data\CSV\dP_rakepos2.csv", dP_r2, delimiter=",")
+np.savetxt("data\CSV\hf_airfoil.csv", hf['airfoil'], delimiter=",")
+np.savetxt("data\CSV\hf_rakepos1.csv", hf['rake1'], delimiter=",")
+np.savetxt("data\CSV\hf_rakepos2.csv", hf['rake2'], delimiter=",")
\ No newline at end of file
@@ -9,84 +9,98 @@ from scipy import io
 import matplotlib.pyplot as plt
 import numpy as np
 import csv
+import os
 
 # Custom Functions/libraies
 from ReynoldsNumber import *
-from Forces import *
-from Velocity import *
-from Coefficients import *
 from PressuretoCSV import *
-from Uncertainty import *
 from Graphing import *
+from PortHealth import *
+from PolarRecord import *
+from Pipeline import *
+from Wake import *
+from CpSurface import *
+from Prefetch import *
+from PolarQuery import *
+from Residuals import *
+from ReferenceDB import *
+from Config import *
 
 
 # DEFINITIONS
 ########################
-# airfoil tap positions: 
-air_top_tap_pos = [0, 0.03, 0.06, 0.10, 0.15, 0.20, 0.30, 0.40, 0.55, 0.70, 0.85, 1.00]
-air_bot_tap_pos = [0.90, 0.60, 0.40, 0.30, 0.20, 0.10, 0.05]
+# taps, chord, AoAs, calibration, tubing, rake positions and recordings of the campaign are set in Config.py
 
-# airfoil cord length
-c = 0.1 #m
+# dense grids of the Cp surface
+x_grid = np.linspace(0, 1, 201)
+alpha_grid = np.linspace(alpha[0], alpha[-1], 69)
 
-# Angles of Attack
-alpha = [0, 4, 6, 8, 9, 10, 11, 12, 13, 14, 15, 17] #12
-dalpha = 1 #deg uncertainty in AoA
+# moment reference points (m), leading edge and quarter chord
+x_ref = np.array([0, 0.25])*c
 
-# calibration data
-gain = 115 # From in lab calibration code
-offset = 50 # From in lab calibration code
-Hg2Pa = 9.80665 #inHg to Pa convertion factor
+# recordings read ahead in the background while the current one is calibrated
+prefetch_depth = 2
 
-# baselines of rake positions:
-y_0 = np.array([12, 12, 11.5, 11, 11.5, 11, 11.5, 12.5, 11.5, 12, 12.4, 12]) - 3.33 # inital position of the bottom port
-dir = [1, -1, -1, 1, -1, 1, 1, -1, -2, 1, -1, 1] #direction rake was moved -1 = down 1 = up
+# sample aligned lift and wake drag of every AoA (see SyncedLoads), reads the full time series
+sync_loads = True
 
 print("Loading Clark Y Airfoil Coordinates...")
 # LOADING CLARK_Y_AIRFOIL COORDINATES
 ##############################
-with open(".\data\Clark_Y_Airfoil.csv", newline='') as f:
-    points = csv.reader(f, delimiter=';')
-    data = list(points)
-    data.pop(0)
-
-# Converting to float
-i = 0
-for row in data:
-    data[i] = list(map(float, row)) 
-    i += 1
-
-is_top = True
-airfoil_top = []
-airfoil_bot = []
-for i in range(0,len(data)):
-    if i != 0 and float(data[i][0]) == float(0.0):
-        is_top = False
-    if is_top and float(data[i][0]) in air_top_tap_pos:
-        airfoil_top.append([float(data[i][0]), float(data[i][1])])
-    elif not is_top and float(data[i][0]) in air_bot_tap_pos:
-        airfoil_bot.append([float(data[i][0]), float(data[i][1])])
-
-
-# Convert to np.array
-airfoil_top = np.array(airfoil_top)*0.1  # Multiplying values by cord length (values given are per unit cord)
-airfoil_bot = np.array(airfoil_bot)*0.1 # Multiplying values by cord length (values given are per unit cord)
+airfoil_top, airfoil_bot = LoadAirfoil(".\data\Clark_Y_Airfoil.csv", air_top_tap_pos, air_bot_tap_pos, c)
+# weights of every tap in the force resultants, the same geometry at every AoA
+W = ResultantWeights(airfoil_top, airfoil_bot)
 
 print("Loading Experimental Data...")
 
+# calibrated mean pressures of every port at every AoA
+p_airfoil = np.zeros((len(alpha), 19))
+p_rake1 = np.zeros((len(alpha), 17))
+p_rake2 = np.zeros((len(alpha), 17))
+paths = [recordings%a for a in alpha]
+for i, (path, data_raw) in enumerate(Prefetch(paths, prefetch_depth, keys=['p_airfoil', 'p_rake1', 'p_rake2'])):
+    # this data was pre-filtered in matlab
+    # ['__header__', '__version__', '__globals__', 'AoA', 'ask', 'None', 
+    # 'f_s', 'i', 'k', 'p_airfoil', 'p_rake1', 'p_rake2', 'prompt', 'spdata', 'sptime', 
+    # 't_s', 'wpdata', 'wpdata2', 'wptime1', 'wptime2', 'x', 'y', 'y2', '__function_workspace__']
+
+    # data calibration:
+    p_airfoil[i], p_rake1[i], p_rake2[i] = CalibrateMeans(data_raw, gain, offset, Hg2Pa)
+
+# errors were calculated in errcalc.py
+dP_a = np.loadtxt('data\CSV\dP_airfoil.csv', delimiter=',', ndmin=2)
+dP_r1 = np.loadtxt('data\CSV\dP_rakepos1.csv', delimiter=',', ndmin=2)
+dP_r2 = np.loadtxt('data\CSV\dP_rakepos2.csv', delimiter=',', ndmin=2)
+
+# fluctuation energy above hf_split of every port, also from errorcalcs.py (skipped for older results without it)
+hf = [np.loadtxt(f, delimiter=',', ndmin=2) if os.path.exists(f) else None
+      for f in ('data\CSV\hf_airfoil.csv', 'data\CSV\hf_rakepos1.csv', 'data\CSV\hf_rakepos2.csv')]
+
+print("Checking Port Health...")
+# scoring every port over all AoAs (both rake positions are the same 17 ports), the ports found faulty in the lab are kept
+air_bad, air_score = PortHealth(p_airfoil, dP_a, hf[0], pos=air_top_tap_pos + air_bot_tap_pos,
+                                segments=[np.arange(0, 12), np.arange(12, 19)], bad=PortMask(air_bad_ports, 19))
+rake_bad, rake_score = PortHealth(np.vstack((p_rake1, p_rake2)), np.vstack((dP_r1, dP_r2)),
+                                  None if hf[1] is None else np.vstack((hf[1], hf[2])),
+                                  bad=PortMask(rake_bad_ports, 17), min_rows=2*min_aoa)
+# how clearly the flagged and the healthy ports are separated by the threshold, near 1 the mask is a close call
+print(" Faulty airfoil ports:", np.flatnonzero(air_bad) + 1, " (margin: flagged x%.1f, healthy x%.1f)" % PortMargin(air_bad, air_score, known=PortMask(air_bad_ports, 19)))
+print(" Faulty rake ports:", np.flatnonzero(rake_bad) + 1, " (margin: flagged x%.1f, healthy x%.1f)" % PortMargin(rake_bad, rake_score, known=PortMask(rake_bad_ports, 17)))
+
 # Data array initialization
-pressure_data = []
-rake_press = []
-rake_press_err = []
-y_rake_pos = []
-Cl_list = []
-dCl_list = []
-Cd_list = []
-dCd_list = []
-Cm_list = []
-dCm_list = []
-Cdt_list = []
-dCdt_list = []
+pressure_data = p_airfoil
+rake_press = np.zeros((len(alpha), 34))
+rake_press_err = np.zeros((len(alpha), 34))
+y_rake_pos = np.zeros((len(alpha), 34))
+V_rake = np.zeros((len(alpha), 34))
+V_rake_err = np.zeros((len(alpha), 34))
+U_inf = np.zeros(len(alpha))
+q_inf = np.zeros((len(alpha), 2))
+Cp = np.zeros((len(alpha), 19))
+Cp_err = np.zeros((len(alpha), 19))
+F = np.zeros((len(alpha), 4))
+F_cov = np.zeros((len(alpha), 4, 4))
+polar = PolarRecord(alpha)
 
 # PROCESSING DATA
 ########################
@@ -96,108 +110,113 @@ print("=========================================")
 for i,a in enumerate(alpha):
     print("Processing AoA = %d..."%a)
 
-    # this data was pre-filtered in matlab
-    # errors were calculated in errcalc.py
-    data_raw = io.loadmat(".\data\Filtered\Experimental_data_%d.mat"%a)
-    # ['__header__', '__version__', '__globals__', 'AoA', 'ask', 'None', 
-    # 'f_s', 'i', 'k', 'p_airfoil', 'p_rake1', 'p_rake2', 'prompt', 'spdata', 'sptime', 
-    # 't_s', 'wpdata', 'wpdata2', 'wptime1', 'wptime2', 'x', 'y', 'y2', '__function_workspace__']
-
-    # data calibration:
-    p_top = (data_raw['p_airfoil'][0][0:12]*gain + offset)*Hg2Pa
-    p_bot = (data_raw['p_airfoil'][0][12:19]*gain + offset)*Hg2Pa
-    p_r1 = (data_raw['p_rake1']*gain + offset)*Hg2Pa
-    p_r2 = (data_raw['p_rake2']*gain + offset)*Hg2Pa
-    
-    p = (data_raw['p_airfoil'][0]*gain + offset)*Hg2Pa
-    pressure_data.append(list(map(float, p)))
-    
-    # Initializing error arrays
-    p_r1_err = np.zeros_like(p_r1) #temp
-    p_r2_err = np.zeros_like(p_r2) #temp
-    p_top_err = np.zeros_like(p_top) #temp
-    p_bot_err = np.zeros_like(p_bot) #temp
-    
-    # Parsing error data from CSV files
-    with open('data\CSV\dP_airfoil.csv') as f:
-        reader = csv.reader(f)
-        data_err_a = list(reader)
-        data_err_a = [eval(e) for e in data_err_a[i]]
-        p_top_err = data_err_a[0:12]
-        p_bot_err = data_err_a[12:19]
-    with open('data\CSV\dP_rakepos1.csv') as f:
-        reader = csv.reader(f)
-        data_err_r1 = list(map(np.float64,reader))
-        p_r1_err = np.array(data_err_r1)[i]
-
-    with open('data\CSV\dP_rakepos2.csv') as f:
-        reader = csv.reader(f)
-        data_err_r2 = list(map(np.float64,reader))
-        p_r2_err = np.array(data_err_r2)[i]
-
-    
-    # finding the wake velocity distribution:
+    # rake positions
     pos_r1 = y_0[i]
     pos_r2 = y_0[i] + dir[i]*0.5
-    
-    U_inf, U_inf_err, V_r, V_r_err, V_pos, P_comb, P_comb_err = Velocity(p_r1, p_r2, p_r1_err, p_r2_err, pos_r1, pos_r2)
-
-    rake_press.append(list(map(float, P_comb)))
-    rake_press_err.append(list(map(float, P_comb_err)))
-    y_rake_pos.append(list(map(float, V_pos)))
 
-    # Plotting velocity distribution
-    VelGraph(a, V_r, V_r_err, V_pos)
-
-
-    #finding the dynamic freestream pressure
-    q_inf, q_inf_err = DynPressure(U_inf, U_inf_err)
-
-
-
-    #finding the lift and total drag
-    Dt, Dt_err = TotalDrag(V_pos/100, V_r, V_r_err, U_inf, U_inf_err)
-
-    # Finding normal, axial forces and moment forces
-    N, dN = NormalForce(p_top, p_bot, p_top_err, p_bot_err, airfoil_top, airfoil_bot, a)
-    A, dA = AxialForce(p_top, p_bot, p_top_err, p_bot_err, airfoil_top, airfoil_bot, a)
-    M, dM = MomentLE(p_top, p_bot, p_top_err, p_bot_err, airfoil_top, airfoil_bot, a)
-
-    # Finding lift and drag forces
-    L, dL = LiftForce(a, dalpha, N, dN, A, dA)
-    D, dD = PressureDragForce(a, dalpha, N, dN, A, dA)
-
-    # Finding pressure coefficients
-    Cp_top, Cp_bot, Cp_top_err, Cp_bot_err = Cpressure(p_top, p_bot, p_top_err, p_bot_err, q_inf, q_inf_err)
-
-    # total drag coefficient
-    Cdt, dCdt = Ctotaldrag(Dt, Dt_err, q_inf, q_inf_err, c)
-
-    # finding remaining Coefficients
-    Cl, dCl, Cd, dCd, Cm, dCm =Coefficients(L, dL, D, dD, M, dM, q_inf, q_inf_err, c)
-
-    # Plotting Cp distribution
-    CpGraph(a, Cp_top, Cp_bot, Cp_top_err, Cp_bot_err)
+    res = ProcessAoA(a, p_airfoil[i], p_rake1[i], p_rake2[i], dP_a[i], dP_r1[i], dP_r2[i], pos_r1, pos_r2,
+                     W, c, dalpha, air_bad, rake_bad, tap_pos=(air_top_tap_pos, air_bot_tap_pos))
 
     # Storing data
-    Cl_list.append(Cl)
-    Cd_list.append(Cd)
-    Cm_list.append(Cm)
-    Cdt_list.append(Cdt)
-    dCl_list.append(dCl)
-    dCd_list.append(dCd)
-    dCm_list.append(dCm)
-    dCdt_list.append(dCdt)
-
-
+    rake_press[i] = res['P_comb']
+    rake_press_err[i] = res['P_comb_err']
+    y_rake_pos[i] = res['V_pos']
+    V_rake[i] = res['V_r']
+    V_rake_err[i] = res['V_r_err']
+    U_inf[i] = res['U_inf']
+    q_inf[i] = res['q_inf'], res['q_inf_err']
+    Cp[i] = np.concatenate((res['Cp_top'], res['Cp_bot']))
+    Cp_err[i] = np.concatenate((res['Cp_top_err'], res['Cp_bot_err']))
+    polar[i] = res['polar']
+    F[i], F_cov[i] = res['F'], res['F_cov']
+
+
+
+if sync_loads:
+    print("Aligning Airfoil and Rake Samples...")
+    # the time series are only read now, once the faulty ports are known
+    sync = {k: np.zeros((len(alpha), 2)) for k in ('n', 'L', 'L_std', 'Dt', 'Dt_std', 'r')}
+    keys = ['spdata', 'wpdata', 'wpdata2', 'sptime', 'wptime1', 'wptime2']
+    for i, (path, data_raw) in enumerate(Prefetch(paths, prefetch_depth, keys=keys)):
+        res = SyncedLoads(data_raw, alpha[i], W, y_0[i], y_0[i] + dir[i]*0.5, gain, offset, Hg2Pa, air_bad, rake_bad)
+        for k in sync:
+            sync[k][i] = res[k]
+        print(" AoA = %d: lift/wake drag correlation %+.2f (rake position 1), %+.2f (rake position 2)"%(alpha[i], *res['r']))
+
+print("Fitting Wake Profiles...")
+# gaussian wake fitted to every AoA at once, drag not limited by the rake port spacing
+wake = WakeFit(y_rake_pos/100, V_rake, V_rake_err)
+Cdw = wake['drag']/(q_inf[:, 0]*c)
+dCdw = np.sqrt((wake['drag_err']/(q_inf[:, 0]*c))**2 + (q_inf[:, 1]*wake['drag']/(q_inf[:, 0]**2*c))**2)
+for i,a in enumerate(alpha):
+    print(" AoA = %d: Cdt = %.4f (rake), %.4f +/- %.4f (wake fit%s)"%(a, polar['Cdt'][i], Cdw[i], dCdw[i],
+          "" if wake['converged'][i] else ", stalled" if wake['stalled'][i] else ", not converged"))
+
+print("Finding Moments...")
+# from the resultants integrated once per AoA, no reintegration per reference point
+Cm_ref, dCm_ref = MomentCoefficients(F, F_cov, q_inf[:, 0], q_inf[:, 1], c, x_ref)
+x_cp, dx_cp = CenterOfPressure(F, F_cov)
+x_ac, dx_ac = AerodynamicCenter(F, q_inf[:, 0], c, alpha)
+print(" Aerodynamic center at x/c = %.3f +/- %.3f"%(x_ac/c, dx_ac/c))
+
+print("Lift Curve Analytics...")
+# monotone interpolants of the polar, saved with the analytics for later lookups (see LoadPolar)
+pq = BuildPolar(polar)
+stats = PolarAnalytics(pq)
+print(" Lift slope = %.4f +/- %.4f /deg, zero lift AoA = %.2f +/- %.2f deg"%(stats['a0'], stats['da0'], stats['alpha_L0'], stats['dalpha_L0']))
+print(" Clmax = %.3f at AoA = %.1f deg, stall onset at AoA = %.1f deg"%(stats['Clmax'], stats['alpha_Clmax'], stats['alpha_stall']))
+
+print("Building Cp Surface...")
+# operators only depend on the tap positions and AoAs, applied to the whole sweep at once
+x_op = SurfaceOperator(air_top_tap_pos, air_bot_tap_pos, x_grid)
+Cp_surf, Cp_surf_err = CpSurface(Cp, x_op, InterpOperator(alpha, alpha_grid), Cp_err)
+Cp_meas = CpSurface(Cp, x_op, InterpOperator(alpha, alpha))
+x_peak, Cp_peak = SuctionPeak(x_grid, Cp_surf[:, :len(x_grid)])
+x_sep, Cp_te, alpha_sep = Separation(x_grid, Cp_surf[:, :len(x_grid)], alpha_grid)
+print(" Separation onset at AoA = %.1f deg"%alpha_sep)
+
+print("Comparing with Reference Data...")
+# XFOIL reference at the Reynolds number of each AoA, rebuilt only when the XFOIL files change
+Re = ReynoldsNumber(c, U_inf)
+db = ReferenceDB()
+print(" Re = %.0f to %.0f, XFOIL references at Re ="%(Re.min(), Re.max()), db['Re'])
+a_col, Re_col = np.asarray(alpha, dtype=np.float64)[:, None], Re[:, None]
+Cp_ref = np.concatenate((QueryCpDB(db, Re_col, a_col, np.array(air_top_tap_pos)[None, :], 0),
+                         QueryCpDB(db, Re_col, a_col, np.array(air_bot_tap_pos)[None, :], 1)), axis=-1)
+
+# residuals in units of the measurement uncertainty, every AoA and port at once
+z_Cp = NormResiduals(Cp, Cp_err, Cp_ref)
+Cp_stats = ResidualStats(z_Cp)
+port_stats = ResidualStats(z_Cp, axis=0)
+print(" Cp vs XFOIL: chi2/n = %.1f over %d taps"%(Cp_stats['red_chi2'], Cp_stats['n']))
+ref_polar = {'XFOIL': QueryPolarDB(db, Re, alpha), 'UIUC': ReferencePolar(alpha)['UIUC']}
+# the references give Cm about the quarter chord (x_ref[1]), the polar about the leading edge.
+# Cd from the taps is the pressure drag and Cdt from the wake the total drag, each compared with its own reference
+meas = {'Cl': (polar['Cl'], polar['dCl']), 'Cd': (polar['Cd'], polar['dCd']), 'Cdt': (polar['Cdt'], polar['dCdt']),
+        'Cm': (Cm_ref[:, 1], dCm_ref[:, 1])}
+for src in ref_polar:
+    q_ref = [q for q in meas if q in ref_polar[src] and np.any(np.isfinite(ref_polar[src][q]))]
+    z = np.stack([NormResiduals(*meas[q], ref_polar[src][q]) for q in q_ref])
+    bias = ResidualStats(z, axis=1)['bias']
+    print(" Polar vs %s: chi2/n = %.1f (%s sigma)"%(src, ResidualStats(z)['red_chi2'], ", ".join("%s bias %+.1f"%(q, b) for q, b in zip(q_ref, bias))))
 
 print("Analysis Complete...")
 print("=========================================")
 # Plotting data
-CoeffGraph(alpha, Cl_list, dCl_list, Cd_list, dCd_list, Cm_list, dCm_list, Cdt_list, dCdt_list)
+PolarGraphs(polar, (Cm_ref[:, 1], dCm_ref[:, 1]))
+CachedGraph(CpContour, (alpha_grid, x_grid, Cp_surf, x_peak, x_sep), ['results\C_p-graphs\C_p-contour.png'])
+CachedGraph(CpWaterfall, (alpha, x_grid, Cp_meas[:, :len(x_grid)]), ['results\C_p-graphs\C_p-waterfall.png'])
 
 print("Saving Data CSVs...")
 # Saving data raw data to CSV
-PressuretoCSV(alpha, np.array(pressure_data))
-RakePressuretoCSV(alpha, np.array(rake_press), np.array(y_rake_pos))
-RakeUncertaintytoCSV(alpha, np.array(rake_press_err), np.array(y_rake_pos))
\ No newline at end of file
+PressuretoCSV(alpha, pressure_data)
+RakePressuretoCSV(alpha, rake_press, y_rake_pos)
+RakeUncertaintytoCSV(alpha, rake_press_err, y_rake_pos)
+PolartoCSV(polar)
+CptoCSV(alpha, Cp, Cp_err)
+PortBiastoCSV(port_stats)
+SavePolar(pq, stats=stats)
+WakeFittoCSV(alpha, wake, Cdw, dCdw)
+MomentstoCSV(alpha, x_ref/c, Cm_ref, dCm_ref, x_cp/c, dx_cp/c)
+if sync_loads:
+    SyncedLoadstoCSV(alpha, sync)
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Script for a quick look at the coefficients during a tunnel session, long before errorcalcs.py and main.py finish.
+    Each recording is first previewed from a short, decimated part of its time series, then refined
+    level by level to full resolution in the background, with bounds on how far each level can be from the full result.
+    {Depenancies}: scipy, numpy, statsmodels, pandas
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+import time
+
+# Custom Functions/libraies
+from PressuretoCSV import *
+from PolarRecord import *
+from Pipeline import *
+from Preview import *
+from Config import *
+
+
+# DEFINITIONS
+########################
+# taps, chord, AoAs, calibration, tubing, rake positions and recordings of the campaign are set in Config.py
+
+print("Loading Clark Y Airfoil Coordinates...")
+airfoil_top, airfoil_bot = LoadAirfoil(".\data\Clark_Y_Airfoil.csv", air_top_tap_pos, air_bot_tap_pos, c)
+# weights of every tap in the force resultants, the same geometry at every AoA
+W = ResultantWeights(airfoil_top, airfoil_bot)
+
+
+def LevelPolar(recs: list):
+    # preview polar, and bounds of the coefficients and of their uncertainties from the pressure bounds
+    p_a = np.array([r['p_a'] for r in recs])
+    dP_a = np.array([r['dP_a'] for r in recs])
+    air_bad, _ = PortHealth(p_a, dP_a, pos=air_top_tap_pos + air_bot_tap_pos,
+                            segments=[np.arange(0, 12), np.arange(12, 19)], bad=PortMask(air_bad_ports, 19))
+    rake_bad, _ = PortHealth(np.array([r['p_r1'] for r in recs] + [r['p_r2'] for r in recs]),
+                             np.array([r['dP_r1'] for r in recs] + [r['dP_r2'] for r in recs]),
+                             bad=PortMask(rake_bad_ports, 17), min_rows=2*min_aoa)
+
+    polar = PolarRecord(alpha)
+    bounds = PolarRecord(alpha)
+    for i, (a, r) in enumerate(zip(alpha, recs)):
+        run = lambda e_a, e_r1, e_r2, da: ProcessAoA(a, r['p_a'], r['p_r1'], r['p_r2'], e_a, e_r1, e_r2, y_0[i], y_0[i] + dir[i]*0.5,
+                                                     W, c, da, air_bad, rake_bad, plot=False)['polar']
+        polar[i] = run(r['dP_a'], r['dP_r1'], r['dP_r2'], dalpha)
+
+        # the coefficient bounds propagate the mean bounds, the uncertainty bounds compare with the uncertainties at their bound
+        shift = np.array(run(r['p_bound_a'], r['p_bound_r1'], r['p_bound_r2'], 0)[2::2])
+        wide = np.array(run(r['dP_a'] + r['dP_bound_a'], r['dP_r1'] + r['dP_bound_r1'], r['dP_r2'] + r['dP_bound_r2'], dalpha)[2::2])
+        bounds[i] = (a,) + tuple(np.ravel(np.column_stack((shift, np.abs(wide - np.array(polar[i].tolist()[2::2]))))))
+
+    return polar, bounds, air_bad, rake_bad
+
+
+# REFINING
+########################
+paths = [recordings%a for a in alpha]
+print("=========================================")
+print("Previewing %d recordings at %d levels (Ctrl+C to stop)..." % (len(paths), len(preview_levels)))
+print("=========================================")
+
+t0 = time.perf_counter()
+results, thread = RefineInBackground(paths, preview_levels, gain=gain, offset=offset, Hg2Pa=Hg2Pa, air_tubes=air_tubes,
+                                     rake_tubes=rake_tubes, f_s=f_s, nfft=nfft)
+recs = [None]*len(paths)
+masks = None
+try:
+    while True:
+        item = results.get()
+        if item is None:
+            break
+        if isinstance(item, Exception):
+            raise item
+        level, i, rec = item
+        recs[i] = rec
+        if i < len(paths) - 1:
+            continue
+
+        # a level is complete: every coefficient with its uncertainty and bounds from the full resolution
+        polar, bounds, air_bad, rake_bad = LevelPolar(recs)
+        frac, q = preview_levels[level]
+        print("Level %d (%g of each record, decimated by %d) after %.1f s:" % (level, frac, q, time.perf_counter() - t0))
+        # the bounds assume the same faulty ports as the full resolution result
+        print(" Faulty airfoil ports:", np.flatnonzero(air_bad) + 1, " Faulty rake ports:", np.flatnonzero(rake_bad) + 1,
+              "(changed)" if masks is not None and (np.any(masks[0] != air_bad) or np.any(masks[1] != rake_bad)) else "")
+        masks = (air_bad, rake_bad)
+        print("  AoA       Cl   (+/- dCl, bound)          Cd   (+/- dCd, bound)")
+        for P, B in zip(polar, bounds):
+            print(" %4d  %7.4f (+/- %.4f, %.4f)   %7.4f (+/- %.4f, %.4f)" % (P['alpha'], P['Cl'], P['dCl'], B['Cl'], P['Cd'], P['dCd'], B['Cd']))
+
+        # bounds CSV: each coefficient column is its bound, each d column the bound of its uncertainty
+        PolartoCSV(polar, '.\data\CSV\Preview_Polar.csv')
+        PolartoCSV(bounds, '.\data\CSV\Preview_Bounds.csv')
+
+    print("Full resolution reached in %.1f s." % (time.perf_counter() - t0))
+except KeyboardInterrupt:
+    print("Stopped previewing.")
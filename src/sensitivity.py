@@ -0,0 +1,84 @@
+"""
+Script for finding how the coefficients shift with the calibration, air density,
+    chord and AoA uncertainty, over a grid of values in one vectorized pass.
+    {Depenancies}: scipy, numpy, pandas
+"""
+# IMPORTS
+#####################
+# Dependancies
+from scipy import io
+import numpy as np
+import pandas as pd
+import os
+
+# Custom Functions/libraies
+from Sweep import *
+from Pipeline import *
+from PortHealth import *
+from Prefetch import *
+from Config import *
+
+
+# DEFINITIONS
+########################
+# taps, chord, AoAs, calibration, tubing, rake positions and recordings of the campaign are set in Config.py
+
+prefetch_depth = 2 # recordings read ahead in the background
+
+# swept values, any of gain, offset, rho_vel, rho_dyn, rho_drag, c, dalpha
+sweep = {
+    'gain': np.linspace(110, 120, 11),
+    'rho_dyn': np.linspace(1.18, 1.30, 13),
+    'rho_drag': np.linspace(1.18, 1.30, 13),
+    'c': np.linspace(0.098, 0.102, 5),
+}
+
+# LOADING CLARK_Y_AIRFOIL COORDINATES (per unit chord, the chord is swept)
+##############################
+airfoil_top, airfoil_bot = LoadAirfoil(".\data\Clark_Y_Airfoil.csv", air_top_tap_pos, air_bot_tap_pos, c=1)
+
+# LOADING RAW MEAN READINGS
+##############################
+raw = {'p_airfoil': np.zeros((len(alpha), 19)), 'p_rake1': np.zeros((len(alpha), 17)), 'p_rake2': np.zeros((len(alpha), 17))}
+paths = [recordings%a for a in alpha]
+for i, (path, data_raw) in enumerate(Prefetch(paths, prefetch_depth, keys=list(raw))):
+    for k in raw:
+        raw[k][i] = data_raw[k][0]
+
+err = {'dP_a': np.loadtxt('data\CSV\dP_airfoil.csv', delimiter=',', ndmin=2),
+       'dP_r1': np.loadtxt('data\CSV\dP_rakepos1.csv', delimiter=',', ndmin=2),
+       'dP_r2': np.loadtxt('data\CSV\dP_rakepos2.csv', delimiter=',', ndmin=2)}
+hf = [np.loadtxt(f, delimiter=',', ndmin=2) if os.path.exists(f) else None
+      for f in ('data\CSV\hf_airfoil.csv', 'data\CSV\hf_rakepos1.csv', 'data\CSV\hf_rakepos2.csv')]
+
+# faulty ports at the nominal calibration, scored as in main.py
+cal = lambda x: (x*gain + offset)*Hg2Pa
+air_bad, _ = PortHealth(cal(raw['p_airfoil']), err['dP_a'], hf[0], pos=air_top_tap_pos + air_bot_tap_pos,
+                        segments=[np.arange(0, 12), np.arange(12, 19)], bad=PortMask(air_bad_ports, 19))
+rake_bad, _ = PortHealth(np.vstack((cal(raw['p_rake1']), cal(raw['p_rake2']))), np.vstack((err['dP_r1'], err['dP_r2'])),
+                         None if hf[1] is None else np.vstack((hf[1], hf[2])),
+                         bad=PortMask(rake_bad_ports, 17), min_rows=2*min_aoa)
+
+# SWEEP
+########################
+cube = ParameterSweep(raw, err, airfoil_top, airfoil_bot, alpha, y_0, dir, air_bad, rake_bad, **sweep)
+nominal = ParameterSweep(raw, err, airfoil_top, airfoil_bot, alpha, y_0, dir, air_bad, rake_bad)
+
+# the sweep runs its own vectorized copy of the chain, at the nominal values it must give main.py's polar
+if os.path.exists('.\data\CSV\Polar.csv'):
+    polar = pd.read_csv('.\data\CSV\Polar.csv').rename(columns={'AoA (deg)': 'alpha'})
+    mismatch = SweepMismatch(nominal, polar)
+    print("Nominal sweep vs Polar.csv: largest difference", ", ".join("%s %.1e" % q for q in mismatch.items()))
+    if max(mismatch.values()) > 1e-6:
+        print(" the sweep no longer reproduces main.py, rerun main.py if its inputs changed, or fix the chain in Sweep.py")
+
+print("Swept", " x ".join("%s[%d]" % (k, len(cube['coords'][k])) for k in cube['dims'][:-1]))
+for coeff in ['Cl', 'Cd', 'Cm', 'Cdt']:
+    axes = tuple(range(len(cube['dims']) - 1))
+    lo = cube[coeff].min(axis=axes)
+    hi = cube[coeff].max(axis=axes)
+    print("%s: largest shift from nominal over the sweep = %.4f" % (coeff, np.max(np.maximum(hi - nominal[coeff], nominal[coeff] - lo))))
+
+np.savez('results\\sensitivity.npz', dims=np.array(cube['dims']),
+         **{'coord_' + k: v for k, v in cube['coords'].items()},
+         **{k: v for k, v in cube.items() if k not in ('dims', 'coords')})
@@ -0,0 +1,36 @@
+"""
+Script for serving the results of every campaign to other tools on this machine.
+    The CSVs of each run in data\Runs (see campaign.py) and of the latest main.py run are loaded once
+    into an in-memory index and queried over HTTP, runs being reloaded as they are written.
+    {Depenancies}: numpy, pandas
+"""
+# IMPORTS
+#####################
+# Custom Functions/libraies
+from ResultsIndex import *
+
+
+# DEFINITIONS
+########################
+runs_glob = ".\data\Runs\*"
+current = ".\data\CSV" # indexed as the 'current' campaign
+host = '127.0.0.1' # local only
+port = 8303
+poll = 2.0 # s between rescans of the results
+
+
+# SERVING
+########################
+server = ResultsServer(lambda: FindCampaigns(runs_glob, current), host, port, poll)
+print("Indexed campaigns:")
+for name, summary in IndexSummary(server.index()).items():
+    print(" %s: %d AoAs, %s" % (name, len(summary['alpha']), ", ".join(summary['quantities'])))
+print("=========================================")
+print("Serving on http://%s:%d (Ctrl+C to stop), e.g." % (host, port))
+print(" http://%s:%d/query?campaign=current&quantity=Cp&alpha=4,6&ports=1,2" % (host, port))
+print("=========================================")
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    print("Stopped serving.")
+server.server_close()
@@ -0,0 +1,192 @@
+"""
+Script for processing recordings as they land during a tunnel session.
+    Watches the filtered data folder for new or changed Experimental_data_*.mat files and
+    processes only those AoAs, keeping the geometry, reference data and earlier results in memory.
+    Only the mean readings are read, the uncertainties are taken from the errorcalcs.py checkpoint as they become available.
+    {Depenancies}: scipy, matplotlib, numpy, statsmodels, pandas
+"""
+# IMPORTS
+#####################
+# Dependancies
+import matplotlib.pyplot as plt
+import numpy as np
+import glob
+import os
+import re
+import time
+
+# Custom Functions/libraies
+from PressuretoCSV import *
+from PolarRecord import *
+from Pipeline import *
+from Checkpoint import *
+from Prefetch import LoadRecording
+from Config import *
+
+
+# DEFINITIONS
+########################
+# taps, chord, AoAs, calibration, tubing, rake positions and recordings of the campaign are set in Config.py
+# a recording is only processed once its AoA is listed in alpha there
+watch_glob = ".\data\Filtered\Experimental_data_*.mat"
+poll = 0.25 # s between folder scans
+
+print("Loading Clark Y Airfoil Coordinates...")
+airfoil_top, airfoil_bot = LoadAirfoil(".\data\Clark_Y_Airfoil.csv", air_top_tap_pos, air_bot_tap_pos, c)
+# weights of every tap in the force resultants, the same geometry at every AoA
+W = ResultantWeights(airfoil_top, airfoil_bot)
+
+# warm up the reference data used by the graphs
+XfoilPolar()
+UIUCPolar()
+
+# per AoA state: file signature, calibrated means, uncertainties and results
+known = {}
+seen = {}
+
+# the ports found faulty in the lab until min_aoa AoAs are recorded, then the mask found from them (see PortHealth)
+# is kept for the rest of the session, so results already exported do not change as more AoAs arrive
+air_bad = PortMask(air_bad_ports, 19)
+rake_bad = PortMask(rake_bad_ports, 17)
+frozen = False
+
+# errorcalcs.py checkpoint, reread when it changes
+ckpt = {}
+ckpt_sig = None
+
+
+def Signature(path: str):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+def CheckpointErr(a: float, sig: list):
+    # uncertainties and spectral fractions of one recording from the checkpoint, NaN until errorcalcs.py has done the port
+    out = {}
+    for name, group, n in (('_a', 'airfoil', 19), ('_r1', 'rake1', 17), ('_r2', 'rake2', 17)):
+        dP = [CheckpointValue(ckpt, a, group, k, sig, err_key) for k in range(n)]
+        hf = [CheckpointValue(ckpt, a, group + ' hf', k, sig, hf_key) for k in range(n)]
+        out['dP' + name] = np.array([np.nan if v is None else v for v in dP])
+        out['hf' + name] = np.array([np.nan if v is None else v for v in hf])
+    return out
+
+def FindPortHealth():
+    # scoring the ports over every AoA recorded so far, the noise level and spectral metrics once errorcalcs.py has them all
+    rec = [known[a] for a in sorted(known)]
+    get = lambda key: np.array([r[key] for r in rec])
+    full = lambda x: x if np.all(np.isfinite(x)) else None
+
+    bad_a, _ = PortHealth(get('p'), full(get('dP_a')), full(get('hf_a')), pos=air_top_tap_pos + air_bot_tap_pos,
+                          segments=[np.arange(0, 12), np.arange(12, 19)], bad=PortMask(air_bad_ports, 19))
+    bad_r, _ = PortHealth(np.vstack((get('p_r1'), get('p_r2'))), full(np.vstack((get('dP_r1'), get('dP_r2')))),
+                          full(np.vstack((get('hf_r1'), get('hf_r2')))), bad=PortMask(rake_bad_ports, 17), min_rows=2*min_aoa)
+    return bad_a, bad_r
+
+def Process(a: float):
+    i = alpha.index(a)
+    r = known[a]
+    r['res'] = ProcessAoA(a, r['p'], r['p_r1'], r['p_r2'], r['dP_a'], r['dP_r1'], r['dP_r2'],
+                          y_0[i], y_0[i] + dir[i]*0.5, W, c, dalpha, air_bad, rake_bad, tap_pos=(air_top_tap_pos, air_bot_tap_pos))
+
+def Export():
+    # polar, graphs and CSVs of every AoA processed so far
+    done = sorted(known)
+    polar = PolarRecord(done)
+    for k, a in enumerate(done):
+        polar[k] = known[a]['res']['polar']
+
+    # the references give Cm about the quarter chord, the polar about the leading edge
+    res = [known[a]['res'] for a in done]
+    Cm_qc, dCm_qc = MomentCoefficients(np.array([r['F'] for r in res]), np.array([r['F_cov'] for r in res]),
+                                       np.array([r['q_inf'] for r in res]), np.array([r['q_inf_err'] for r in res]), c, 0.25*c)
+    PolarGraphs(polar, (Cm_qc[:, 0], dCm_qc[:, 0]))
+    PressuretoCSV(done, [known[a]['p'] for a in done])
+    RakePressuretoCSV(done, [known[a]['res']['P_comb'] for a in done], [known[a]['res']['V_pos'] for a in done])
+    RakeUncertaintytoCSV(done, [known[a]['res']['P_comb_err'] for a in done], [known[a]['res']['V_pos'] for a in done])
+    PolartoCSV(polar)
+    CptoCSV(done, [np.concatenate((known[a]['res']['Cp_top'], known[a]['res']['Cp_bot'])) for a in done],
+            [np.concatenate((known[a]['res']['Cp_top_err'], known[a]['res']['Cp_bot_err'])) for a in done])
+
+    # uncertainties in the errorcalcs.py layout, rows of AoAs not recorded yet kept as they were (or NaN)
+    for name, key, n in (("data\CSV\dP_airfoil.csv", 'dP_a', 19), ("data\CSV\dP_rakepos1.csv", 'dP_r1', 17), ("data\CSV\dP_rakepos2.csv", 'dP_r2', 17)):
+        try:
+            dP = np.loadtxt(name, delimiter=',', ndmin=2)
+        except OSError:
+            dP = np.full((len(alpha), n), np.nan)
+        if dP.shape != (len(alpha), n):
+            dP = np.full((len(alpha), n), np.nan)
+        for a in done:
+            dP[alpha.index(a)] = known[a][key]
+        np.savetxt(name, dP, delimiter=",")
+
+
+# WATCHING
+########################
+print("=========================================")
+print("Watching %s (Ctrl+C to stop)..." % watch_glob)
+print("=========================================")
+try:
+    while True:
+        new = []
+        for path in glob.glob(watch_glob):
+            m = re.search(r'Experimental_data_(\d+)\.mat$', path)
+            if m is None or int(m.group(1)) not in alpha:
+                continue
+            a = int(m.group(1))
+            sig = Signature(path)
+
+            # only picked up once the file has stopped changing between two scans
+            if seen.get(path) != sig:
+                seen[path] = sig
+                continue
+            if a in known and known[a]['sig'] == sig:
+                continue
+
+            t0 = time.perf_counter()
+            print("Loading AoA = %d..." % a)
+            # the mean readings only, the time series are left to errorcalcs.py
+            data_raw = LoadRecording(path, keys=['p_airfoil', 'p_rake1', 'p_rake2'])
+            p, p_r1, p_r2 = CalibrateMeans(data_raw, gain, offset, Hg2Pa)
+            known[a] = {'sig': sig, 'file_sig': FileSignature(path), 'p': p, 'p_r1': p_r1, 'p_r2': p_r2, 't0': t0}
+            known[a].update(CheckpointErr(a, known[a]['file_sig']))
+            new.append(a)
+
+        # uncertainties errorcalcs.py has added since the last scan
+        updated = []
+        if os.path.exists(checkpoint) and Signature(checkpoint) != ckpt_sig:
+            ckpt_sig = Signature(checkpoint)
+            ckpt = LoadCheckpoint(checkpoint)
+            for a in known:
+                err = CheckpointErr(a, known[a]['file_sig'])
+                if any(not np.array_equal(err[k], known[a][k], equal_nan=True) for k in err):
+                    known[a].update(err)
+                    if a not in new:
+                        updated.append(a)
+
+        if not new and not updated:
+            time.sleep(poll)
+            continue
+
+        todo = sorted(set(new + updated))
+        # the mask is found once, from the first min_aoa AoAs, earlier AoAs are redone if it differs from the lab one
+        if not frozen and len(known) >= min_aoa:
+            frozen = True
+            bad_a, bad_r = FindPortHealth()
+            print(" Port mask fixed from %d AoAs:" % len(known))
+            print(" Faulty airfoil ports:", np.flatnonzero(bad_a) + 1)
+            print(" Faulty rake ports:", np.flatnonzero(bad_r) + 1)
+            if np.any(bad_a != air_bad) or np.any(bad_r != rake_bad):
+                air_bad, rake_bad = bad_a, bad_r
+                todo = sorted(known)
+
+        for a in todo:
+            print("Processing AoA = %d..." % a)
+            Process(a)
+        Export()
+
+        for a in new:
+            pending = sum(int(np.isnan(known[a][k]).sum()) for k in ('dP_a', 'dP_r1', 'dP_r2'))
+            print("AoA = %d done in %.2f s%s" % (a, time.perf_counter() - known[a]['t0'],
+                  " (%d port uncertainties pending, run errorcalcs.py)" % pending if pending else ""))
+
+except KeyboardInterrupt:
+    print("Stopped watching.")
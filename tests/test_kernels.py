@@ -0,0 +1,61 @@
+"""
+Tests for the compiled Numba kernels against the NumPy reference backend, skipped when numba is not installed
+    {Depenancies}: numpy, pytest, (optional) numba
+"""
+# IMPORTS
+#####################
+# Dependancies
+import numpy as np
+import os
+import sys
+import pytest
+
+pytest.importorskip('numba')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+# Custom Functions/libraies
+import Kernels
+
+
+@pytest.fixture(scope='module')
+def numba_backend():
+    if not Kernels._Compile('numba'):
+        pytest.skip("the numba backend does not compile here")
+    return 'numba'
+
+def test_check_backends(numba_backend):
+    assert Kernels.CheckBackends()[numba_backend] <= 1e-10
+
+@pytest.mark.parametrize('shape', [(19,), (12, 19), (3, 4, 19)])
+def test_surface_loads(numba_backend, shape):
+    rng = np.random.default_rng(1)
+    x = np.sort(rng.uniform(0, 1, shape[-1]))
+    geom = (np.arctan(np.diff(x**2)/np.diff(x)), np.diff(x) + 0.01, np.diff(x), np.diff(x**2))
+    p = rng.normal(300, 50, shape)
+    e = rng.uniform(0.1, 2, shape)
+
+    for sign in (-1.0, 1.0):
+        ref = Kernels.SurfaceLoads(p, e, geom, sign, 'numpy')
+        got = Kernels.SurfaceLoads(p, e, geom, sign, numba_backend)
+        assert len(got) == len(ref) == 4
+        for r, g in zip(ref, got):
+            assert np.shape(g) == shape[:-1]
+            np.testing.assert_allclose(g, r, rtol=1e-12, atol=1e-12)
+
+@pytest.mark.parametrize('shape', [(34,), (12, 34)])
+def test_momentum_deficit(numba_backend, shape):
+    rng = np.random.default_rng(2)
+    y = np.cumsum(rng.uniform(0.001, 0.02, shape), axis=-1)
+    v = rng.uniform(20, 30, shape)
+    u = rng.uniform(29, 31, shape[:-1])
+
+    ref = Kernels.MomentumDeficit(y, v, 0.01*v, u, 0.05, 1.29, 'numpy')
+    got = Kernels.MomentumDeficit(y, v, 0.01*v, u, 0.05, 1.29, numba_backend)
+    for r, g in zip(ref, got):
+        np.testing.assert_allclose(g, r, rtol=1e-12)
+
+def test_interleave(numba_backend):
+    rng = np.random.default_rng(3)
+    first, second = rng.normal(size=(2, 5, 17))
+
+    np.testing.assert_array_equal(Kernels.Interleave(first, second, numba_backend), Kernels.Interleave(first, second, 'numpy'))